@@ -33,7 +33,56 @@ def create_app():
     base_upload = os.path.join(app.root_path, "uploads")
     app.config["UPLOAD_FOLDER"] = os.environ.get("UPLOAD_FOLDER", base_upload)
     os.makedirs(os.path.join(app.config["UPLOAD_FOLDER"], "tasks"), exist_ok=True)
-    app.config.setdefault("MAX_CONTENT_LENGTH", 25 * 1024 * 1024)  # 25MB
+    # tamaño máximo de subida (25MB); se puede subir para migraciones grandes:
+    # las importaciones leen el archivo por partes desde disco
+    app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_CONTENT_LENGTH", str(25 * 1024 * 1024)))
+    app.config["IMPORT_CHUNK_ROWS"] = int(os.environ.get("IMPORT_CHUNK_ROWS", "1000"))
+    app.config["IMPORT_JOB_WORKERS"] = int(os.environ.get("IMPORT_JOB_WORKERS", "1"))
+    # importaciones: retención de trabajos/archivos y cuándo se dan por colgadas
+    app.config["IMPORT_JOB_RETENTION_HOURS"] = int(os.environ.get("IMPORT_JOB_RETENTION_HOURS", "72"))
+    app.config["IMPORT_JOB_PENDING_MINUTES"] = int(os.environ.get("IMPORT_JOB_PENDING_MINUTES", "5"))
+    app.config["IMPORT_JOB_TIMEOUT_MINUTES"] = int(os.environ.get("IMPORT_JOB_TIMEOUT_MINUTES", "60"))
+    # fechas ambiguas (05/03/2025) en importaciones: dmy = día/mes, mdy = mes/día
+    app.config["IMPORT_DATE_ORDER"] = os.environ.get("IMPORT_DATE_ORDER", "dmy")
+
+    # --- Exportaciones en segundo plano ---
+    app.config["EXPORT_FOLDER"] = os.environ.get("EXPORT_FOLDER", os.path.join(app.config["UPLOAD_FOLDER"], "exports"))
+    app.config["EXPORT_JOB_WORKERS"] = int(os.environ.get("EXPORT_JOB_WORKERS", "2"))
+    app.config["EXPORT_JOB_RETENTION_HOURS"] = int(os.environ.get("EXPORT_JOB_RETENTION_HOURS", "24"))
+    # pendientes/en progreso más viejos que esto se dan por muertos (caída o reinicio)
+    app.config["EXPORT_JOB_TIMEOUT_MINUTES"] = int(os.environ.get("EXPORT_JOB_TIMEOUT_MINUTES", "60"))
+
+    # --- PDFs grandes en varios procesos (une las partes con pypdf si está instalado) ---
+    app.config["PDF_WORKERS"] = int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+    app.config["PDF_PARALLEL_MIN_ROWS"] = int(os.environ.get("PDF_PARALLEL_MIN_ROWS", "5000"))
+    app.config["PDF_CHUNK_ROWS"] = int(os.environ.get("PDF_CHUNK_ROWS", "2000"))
+
+    # --- Reportes programados: adjuntos hasta este tamaño (si no, enlace) ---
+    app.config["REPORT_ATTACH_MAX_BYTES"] = int(os.environ.get("REPORT_ATTACH_MAX_BYTES", str(10 * 1024 * 1024)))
+    app.config["EXTERNAL_BASE_URL"] = os.environ.get("EXTERNAL_BASE_URL", "")
+
+    # --- Índice de PCs en memoria: segundos máximos sin recargar (varios procesos) ---
+    app.config["PC_INDEX_TTL"] = int(os.environ.get("PC_INDEX_TTL", "300"))
+
+    # --- Caché de reportes (ETag + LRU en memoria) ---
+    # entradas, tamaño máximo de cada respuesta y total en memoria (por proceso)
+    app.config["RESPONSE_CACHE_ENTRIES"] = int(os.environ.get("RESPONSE_CACHE_ENTRIES", "32"))
+    app.config["RESPONSE_CACHE_MAX_BYTES"] = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(1024 * 1024)))
+    app.config["RESPONSE_CACHE_TOTAL_BYTES"] = int(os.environ.get("RESPONSE_CACHE_TOTAL_BYTES", str(16 * 1024 * 1024)))
+
+    # --- Compresión gzip/brotli de respuestas de texto ---
+    app.config["COMPRESS_ENABLED"] = os.environ.get("COMPRESS_ENABLED", "true").lower() in ("1", "true", "yes")
+    app.config["COMPRESS_MIN_SIZE"] = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+    app.config["COMPRESS_LEVEL"] = int(os.environ.get("COMPRESS_LEVEL", "6"))
+
+    # --- Control de admisión (exportaciones / importación) ---
+    # ADMISSION_<CLASE>_<SLOTS|QUEUE|TIMEOUT|PER_USER>, clases EXPORT e IMPORT
+    app.config["ADMISSION_ENABLED"] = os.environ.get("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    for cls in ("EXPORT", "IMPORT"):
+        for param in ("SLOTS", "QUEUE", "TIMEOUT", "PER_USER"):
+            key = f"ADMISSION_{cls}_{param}"
+            if os.environ.get(key):
+                app.config[key] = int(os.environ[key])
 
     # --- Inicializar extensiones ---
     db.init_app(app)
@@ -44,7 +93,7 @@ def create_app():
     # --- Importar modelos (incluye Task/TaskAttachment) y blueprints ---
     from .models import (
         PC, Maintenance, Backup, Alert, User, ChangeLog, Config, EmailLog,
-        Task, TaskAttachment,
+        Task, TaskAttachment, ExportJob, ScheduledReport,
     )  # noqa
 
     from .routes import bp as main_bp
@@ -57,6 +106,10 @@ def create_app():
     from .tasks_import import bp as tasksimp_bp
     from .reports import bp as reports_bp
     from .inventory import bp as inventory_bp
+    from .export_jobs import bp as jobs_bp
+    from .activity import bp as activity_bp
+    from .exports_arrow import bp as analytics_bp
+    from .scheduled_reports import bp as schedules_bp, sync_scheduled_reports
     from .inventory_models import InventoryItem  # asegura creación de tabla
     from .time_helpers import to_local, now_local
     
@@ -70,6 +123,10 @@ def create_app():
     app.register_blueprint(tasksimp_bp, url_prefix="/tasks")
     app.register_blueprint(reports_bp, url_prefix="/reports")
     app.register_blueprint(inventory_bp, url_prefix="/inventory")
+    app.register_blueprint(jobs_bp, url_prefix="/jobs")
+    app.register_blueprint(activity_bp, url_prefix="/activity")
+    app.register_blueprint(analytics_bp)  # rutas /analytics/<dataset>.parquet|arrow
+    app.register_blueprint(schedules_bp, url_prefix="/admin/schedules")
 	
 	# --- Exportaciones extra: XLS y PDF (tasks/pcs) ---
     try:
@@ -113,6 +170,22 @@ def create_app():
             db.session.add(cfg)
             db.session.commit()
 
+    # --- Índice de texto completo de tareas (FTS5 / tsvector) ---
+    from .search import init_search
+    init_search(app)
+
+    # --- Tiempos de resolución de tareas (p50/p90/p99) ---
+    from .resolution import init_resolution
+    init_resolution(app)
+
+    # --- Contador de cambios para la marca de versión de reportes (ETag, artefactos) ---
+    from .watermark import init_watermark
+    init_watermark(app)
+
+    # --- Índice de PCs para el autocompletado (invalidado al crear/editar/borrar PCs) ---
+    from .pc_index import init_pc_index
+    init_pc_index(app)
+
     # --- Filtro Jinja: hora local ---
     from .time_helpers import to_local
 
@@ -123,6 +196,25 @@ def create_app():
 
     app.jinja_env.filters["localtime"] = _fmt_local
 
+    # --- Presupuesto de consultas por request (detecta N+1) ---
+    from .query_budget import init_query_budget
+    enforce = os.environ.get("QUERY_BUDGET_ENFORCE")
+    if enforce is not None:
+        app.config["QUERY_BUDGET_ENFORCE"] = enforce.lower() in ("1", "true", "yes", "on")
+    init_query_budget(app)
+
+    # --- Compresión de respuestas (gzip/brotli) ---
+    from .compression import init_compression
+    init_compression(app)
+
+    # --- Control de admisión para endpoints pesados ---
+    from .admission import init_admission
+    init_admission(app)
+
+    # --- Comandos CLI (flask ...) ---
+    from .commands import register_commands
+    register_commands(app)
+
 
     # --- Scheduler con TZ local ---
     scheduler.configure(timezone=_pytz_tz(app.config["TZ_NAME"]))
@@ -153,9 +245,10 @@ def create_app():
             "SUMMARY_MINUTE": int(os.environ.get("SUMMARY_MINUTE", "0")),
         }
 
-    def _send_email(subject, body, to_override=None):
+    def _send_email(subject, body, to_override=None, attachments=None):
         """Envío centralizado con logging robusto en EmailLog.
         Loguea SIEMPRE, aunque SMTP falle o la config esté incompleta.
+        attachments: lista opcional de (nombre, mimetype, bytes).
         """
         import smtplib
         from email.message import EmailMessage
@@ -186,6 +279,9 @@ def create_app():
             msg["From"] = mail_from
             msg["To"] = mail_to
             msg.set_content(body)
+            for name, mimetype, data in attachments or ():
+                maintype, _, subtype = (mimetype or "application/octet-stream").partition("/")
+                msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=name)
 
             with smtplib.SMTP(host, port, timeout=25) as s:
                 code, banner = s.noop()
@@ -225,6 +321,7 @@ def create_app():
     def check_maintenance_job():
         print("[scheduler] run check_maintenance_job", datetime.now())
         from .models import PC, Alert
+        from sqlalchemy.orm import selectinload
         with app.app_context():
             vals = get_config_values()
             alerts_enabled_flag = vals.get("ALERTS_ENABLED", True)
@@ -232,7 +329,8 @@ def create_app():
             backup_days = vals.get("BACKUP_DAYS", 7)
             now = now_local()
 
-            for pc in PC.query.all():
+            pcs = PC.query.options(selectinload(PC.maintenances), selectinload(PC.backups)).all()
+            for pc in pcs:
                 # --- Maintenance ---
                 last_m = pc.last_maintenance_date()
                 start_m = last_m or pc_created_date(pc)
@@ -285,6 +383,7 @@ def create_app():
     def send_daily_summary():
         print("[scheduler] run send_daily_summary", datetime.now())
         from .models import PC
+        from sqlalchemy.orm import selectinload
         with app.app_context():
             vals = get_config_values()
             if not (vals.get("ALERTS_ENABLED", True) and vals.get("SUMMARY_DAILY", False)):
@@ -297,7 +396,8 @@ def create_app():
                 start = last_date or pc_created_date(pc)
                 return (today - start).days
 
-            pcs = PC.query.order_by(PC.name.asc()).all()
+            pcs = (PC.query.options(selectinload(PC.maintenances), selectinload(PC.backups))
+                   .order_by(PC.name.asc()).all())
             lines = ["Resumen diario de PCs en alerta:", ""]
             count = 0
             for pc in pcs:
@@ -327,6 +427,7 @@ def create_app():
             send_daily_summary, "cron",
             hour=vals_env_hour, minute=vals_env_min, id="daily_summary", replace_existing=True
         )
+        sync_scheduled_reports(app)
         scheduler.start()
         print("[scheduler] iniciado (debug=%s, main=%s, interval=%s min)" %
               (app.debug, os.environ.get("WERKZEUG_RUN_MAIN"), interval_min))
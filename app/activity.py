@@ -0,0 +1,140 @@
+# app/activity.py
+"""Actividad unificada: mantenimientos, backups (y opcionalmente auditoría)
+mezclados en orden cronológico con un UNION ALL y paginados por cursor
+(fecha, tipo, id) con pagination.paginate, sin OFFSET. Las exportaciones de
+actividad consumen el mismo stream por lotes.
+"""
+from flask import Blueprint, jsonify, render_template, request
+from flask_login import login_required
+from sqlalchemy import Float, String, cast, literal, null, select, union_all
+
+from . import db
+from .models import PC, Maintenance, Backup, ChangeLog
+from .pagination import Page, page_limit, paginate
+
+bp = Blueprint("activity", __name__, template_folder="templates")
+
+ACTIVITY_KINDS = ("maintenance", "backup", "change")
+KIND_LABELS = {"maintenance": "Mantenimiento", "backup": "Backup", "change": "Cambio"}
+
+
+def activity_filters(args):
+    """Filtros desde query string: pc_id, start/end (inclusive), tech, kind (repetible)."""
+    from .exports import parse_dates
+    start, end = parse_dates(args)
+    pc_id = (args.get("pc_id") or "").strip()
+    kinds = [k for k in (args.getlist("kind") if hasattr(args, "getlist") else [args.get("kind")]) if k in ACTIVITY_KINDS]
+    return {
+        "start": start,
+        "end": end,
+        "pc_id": int(pc_id) if pc_id.isdigit() else None,
+        "tech": (args.get("tech") or "").strip() or None,
+        "kinds": kinds or ["maintenance", "backup"],
+    }
+
+
+def _union(f):
+    parts = []
+    if "maintenance" in f["kinds"]:
+        s = select(
+            literal("maintenance").label("kind"), Maintenance.id.label("id"), Maintenance.pc_id.label("pc_id"),
+            Maintenance.date_performed.label("ts"), Maintenance.performed_by.label("actor"),
+            Maintenance.description.label("detail"), cast(null(), String).label("status"),
+            cast(null(), Float).label("size_mb"), cast(null(), String).label("path"),
+        )
+        if f["pc_id"]: s = s.where(Maintenance.pc_id == f["pc_id"])
+        if f["start"]: s = s.where(Maintenance.date_performed >= f["start"])
+        if f["end"]: s = s.where(Maintenance.date_performed < f["end"])
+        if f["tech"]: s = s.where(Maintenance.performed_by.ilike(f"%{f['tech']}%"))
+        parts.append(s)
+    # Los backups no tienen técnico: si se filtra por técnico quedan afuera
+    if "backup" in f["kinds"] and not f["tech"]:
+        s = select(
+            literal("backup").label("kind"), Backup.id.label("id"), Backup.pc_id.label("pc_id"),
+            Backup.date_performed.label("ts"), cast(null(), String).label("actor"),
+            cast(null(), String).label("detail"), Backup.status.label("status"),
+            Backup.size_mb.label("size_mb"), Backup.path.label("path"),
+        )
+        if f["pc_id"]: s = s.where(Backup.pc_id == f["pc_id"])
+        if f["start"]: s = s.where(Backup.date_performed >= f["start"])
+        if f["end"]: s = s.where(Backup.date_performed < f["end"])
+        parts.append(s)
+    if "change" in f["kinds"]:
+        pc_ref = db.case((ChangeLog.entity == "PC", ChangeLog.entity_id), else_=None)
+        s = select(
+            literal("change").label("kind"), ChangeLog.id.label("id"), pc_ref.label("pc_id"),
+            ChangeLog.created_at.label("ts"), ChangeLog.username.label("actor"),
+            ChangeLog.details.label("detail"), ChangeLog.action.label("status"),
+            cast(null(), Float).label("size_mb"), ChangeLog.entity.label("path"),
+        )
+        if f["pc_id"]: s = s.where(ChangeLog.entity == "PC", ChangeLog.entity_id == f["pc_id"])
+        if f["start"]: s = s.where(ChangeLog.created_at >= f["start"])
+        if f["end"]: s = s.where(ChangeLog.created_at < f["end"])
+        if f["tech"]: s = s.where(ChangeLog.username.ilike(f"%{f['tech']}%"))
+        parts.append(s)
+    if not parts:
+        return None
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery("activity")
+
+
+def activity_select(f):
+    """(SELECT del stream con el nombre de la PC, claves de orden) o None si no hay partes.
+    Orden: más reciente primero, por (fecha, tipo, id)."""
+    act = _union(f)
+    if act is None:
+        return None
+    stmt = select(act, PC.name.label("pc_name")).outerjoin(PC, PC.id == act.c.pc_id)
+    return stmt, [("ts", act.c.ts), ("kind", act.c.kind), ("id", act.c.id)]
+
+
+def iter_activity(f, batch=1000):
+    """Recorre todo el stream en orden, leyendo de a `batch` filas (para exportaciones)."""
+    sel = activity_select(f)
+    if sel is None:
+        return
+    stmt, keys = sel
+    stmt = stmt.order_by(*[e.desc() for _n, e in keys]).execution_options(yield_per=batch)
+    yield from db.session.execute(stmt)
+
+
+def _row_dict(r):
+    return {
+        "kind": r.kind,
+        "id": r.id,
+        "pc_id": r.pc_id,
+        "pc": r.pc_name,
+        "date": r.ts.isoformat() if r.ts else None,
+        "actor": r.actor,
+        "detail": r.detail,
+        "status": r.status,
+        "size_mb": r.size_mb,
+        "path": r.path,
+    }
+
+
+def _page_from_request():
+    f = activity_filters(request.args)
+    sel = activity_select(f)
+    if sel is None:
+        return f, Page([], None, None, page_limit(request.args))
+    return f, paginate(*sel)
+
+# rutas
+
+@bp.route("/", strict_slashes=False)
+@login_required
+def stream():
+    f, page = _page_from_request()
+    pcs = db.session.execute(select(PC.id, PC.name).order_by(PC.name.asc())).all()
+    return render_template("activity.html", rows=page.rows, page=page, f=f, pcs=pcs, KIND_LABELS=KIND_LABELS)
+
+
+@bp.route("/api")
+@login_required
+def api():
+    _f, page = _page_from_request()
+    return jsonify({
+        "items": [_row_dict(r) for r in page.rows],
+        "next": page.next_url,
+        "prev": page.prev_url,
+    })
@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from .models import Alert, User, Config, EmailLog
 from . import db
+from .pagination import paginate
 
 bp = Blueprint("admin", __name__, template_folder="templates")
 
@@ -151,8 +152,9 @@ def email_logs():
     if not require_admin():
         flash("Solo admin puede ver logs de correo.", "error")
         return redirect(url_for("main.index"))
-    logs = EmailLog.query.order_by(EmailLog.created_at.desc()).limit(500).all()
-    return render_template("email_logs.html", logs=logs)
+    page = paginate(db.select(EmailLog), [("created_at", EmailLog.created_at), ("id", EmailLog.id)],
+                    lambda stmt: db.session.scalars(stmt).all(), default_limit=100)
+    return render_template("email_logs.html", logs=page.rows, page=page)
 
 @bp.route("/email-logs/clear", methods=["POST"])
 @login_required
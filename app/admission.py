@@ -0,0 +1,154 @@
+# app/admission.py
+"""Control de admisión para endpoints pesados (exportaciones, reportes PDF/XLSX,
+importación de tareas).
+
+Cada clase tiene una cantidad de lugares (requests simultáneos), una cola
+acotada con tiempo máximo de espera y un límite por usuario. Si no hay lugar
+se responde 503 (o 429 si el límite es del usuario) con Retry-After, así unas
+pocas exportaciones no ocupan todos los hilos y las páginas comunes siguen
+respondiendo. El lugar se libera en el teardown, después de terminar de
+enviar las respuestas en streaming.
+
+Las vistas con conditional_cache / prerendered (marcadas con `deferred`) no
+toman el lugar en before_request: lo toman recién cuando van a generar el
+reporte (`call_admitted`), así un 304, un acierto de caché o la descarga de un
+artefacto ya generado no ocupan lugar ni reciben 429/503.
+"""
+import threading
+from collections import defaultdict
+from fnmatch import fnmatch
+from flask import g, jsonify, make_response, request
+from flask_login import current_user
+
+DEFAULT_CLASSES = {
+    "export": {
+        "endpoints": ("exportx.*", "export.*", "reports.*_pdf", "reports.*_xlsx", "reports.bundle_zip",
+                      "inventory.export_xlsx", "inventory.export_pdf", "analytics.*"),
+        "slots": 2, "queue": 4, "timeout": 10, "per_user": 1,
+    },
+    "import": {
+        "endpoints": ("tasksimp.import_run",),
+        "slots": 1, "queue": 2, "timeout": 30, "per_user": 1,
+    },
+}
+
+
+class _Gate:
+    def __init__(self, name, slots, queue, timeout, per_user):
+        self.name = name
+        self.slots = max(int(slots), 1)
+        self.queue = max(int(queue), 0)
+        self.timeout = float(timeout)
+        self.per_user = int(per_user)
+        self.active = 0
+        self.waiting = 0
+        self.by_user = defaultdict(int)
+        self.cond = threading.Condition()
+
+    def acquire(self, user):
+        """None si entró; si no, (status, motivo)."""
+        with self.cond:
+            if self.per_user and self.by_user[user] >= self.per_user:
+                return 429, "Ya tenés una exportación o importación en curso; esperá a que termine."
+            if self.active >= self.slots:
+                if self.waiting >= self.queue:
+                    return 503, "Servidor ocupado con otras exportaciones o importaciones; reintentá en unos segundos."
+                self.waiting += 1
+                try:
+                    ok = self.cond.wait_for(lambda: self.active < self.slots, timeout=self.timeout)
+                finally:
+                    self.waiting -= 1
+                if not ok:
+                    return 503, "Servidor ocupado con otras exportaciones o importaciones; reintentá en unos segundos."
+            self.active += 1
+            self.by_user[user] += 1
+            return None
+
+    def release(self, user):
+        with self.cond:
+            self.active -= 1
+            self.by_user[user] -= 1
+            if self.by_user[user] <= 0:
+                del self.by_user[user]
+            self.cond.notify()
+
+
+def _build_gates(app):
+    gates = []
+    for name, spec in (app.config.get("ADMISSION_CLASSES") or DEFAULT_CLASSES).items():
+        params = {p: app.config.get(f"ADMISSION_{name.upper()}_{p.upper()}", spec[p])
+                  for p in ("slots", "queue", "timeout", "per_user")}
+        gates.append((tuple(spec["endpoints"]), _Gate(name, **params)))
+    return gates
+
+
+def _busy_response(status, message, retry_after):
+    if request.accept_mimetypes.best == "application/json" or request.args.get("format") == "json":
+        resp = jsonify({"error": "busy", "message": message})
+    else:
+        resp = make_response(message)
+        resp.mimetype = "text/plain"
+    resp.status_code = status
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp
+
+
+def deferred(wrapper):
+    """Marca una vista decorada que toma el lugar por su cuenta (ver call_admitted).
+    functools.wraps copia la marca a los decoradores de afuera (login_required)."""
+    wrapper._admission_deferred = True
+    return wrapper
+
+
+def call_admitted(view, *args, **kwargs):
+    """Llama a `view` tomando antes el lugar que before_request dejó pendiente.
+    Si `view` también es diferida, el lugar lo toma ella."""
+    pending = g.get("_admission_pending")
+    if pending is None or getattr(view, "_admission_deferred", False):
+        return view(*args, **kwargs)
+    g.pop("_admission_pending")
+    app, gate, user = pending
+    denied = gate.acquire(user)
+    if denied:
+        status, message = denied
+        app.logger.info("[admission] %s rechazado (%s) para %s", request.endpoint, status, user)
+        return _busy_response(status, message, max(int(gate.timeout), 1))
+    g._admission = (gate, user)
+    return view(*args, **kwargs)
+
+
+def init_admission(app):
+    gates = _build_gates(app)
+    app.extensions["admission"] = gates
+
+    def gate_for(endpoint):
+        for patterns, gate in gates:
+            if any(fnmatch(endpoint, p) for p in patterns):
+                return gate
+        return None
+
+    @app.before_request
+    def _admit():
+        if not app.config.get("ADMISSION_ENABLED", True) or not request.endpoint:
+            return None
+        gate = gate_for(request.endpoint)
+        if gate is None:
+            return None
+        user = current_user.get_id() if current_user.is_authenticated else request.remote_addr
+        if getattr(app.view_functions.get(request.endpoint), "_admission_deferred", False):
+            g._admission_pending = (app, gate, user)
+            return None
+        denied = gate.acquire(user)
+        if denied:
+            status, message = denied
+            app.logger.info("[admission] %s rechazado (%s) para %s", request.endpoint, status, user)
+            return _busy_response(status, message, max(int(gate.timeout), 1))
+        g._admission = (gate, user)
+        return None
+
+    @app.teardown_request
+    def _release(exc):
+        ticket = g.pop("_admission", None)
+        if ticket is not None:
+            gate, user = ticket
+            gate.release(user)
@@ -0,0 +1,127 @@
+# app/commands.py
+"""Comandos de mantenimiento (`flask <comando>`)."""
+from datetime import datetime, date
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from . import db
+
+# Formatos que aparecían en datos viejos (cargas manuales / importaciones previas)
+_LEGACY_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M", "%d-%m-%Y %H:%M")
+_LEGACY_DT_FORMATS = ("%Y-%m-%d %H:%M", "%d-%m-%Y %H:%M", "%Y-%m-%d", "%d-%m-%Y")
+
+
+def _legacy_parse(value, formats):
+    s = str(value).strip().replace("/", "-")
+    for fmt in formats:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def _is_iso(value, as_datetime):
+    if isinstance(value, (datetime, date)):
+        return True
+    try:
+        if as_datetime:
+            datetime.fromisoformat(str(value))
+        else:
+            date.fromisoformat(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+@click.command("tasks-clean-dates")
+@click.option("--dry-run", is_flag=True, help="Solo mostrar lo que se cambiaría.")
+@with_appcontext
+def tasks_clean_dates(dry_run):
+    """Normaliza (una sola vez) fechas de tareas guardadas como texto legacy."""
+    cols = (("start_date", False), ("end_date", False), ("created_at", True), ("updated_at", True))
+    # SQL crudo: con texto legacy el tipo Date del ORM ni siquiera puede cargar la fila
+    rows = db.session.execute(text("SELECT id, start_date, end_date, created_at, updated_at FROM task")).all()
+    fixed = unparsed = 0
+    for row in rows:
+        changes = {}
+        for idx, (col, as_dt) in enumerate(cols, start=1):
+            val = row[idx]
+            if val is None or _is_iso(val, as_dt):
+                continue
+            parsed = _legacy_parse(val, _LEGACY_DT_FORMATS if as_dt else _LEGACY_DATE_FORMATS)
+            if parsed is None:
+                unparsed += 1
+                click.echo(f"task {row[0]}: {col}={val!r} no se pudo interpretar")
+                continue
+            changes[col] = parsed.strftime("%Y-%m-%d %H:%M:%S.%f") if as_dt else parsed.date().isoformat()
+        if not changes:
+            continue
+        fixed += 1
+        click.echo(f"task {row[0]}: {changes}")
+        if not dry_run:
+            sets = ", ".join(f"{c} = :{c}" for c in changes)
+            db.session.execute(text(f"UPDATE task SET {sets} WHERE id = :id"), dict(changes, id=row[0]))
+    if not dry_run:
+        db.session.commit()
+    click.echo(f"Tareas corregidas: {fixed} | valores sin interpretar: {unparsed}" + (" (dry-run)" if dry_run else ""))
+
+
+@click.command("report-bundle")
+@click.argument("out", type=click.Path(dir_okay=False, writable=True))
+@click.option("--start", help="Tareas creadas desde (YYYY-MM-DD).")
+@click.option("--end", help="Tareas creadas hasta (YYYY-MM-DD).")
+@click.option("--alerts", is_flag=True, help="Solo PCs con alerta.")
+@with_appcontext
+def report_bundle(out, start, end, alerts):
+    """Genera el ZIP con los reportes de tareas y PCs en CSV, XLSX y PDF."""
+    from .reports import write_bundle
+    args = {"start": start, "end": end, "alerts": "1" if alerts else None}
+    write_bundle(out, {k: v for k, v in args.items() if v})
+    click.echo(f"Paquete generado: {out}")
+
+
+@click.command("export-arrow")
+@click.argument("dataset")
+@click.argument("out", type=click.Path(dir_okay=False, writable=True))
+@click.option("--format", "fmt", type=click.Choice(["parquet", "arrow"]), default=None,
+              help="Formato (por defecto, según la extensión de OUT).")
+@with_appcontext
+def export_arrow(dataset, out, fmt):
+    """Exporta un dataset (tasks, pcs, maintenances, backups, alerts, inventory) a Parquet/Arrow."""
+    from .exports_arrow import DATASETS, write_dataset
+    if dataset not in DATASETS:
+        raise click.BadParameter(f"dataset desconocido; opciones: {', '.join(DATASETS)}", param_hint="DATASET")
+    fmt = fmt or ("arrow" if out.endswith((".arrow", ".feather")) else "parquet")
+    try:
+        n = write_dataset(dataset, fmt, out)
+    except ImportError as e:
+        raise click.ClickException(f"Falta pyarrow: {e}")
+    click.echo(f"{dataset}: {n} filas -> {out}")
+
+
+@click.command("search-reindex")
+@with_appcontext
+def search_reindex():
+    """Reconstruye el índice de texto completo de tareas."""
+    from .search import rebuild_index
+    backend = rebuild_index()
+    click.echo(f"Índice de búsqueda reconstruido ({backend})." if backend
+               else "Sin índice de texto completo en este motor (se usa ILIKE).")
+
+
+@click.command("resolution-rebuild")
+@with_appcontext
+def resolution_rebuild():
+    """Reconstruye la tabla de tiempos de resolución de tareas."""
+    from .resolution import rebuild
+    click.echo(f"Tiempos de resolución reconstruidos: {rebuild()} tareas finalizadas.")
+
+
+def register_commands(app):
+    app.cli.add_command(tasks_clean_dates)
+    app.cli.add_command(report_bundle)
+    app.cli.add_command(export_arrow)
+    app.cli.add_command(search_reindex)
+    app.cli.add_command(resolution_rebuild)
@@ -0,0 +1,104 @@
+# app/compression.py
+"""Compresión gzip/brotli de respuestas de texto (HTML, CSV, .xls en HTML, JSON).
+
+Se negocia con Accept-Encoding (brotli si está instalado el paquete y el
+cliente lo acepta, si no gzip). Las respuestas con cuerpo en memoria se
+comprimen de una vez si pasan el umbral; las que salen por partes
+(exportaciones en streaming) se comprimen parte por parte con un flush por
+bloque, así el cliente va recibiendo datos sin esperar al final.
+"""
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    "text/html", "text/csv", "text/plain", "text/css", "text/javascript",
+    "application/json", "application/javascript", "application/vnd.ms-excel",
+    "image/svg+xml",
+)
+
+
+def _choose_encoding(accept):
+    if brotli is not None and accept["br"] > 0:
+        return "br"
+    if accept["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+def _encode_chunk(chunk):
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def _gzip_stream(chunks, level):
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    try:
+        for chunk in chunks:
+            data = z.compress(_encode_chunk(chunk)) + z.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield z.flush()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def _brotli_quality(level):
+    """Calidad brotli para un nivel gzip (1-9): 6 -> 5. La 11 por defecto es
+    demasiado lenta para comprimir respuestas al vuelo."""
+    return max(0, min(level - 1, 11))
+
+
+def _brotli_stream(chunks, quality):
+    c = brotli.Compressor(quality=quality)
+    try:
+        for chunk in chunks:
+            data = c.process(_encode_chunk(chunk)) + c.flush()
+            if data:
+                yield data
+        yield c.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def init_compression(app):
+    @app.after_request
+    def _compress(resp):
+        cfg = app.config
+        if not cfg.get("COMPRESS_ENABLED", True):
+            return resp
+        if resp.mimetype not in cfg.get("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES):
+            return resp
+        resp.vary.add("Accept-Encoding")
+        if (resp.status_code < 200 or resp.status_code in (204, 304)
+                or "Content-Encoding" in resp.headers or resp.direct_passthrough):
+            return resp
+        encoding = _choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return resp
+
+        level = int(cfg.get("COMPRESS_LEVEL", 6))
+        if resp.is_streamed:
+            if encoding == "br":
+                resp.response = _brotli_stream(resp.response, _brotli_quality(level))
+            else:
+                resp.response = _gzip_stream(resp.response, level)
+            resp.headers.pop("Content-Length", None)
+        else:
+            data = resp.get_data()
+            if len(data) < int(cfg.get("COMPRESS_MIN_SIZE", 1024)):
+                return resp
+            if encoding == "br":
+                resp.set_data(brotli.compress(data, quality=_brotli_quality(level)))
+            else:
+                resp.set_data(gzip.compress(data, compresslevel=level))
+        resp.headers["Content-Encoding"] = encoding
+        return resp
@@ -0,0 +1,126 @@
+# app/date_infer.py
+"""Fechas de columnas importadas: el formato se infiere una vez por columna.
+
+En lugar de probar varios strptime por celda (cada intento fallido es una
+excepción), se mira una muestra de la columna, se elige el formato que más
+valores interpreta y se aplica ese parser (una regex compilada) a toda la
+columna. Si una muestra es ambigua entre DD/MM y MM/DD (todos los días <= 12)
+gana `prefer` (por defecto DD/MM) y queda marcado en el reporte. Los valores
+que no responden al formato elegido se prueban con los demás, salvo los del
+orden día/mes contrario (una columna no se lee con las dos convenciones); los
+que no encajan se cuentan en el reporte de la columna.
+"""
+import re
+from datetime import date, datetime
+
+# (etiqueta, regex, orden de los grupos año/mes/día)
+FORMATS = (
+    ("AAAA-MM-DD", r"(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?", "ymd"),
+    ("DD/MM/AAAA", r"(\d{1,2})/(\d{1,2})/(\d{4})", "dmy"),
+    ("MM/DD/AAAA", r"(\d{1,2})/(\d{1,2})/(\d{4})", "mdy"),
+    ("DD-MM-AAAA", r"(\d{1,2})-(\d{1,2})-(\d{4})", "dmy"),
+    ("MM-DD-AAAA", r"(\d{1,2})-(\d{1,2})-(\d{4})", "mdy"),
+    ("AAAA/MM/DD", r"(\d{4})/(\d{1,2})/(\d{1,2})", "ymd"),
+    ("DD.MM.AAAA", r"(\d{1,2})\.(\d{1,2})\.(\d{4})", "dmy"),
+)
+SAMPLE_SIZE = 500
+EXAMPLES = 5
+
+
+def _compile(pattern, order):
+    match = re.compile(pattern + r"\Z").match
+    iy, im, id_ = order.index("y") + 1, order.index("m") + 1, order.index("d") + 1
+
+    def parse(s):
+        m = match(s)
+        if m is None:
+            return None
+        try:
+            return date(int(m.group(iy)), int(m.group(im)), int(m.group(id_)))
+        except ValueError:  # 31/02, mes 13...
+            return None
+    return parse
+
+
+PARSERS = [(label, _compile(pattern, order)) for label, pattern, order in FORMATS]
+ORDERS = {label: order for label, _pattern, order in FORMATS}
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def parse_any(value):
+    """Una fecha con cualquiera de los formatos conocidos (para valores sueltos)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    s = _text(value)
+    if not s:
+        return None
+    for _label, parse in PARSERS:
+        d = parse(s)
+        if d is not None:
+            return d
+    return None
+
+
+class DateColumn:
+    """Parser de una columna con el formato inferido y el reporte de lo que no se pudo leer."""
+
+    def __init__(self, name, fmt=None, ambiguous=False):
+        self.name = name
+        self.fmt = fmt
+        self.ambiguous = ambiguous
+        self.unparseable = 0
+        self.examples = []
+        parsers = dict(PARSERS)
+        main = parsers.get(fmt)
+        # con DD/MM inferido, un "02/13/2026" no se lee como MM/DD (y viceversa): es ilegible
+        opposite = {"dmy": "mdy", "mdy": "dmy"}.get(ORDERS.get(fmt))
+        self._chain = ([main] if main else []) + [p for label, p in PARSERS
+                                                  if label != fmt and ORDERS[label] != opposite]
+
+    def parse(self, value):
+        """date, None si la celda está vacía; ValueError si no se puede interpretar."""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        s = _text(value)
+        if not s:
+            return None
+        for parse in self._chain:
+            d = parse(s)
+            if d is not None:
+                return d
+        self.unparseable += 1
+        if len(self.examples) < EXAMPLES:
+            self.examples.append(s)
+        raise ValueError(s)
+
+    def report(self):
+        return {"column": self.name, "format": self.fmt, "ambiguous": self.ambiguous,
+                "unparseable": self.unparseable, "examples": self.examples}
+
+
+def infer_column(name, values, prefer="dmy"):
+    """DateColumn para la columna `name` a partir de una muestra de sus valores."""
+    texts = [s for s in (_text(v) for v in values if not isinstance(v, date)) if s][:SAMPLE_SIZE]
+    if not texts:
+        return DateColumn(name)
+    scores = []
+    for label, parse in PARSERS:
+        ok = sum(1 for s in texts if parse(s) is not None)
+        if ok:
+            scores.append((ok, label))
+    if not scores:
+        return DateColumn(name)
+    best = max(ok for ok, _label in scores)
+    tied = [label for ok, label in scores if ok == best]
+    if len(tied) == 1:
+        return DateColumn(name, tied[0])
+    # DD/MM contra MM/DD con la misma cantidad de aciertos: decide `prefer`
+    preferred = [label for label in tied if label.startswith("DD" if prefer == "dmy" else "MM")]
+    return DateColumn(name, (preferred or tied)[0], ambiguous=True)
@@ -0,0 +1,113 @@
+# app/export_format.py
+"""Formato de celdas para exportaciones.
+
+Cada exportación declara sus columnas una vez, con un tipo por columna, y
+`compile_row` arma la tupla de funciones de formato con la zona horaria y la
+config ya resueltas. Después se aplica fila por fila sin volver a leer
+current_app ni crear ZoneInfo por celda. Todas las exportaciones muestran
+así la misma hora local.
+
+Tipos: text, raw, date, datetime (marca UTC -> hora local), status,
+capitalize, yesno. Con native=True (XLSX) fechas y horas quedan como
+date/datetime locales para que Excel las tome como fechas.
+"""
+from collections import namedtuple
+from datetime import date, datetime
+
+from .time_helpers import local_converter
+
+ExportColumn = namedtuple("ExportColumn", "key header kind")
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# estados legacy -> etiqueta visual actual
+STATUS_LABELS = {
+    "pendiente": "Pendiente",
+    "en progreso": "En progreso",
+    "en_progreso": "En progreso",
+    "progreso": "En progreso",
+    "hecho": "Finalizada",
+    "finalizado": "Finalizada",
+    "finalizada": "Finalizada",
+    "cerrado": "Finalizada",
+    "ok": "Finalizada",
+    "done": "Finalizada",
+}
+
+
+def norm_status(s):
+    """Mapea estados legacy al set visual actual."""
+    if not s:
+        return ""
+    return STATUS_LABELS.get(s.strip().lower(), s.capitalize())
+
+
+def _text(v):
+    return "" if v is None else v
+
+
+def _capitalize(v):
+    return str(v or "").capitalize()
+
+
+def _yes_no(v):
+    return "Sí" if v else "No"
+
+
+def _date_formatter(native):
+    def fmt(v):
+        if v is None:
+            return ""
+        if isinstance(v, datetime):
+            v = v.date()
+        if isinstance(v, date):
+            return v if native else v.isoformat()
+        # texto legacy: ver `flask tasks-clean-dates`
+        return str(v)
+    return fmt
+
+
+def _datetime_formatter(native):
+    to_local = local_converter()
+
+    def fmt(v):
+        if v is None:
+            return ""
+        if isinstance(v, datetime):
+            loc = to_local(v).replace(tzinfo=None)
+            # isoformat = DATETIME_FORMAT, bastante más rápido que strftime
+            return loc if native else loc.isoformat(" ", "minutes")
+        if isinstance(v, date):
+            return datetime.combine(v, datetime.min.time()) if native else v.strftime(DATETIME_FORMAT)
+        return str(v)
+    return fmt
+
+
+def _formatter(kind, native):
+    if kind == "date":
+        return _date_formatter(native)
+    if kind == "datetime":
+        return _datetime_formatter(native)
+    simple = {"text": _text, "raw": _text, "status": norm_status,
+              "capitalize": _capitalize, "yesno": _yes_no}
+    if kind not in simple:
+        raise ValueError(f"Tipo de columna desconocido: {kind}")
+    return simple[kind]
+
+
+def compile_row(kinds, native=False):
+    """Función fila -> lista formateada para los tipos `kinds` (en orden)."""
+    fmts = tuple(_formatter(k, native) for k in kinds)
+
+    def fmt_row(row):
+        return [f(v) for f, v in zip(fmts, row)]
+    return fmt_row
+
+
+def format_rows(rows, columns, native=False):
+    """Formatea un iterable de filas (valores en el orden de `columns`)."""
+    return map(compile_row([c.kind for c in columns], native), rows)
+
+
+def headers(columns):
+    return [c.header for c in columns]
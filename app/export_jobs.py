@@ -0,0 +1,302 @@
+# app/export_jobs.py
+"""Exportaciones pesadas en segundo plano.
+
+Un request encola (tipo + filtros), un hilo del pool "exports" renderiza el
+archivo a disco y el navegador consulta el estado hasta poder descargarlo.
+Pedidos idénticos con los datos sin cambios reutilizan el artefacto existente.
+Cada usuario ve solo sus trabajos (admin ve todos); un artefacto terminado de
+otro usuario se comparte con un trabajo propio que apunta al mismo archivo.
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import Blueprint, current_app, jsonify, redirect, render_template, request, send_file, url_for, abort
+from flask_login import login_required, current_user
+
+from . import db
+from .admission import call_admitted, deferred
+from .jobs import submit
+from .models import ExportJob, ScheduledReport
+from .watermark import data_watermark
+
+bp = Blueprint("jobs", __name__, template_folder="templates")
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _kinds():
+    """kind -> (título, nombre de archivo, mimetype, render(args, progress) -> bytes)."""
+    from .exports_extra import render_tasks_pdf
+    from .exports import render_activity_xlsx
+    from .reports import render_pcs_pdf, render_pcs_xlsx, render_tasks_xlsx
+    return {
+        "tasks_pdf": ("Reporte de tareas (PDF)", "tareas.pdf", "application/pdf", render_tasks_pdf),
+        "tasks_xlsx": ("Reporte de tareas (Excel)", "tasks_report.xlsx", XLSX_MIME, render_tasks_xlsx),
+        "actividad_xlsx": ("Actividad (Excel)", "actividad.xlsx", XLSX_MIME, render_activity_xlsx),
+        "pcs_pdf": ("Reporte de PCs (PDF)", "pcs_report.pdf", "application/pdf", render_pcs_pdf),
+        "pcs_xlsx": ("Reporte de PCs (Excel)", "pcs_report.xlsx", XLSX_MIME, render_pcs_xlsx),
+    }
+
+
+def export_kinds():
+    """[(kind, título)] de las exportaciones disponibles (para formularios)."""
+    return [(k, v[0]) for k, v in _kinds().items()]
+
+# Progreso en memoria (0-100) de los trabajos que corren en este proceso.
+# Se guarda aparte de la DB para no escribir mientras el render tiene lecturas abiertas.
+_progress = {}
+_progress_lock = threading.Lock()
+
+
+def _set_progress(job_id, pct):
+    with _progress_lock:
+        _progress[job_id] = max(0, min(int(pct), 100))
+
+
+def export_dir():
+    d = current_app.config.get("EXPORT_FOLDER") or os.path.join(current_app.config["UPLOAD_FOLDER"], "exports")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _norm_params(args):
+    """Filtros relevantes, sin vacíos y en orden estable."""
+    return {k: v for k, v in sorted(args.items()) if v not in (None, "") and k != "format"}
+
+
+def _cache_key(kind, params):
+    raw = json.dumps([kind, params, data_watermark()], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _artifact_ok(job):
+    return job.status == "listo" and job.path and os.path.isfile(job.path)
+
+
+def _find_done(key):
+    job = (ExportJob.query.filter_by(cache_key=key, status="listo")
+           .order_by(ExportJob.finished_at.desc()).first())
+    return job if job and _artifact_ok(job) else None
+
+
+def find_artifact(kind, args):
+    """Trabajo terminado para (kind, filtros) con los datos actuales, o None."""
+    return _find_done(_cache_key(kind, _norm_params(args)))
+
+
+def prerendered(kind):
+    """Decorador: si ya hay un artefacto para (kind, filtros) con los datos actuales
+    (p. ej. de un reporte programado), lo sirve en lugar de volver a generarlo."""
+    def deco(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            job = find_artifact(kind, request.args)
+            if job is None:
+                return call_admitted(view, *args, **kwargs)
+            return send_file(job.path, mimetype=job.mimetype, as_attachment=True, download_name=job.filename)
+        return deferred(wrapper)
+    return deco
+
+
+def _purge_old():
+    hours = int(current_app.config.get("EXPORT_JOB_RETENTION_HOURS", 24))
+    limit = datetime.utcnow() - timedelta(hours=hours)
+    # el último artefacto de cada reporte programado se conserva
+    keep = db.select(ScheduledReport.last_job_id).where(ScheduledReport.last_job_id.is_not(None))
+    old = ExportJob.query.filter(ExportJob.created_at < limit, ExportJob.id.not_in(keep)).all()
+    if not old:
+        return
+    paths = {job.path for job in old if job.path}
+    for job in old:
+        db.session.delete(job)
+    db.session.flush()
+    # un archivo compartido entre usuarios se borra cuando ya no lo usa ningún trabajo
+    in_use = set(db.session.scalars(db.select(ExportJob.path).where(ExportJob.path.in_(paths))))
+    db.session.commit()
+    for path in paths - in_use:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _expire_stale():
+    """Marca como error los trabajos que siguen pendientes/en progreso pasado el timeout
+    (el proceso que los corría se cayó o se reinició): así un pedido igual encola uno nuevo."""
+    minutes = int(current_app.config.get("EXPORT_JOB_TIMEOUT_MINUTES", 60))
+    limit = datetime.utcnow() - timedelta(minutes=minutes)
+    res = db.session.execute(
+        db.update(ExportJob)
+        .where(ExportJob.status.in_(("pendiente", "en_progreso")),
+               db.func.coalesce(ExportJob.started_at, ExportJob.created_at) < limit)
+        .values(status="error", error=f"Sin terminar después de {minutes} min (trabajo interrumpido)",
+                finished_at=datetime.utcnow()))
+    if res.rowcount:
+        db.session.commit()
+
+
+def enqueue_export(kind, args, username=None):
+    """Devuelve el ExportJob para (kind, filtros): uno reutilizable o uno nuevo encolado."""
+    kinds = _kinds()
+    if kind not in kinds:
+        raise KeyError(kind)
+    _purge_old()
+    _expire_stale()
+    params = _norm_params(args)
+    key = _cache_key(kind, params)
+
+    existing = (ExportJob.query
+                .filter(ExportJob.cache_key == key, ExportJob.username == username,
+                        ExportJob.status.in_(("pendiente", "en_progreso", "listo")))
+                .order_by(ExportJob.created_at.desc()).first())
+    if existing and (existing.status != "listo" or _artifact_ok(existing)):
+        return existing
+    done = _find_done(key)
+    if done is not None:
+        return _share_job(done, username)
+
+    job = _new_job(kind, params, key, username)
+    submit("exports", _run_export, job.id,
+           workers=current_app.config.get("EXPORT_JOB_WORKERS", 2))
+    return job
+
+
+def render_export_now(kind, args, username=None):
+    """Genera (o reutiliza) el artefacto en el hilo actual; para el scheduler.
+    Devuelve el ExportJob terminado (status "listo" o "error")."""
+    if kind not in _kinds():
+        raise KeyError(kind)
+    job = find_artifact(kind, args)
+    if job is not None:
+        return job
+    params = _norm_params(args)
+    job = _new_job(kind, params, _cache_key(kind, params), username)
+    _run_export(job.id)
+    return db.session.get(ExportJob, job.id)
+
+
+def _new_job(kind, params, key, username):
+    _title, filename, mimetype, _render = _kinds()[kind]
+    job = ExportJob(id=uuid.uuid4().hex, kind=kind, params=json.dumps(params, sort_keys=True),
+                    cache_key=key, status="pendiente", filename=filename, mimetype=mimetype,
+                    username=username)
+    db.session.add(job)
+    db.session.commit()
+    _set_progress(job.id, 0)
+    return job
+
+
+def _share_job(done, username):
+    """Trabajo terminado de `username` con el artefacto de otro (mismo archivo)."""
+    now = datetime.utcnow()
+    job = ExportJob(id=uuid.uuid4().hex, kind=done.kind, params=done.params, cache_key=done.cache_key,
+                    status="listo", filename=done.filename, path=done.path, mimetype=done.mimetype,
+                    size=done.size, username=username, started_at=now, finished_at=now)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _run_export(job_id):
+    job = db.session.get(ExportJob, job_id)
+    if job is None:
+        return
+    _title, _filename, _mimetype, render = _kinds()[job.kind]
+    job.status = "en_progreso"
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+    try:
+        data = render(json.loads(job.params or "{}"), lambda pct: _set_progress(job_id, pct))
+        ext = os.path.splitext(job.filename or "")[1]
+        path = os.path.join(export_dir(), f"{job.id}{ext}")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        job.path = path
+        job.size = len(data)
+        job.status = "listo"
+        _set_progress(job_id, 100)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(ExportJob, job_id)
+        job.status = "error"
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def job_status(job):
+    with _progress_lock:
+        pct = _progress.get(job.id)
+    if job.status == "listo":
+        pct = 100
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": pct if pct is not None else 0,
+        "error": job.error,
+        "size": job.size,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": url_for("jobs.status", job_id=job.id),
+        "download_url": url_for("jobs.download", job_id=job.id) if job.status == "listo" else None,
+    }
+
+
+def _user_job(job_id):
+    """ExportJob del usuario actual (admin: cualquiera); 404 si es de otro.
+    Los de reportes programados ("programado:<id>") se envían por correo y los ve cualquiera."""
+    job = ExportJob.query.get_or_404(job_id)
+    owner = job.username or ""
+    if (getattr(current_user, "role", "user") != "admin" and not owner.startswith("programado:")
+            and owner != getattr(current_user, "username", None)):
+        abort(404)
+    return job
+
+
+def _wants_json():
+    best = request.accept_mimetypes.best_match(["application/json", "text/html"])
+    return best == "application/json" or request.args.get("format") == "json"
+
+# rutas
+
+@bp.route("/export/<kind>", methods=["GET", "POST"])
+@login_required
+def export(kind):
+    args = request.form if request.method == "POST" else request.args
+    try:
+        job = enqueue_export(kind, args, username=getattr(current_user, "username", None))
+    except KeyError:
+        abort(404)
+    if _wants_json():
+        return jsonify(job_status(job)), 202
+    return redirect(url_for("jobs.view", job_id=job.id))
+
+
+@bp.route("/<job_id>")
+@login_required
+def view(job_id):
+    job = _user_job(job_id)
+    title = _kinds().get(job.kind, (job.kind,))[0]
+    return render_template("export_job.html", job=job, title=title, info=job_status(job))
+
+
+@bp.route("/<job_id>/status")
+@login_required
+def status(job_id):
+    return jsonify(job_status(_user_job(job_id)))
+
+
+@bp.route("/<job_id>/download")
+@login_required
+def download(job_id):
+    job = _user_job(job_id)
+    if not _artifact_ok(job):
+        abort(404)
+    return send_file(job.path, mimetype=job.mimetype, as_attachment=True, download_name=job.filename)
@@ -2,13 +2,17 @@ from flask import Blueprint, send_file, request
 from io import BytesIO
 from datetime import datetime, timedelta
 from flask_login import login_required, current_user
-from .models import PC, Maintenance, Backup
+from sqlalchemy.orm import selectinload
+from .models import PC
 from .utils import pcs_to_workbook, activity_to_workbook, activity_to_pdf
+from .http_cache import conditional_cache
+from .activity import activity_filters, iter_activity
 
 bp = Blueprint("export", __name__)
 
-def parse_dates():
-    s = request.args.get("start"); e = request.args.get("end")
+def parse_dates(args=None):
+    args = request.args if args is None else args
+    s = args.get("start"); e = args.get("end")
     def norm(val):
         if val is None: return None
         val = str(val).strip().lower()
@@ -24,38 +28,39 @@ def parse_dates():
 
 @bp.route("/excel")
 @login_required
+@conditional_cache
 def excel():
     if current_user.role != "admin":
         return ("Solo admin puede exportar.", 403)
     from .models import Config
     cfg = Config.query.get(1)
     maint_days = cfg.maintenance_days if cfg else 7
-    wb = pcs_to_workbook(PC.query.order_by(PC.name.asc()).all(), maint_days=maint_days)
+    from .utils import pc_created_dates_map
+    pcs = PC.query.options(selectinload(PC.maintenances)).order_by(PC.name.asc()).all()
+    wb = pcs_to_workbook(pcs, maint_days=maint_days, created_dates=pc_created_dates_map())
     bio = BytesIO(); wb.save(bio); bio.seek(0)
     return send_file(bio, as_attachment=True, download_name=f"pcs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx", mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
+def render_activity_xlsx(args=None, progress=None):
+    """Excel de actividad (bytes) para los trabajos de exportación en segundo plano."""
+    f = activity_filters(request.args if args is None else args)
+    if progress: progress(10)
+    wb = activity_to_workbook(iter_activity(f))
+    if progress: progress(90)
+    bio = BytesIO(); wb.save(bio)
+    return bio.getvalue()
+
 @bp.route("/actividad/excel")
 @login_required
+@conditional_cache
 def actividad_excel():
-    start, end = parse_dates()
-    q_m = Maintenance.query
-    q_b = Backup.query
-    if start: q_m = q_m.filter(Maintenance.date_performed >= start); q_b = q_b.filter(Backup.date_performed >= start)
-    if end: q_m = q_m.filter(Maintenance.date_performed < end); q_b = q_b.filter(Backup.date_performed < end)
-    wb = activity_to_workbook(q_m.order_by(Maintenance.date_performed.desc()).all(),
-                              q_b.order_by(Backup.date_performed.desc()).all())
-    bio = BytesIO(); wb.save(bio); bio.seek(0)
+    bio = BytesIO(render_activity_xlsx()); bio.seek(0)
     return send_file(bio, as_attachment=True, download_name=f"actividad_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx", mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
 @bp.route("/actividad/pdf")
 @login_required
+@conditional_cache
 def actividad_pdf():
-    start, end = parse_dates()
-    q_m = Maintenance.query
-    q_b = Backup.query
-    if start: q_m = q_m.filter(Maintenance.date_performed >= start); q_b = q_b.filter(Backup.date_performed >= start)
-    if end: q_m = q_m.filter(Maintenance.date_performed < end); q_b = q_b.filter(Backup.date_performed < end)
-    bio = activity_to_pdf(q_m.order_by(Maintenance.date_performed.desc()).all(),
-                          q_b.order_by(Backup.date_performed.desc()).all())
+    bio = activity_to_pdf(iter_activity(activity_filters(request.args)))
     bio.seek(0)
     return send_file(bio, as_attachment=True, download_name=f"actividad_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf", mimetype="application/pdf")
@@ -0,0 +1,214 @@
+# app/exports_arrow.py
+"""Exportación columnar (Parquet / Arrow IPC) para el equipo de BI.
+
+Columnas tipadas (enteros, fechas, timestamps, booleanos) escritas por lotes
+de registros directamente desde consultas por partes, sin pasar por texto.
+pyarrow es opcional: sin él las rutas responden 501.
+
+Rutas: /analytics/<dataset>.parquet y /analytics/<dataset>.arrow
+CLI:   flask export-arrow <dataset> <archivo.parquet|archivo.arrow>
+"""
+import tempfile
+from datetime import date, datetime
+from flask import Blueprint, abort, make_response, send_file
+from flask_login import login_required
+
+from . import db
+from .models import PC, Task, Maintenance, Backup, Alert
+from .inventory_models import InventoryItem
+from .http_cache import conditional_cache
+
+bp = Blueprint("analytics", __name__)
+
+ARROW_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+BATCH_ROWS = 10000
+
+def _arrow_type(pa, kind):
+    # "utc" = marca guardada con utcnow (se exporta con tz=UTC);
+    # "timestamp" = fecha/hora cargada por usuarios, sin zona
+    return {
+        "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(), "text": pa.string(),
+        "date": pa.date32(), "timestamp": pa.timestamp("us"), "utc": pa.timestamp("us", tz="UTC"),
+    }[kind]
+
+
+def _last(model):
+    return (db.select(db.func.max(model.date_performed))
+            .where(model.pc_id == PC.id).correlate(PC).scalar_subquery())
+
+
+def _tasks():
+    cols = [
+        ("id", Task.id, "int"), ("title", Task.title, "text"), ("pc_id", Task.pc_id, "int"),
+        ("pc", PC.name, "text"), ("status", Task.status, "text"), ("priority", Task.priority, "text"),
+        ("start_date", Task.start_date, "date"), ("end_date", Task.end_date, "date"),
+        ("problem", Task.problem, "text"), ("solution", Task.solution, "text"),
+        ("comments", Task.comments, "text"),
+        ("created_at", Task.created_at, "utc"), ("updated_at", Task.updated_at, "utc"),
+    ]
+    stmt = (db.select(*[e.label(n) for n, e, _k in cols])
+            .select_from(Task).outerjoin(PC, PC.id == Task.pc_id).order_by(Task.id))
+    return cols, stmt, [], None
+
+
+def _pcs():
+    """PCs con su estado: días desde el último mantenimiento/backup (o desde el
+    alta) y alerta según los umbrales de Configuración, como el reporte de PCs."""
+    from .reports import get_thresholds
+    from .utils import pc_created_dates_map, _to_date
+
+    cols = [
+        ("id", PC.id, "int"), ("name", PC.name, "text"), ("pc_username", PC.pc_username, "text"),
+        ("physical_user", PC.physical_user, "text"), ("teamviewer_id", PC.teamviewer_id, "text"),
+        ("anydesk_id", PC.anydesk_id, "text"), ("windows_licensed", PC.windows_licensed, "bool"),
+        ("office_licensed", PC.office_licensed, "bool"), ("location", PC.location, "text"),
+        ("notes", PC.notes, "text"),
+        ("last_maintenance", _last(Maintenance), "timestamp"), ("last_backup", _last(Backup), "timestamp"),
+    ]
+    extra = [("days_since_maintenance", "int"), ("maintenance_alert", "bool"),
+             ("days_since_backup", "int"), ("backup_alert", "bool")]
+    stmt = db.select(*[e.label(n) for n, e, _k in cols]).order_by(PC.name)
+
+    maint_days, backup_days = get_thresholds()
+    created = pc_created_dates_map()
+    today = date.today()
+
+    def post(row):
+        start = created.get(row.id)
+        age_m = (today - (_to_date(row.last_maintenance) or start)).days
+        age_b = (today - (_to_date(row.last_backup) or start)).days
+        return (*row, age_m, age_m >= maint_days, age_b, age_b >= backup_days)
+
+    return cols, stmt, extra, post
+
+
+def _by_pc(model, cols, order):
+    cols = cols[:2] + [("pc", PC.name, "text")] + cols[2:]
+    stmt = (db.select(*[e.label(n) for n, e, _k in cols])
+            .select_from(model).outerjoin(PC, PC.id == model.pc_id).order_by(order))
+    return cols, stmt, [], None
+
+
+def _maintenances():
+    return _by_pc(Maintenance, [
+        ("id", Maintenance.id, "int"), ("pc_id", Maintenance.pc_id, "int"),
+        ("date_performed", Maintenance.date_performed, "timestamp"),
+        ("performed_by", Maintenance.performed_by, "text"), ("description", Maintenance.description, "text"),
+    ], Maintenance.id)
+
+
+def _backups():
+    return _by_pc(Backup, [
+        ("id", Backup.id, "int"), ("pc_id", Backup.pc_id, "int"),
+        ("date_performed", Backup.date_performed, "timestamp"), ("status", Backup.status, "text"),
+        ("size_mb", Backup.size_mb, "float"), ("path", Backup.path, "text"),
+    ], Backup.id)
+
+
+def _alerts():
+    return _by_pc(Alert, [
+        ("id", Alert.id, "int"), ("pc_id", Alert.pc_id, "int"),
+        ("created_at", Alert.created_at, "timestamp"), ("kind", Alert.kind, "text"),
+        ("message", Alert.message, "text"), ("resolved", Alert.resolved, "bool"),
+        ("resolved_at", Alert.resolved_at, "timestamp"),
+    ], Alert.id)
+
+
+def _inventory():
+    i = InventoryItem
+    cols = [
+        ("id", i.id, "int"), ("kind", i.kind, "text"), ("name", i.name, "text"), ("brand", i.brand, "text"),
+        ("model", i.model, "text"), ("serial", i.serial, "text"), ("asset_tag", i.asset_tag, "text"),
+        ("location", i.location, "text"), ("assigned_to", i.assigned_to, "text"),
+        ("license_key", i.license_key, "text"), ("seats", i.seats, "int"),
+        ("purchase_date", i.purchase_date, "date"), ("warranty_end", i.warranty_end, "date"),
+        ("expiry_date", i.expiry_date, "date"), ("status", i.status, "text"), ("notes", i.notes, "text"),
+        ("created_at", i.created_at, "utc"), ("updated_at", i.updated_at, "utc"),
+    ]
+    stmt = db.select(*[e.label(n) for n, e, _k in cols]).order_by(i.id)
+    return cols, stmt, [], None
+
+
+DATASETS = {
+    "tasks": _tasks,
+    "pcs": _pcs,
+    "maintenances": _maintenances,
+    "backups": _backups,
+    "alerts": _alerts,
+    "inventory": _inventory,
+}
+
+
+def _coerce(kind, values):
+    """Fechas guardadas como texto legacy (SQLite) -> date/datetime; el resto tal cual."""
+    if kind not in ("date", "timestamp", "utc"):
+        return values
+    from .utils import _to_date
+    out = []
+    for v in values:
+        if v is None or isinstance(v, date):
+            out.append(v)
+        elif kind == "date":
+            out.append(_to_date(v))
+        else:
+            try:
+                out.append(datetime.fromisoformat(str(v)))
+            except ValueError:
+                out.append(None)
+    return out
+
+
+def write_dataset(name, fmt, sink, batch_rows=BATCH_ROWS):
+    """Escribe el dataset `name` en `sink` (ruta o archivo binario). Devuelve filas escritas.
+
+    ImportError si falta pyarrow; KeyError si el dataset o el formato no existen.
+    """
+    import pyarrow as pa
+    if fmt not in ARROW_FORMATS:
+        raise KeyError(fmt)
+    cols, stmt, extra, post = DATASETS[name]()
+    fields = [(n, k) for n, _e, k in cols] + extra
+    schema = pa.schema([(n, _arrow_type(pa, k)) for n, k in fields])
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        import pyarrow.ipc as ipc
+        writer = ipc.new_file(sink, schema)
+
+    total = 0
+    with writer:
+        result = db.session.execute(stmt.execution_options(yield_per=batch_rows))
+        for rows in result.partitions():
+            if post:
+                rows = [post(r) for r in rows]
+            columns = list(zip(*rows))
+            arrays = [pa.array(_coerce(k, col), type=schema.field(i).type)
+                      for i, ((_n, k), col) in enumerate(zip(fields, columns))]
+            batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            if fmt == "parquet":
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            total += len(rows)
+    return total
+
+
+@bp.route("/analytics/<dataset>.<fmt>")
+@login_required
+@conditional_cache
+def export_dataset(dataset, fmt):
+    if dataset not in DATASETS or fmt not in ARROW_FORMATS:
+        abort(404)
+    tmp = tempfile.TemporaryFile()
+    try:
+        write_dataset(dataset, fmt, tmp)
+    except ImportError as e:
+        tmp.close()
+        return make_response(f"Exportación {fmt} no disponible: falta pyarrow ({e})", 501)
+    tmp.seek(0)
+    return send_file(tmp, mimetype=ARROW_FORMATS[fmt], as_attachment=True, download_name=f"{dataset}.{fmt}")
@@ -1,117 +1,21 @@
 # app/exports_extra.py
-from flask import Blueprint, send_file, make_response
+from flask import Blueprint, Response, request, send_file, make_response, stream_with_context
 from flask_login import login_required
 from io import BytesIO
-from datetime import datetime, date, time
 from markupsafe import escape
 
-from .models import Task, PC
+from . import db
+from .models import Task, PC, Maintenance, Backup
+from .http_cache import conditional_cache
+from .export_jobs import prerendered
+from .export_format import STATUS_LABELS, ExportColumn, format_rows, headers as export_headers, norm_status
 
 bp = Blueprint("exportx", __name__)
 
-# ---- Helpers de fechas/horas ----
-
-def _as_date(x):
-    """Devuelve siempre date (YYYY-MM-DD). None -> date.max."""
-    if x is None:
-        return date.max
-    if isinstance(x, datetime):
-        return x.date()
-    if isinstance(x, date):
-        return x
-    # strings u otros: intentar parsear a date
-    s = str(x).strip().replace("/", "-")
-    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M", "%d-%m-%Y %H:%M"):
-        try:
-            dt = datetime.strptime(s, fmt)
-            return dt.date()
-        except Exception:
-            pass
-    return date.max
-
-def _as_dt(x):
-    """Devuelve siempre datetime. None -> datetime.max."""
-    if x is None:
-        return datetime.max
-    if isinstance(x, datetime):
-        return x
-    if isinstance(x, date):
-        return datetime.combine(x, time())
-    # strings u otros: intentar parsear a datetime (o fallback a max)
-    s = str(x).strip().replace("/", "-")
-    for fmt in ("%Y-%m-%d %H:%M", "%d-%m-%Y %H:%M", "%Y-%m-%d", "%d-%m-%Y"):
-        try:
-            dt = datetime.strptime(s, fmt)
-            if fmt in ("%Y-%m-%d", "%d-%m-%Y"):
-                dt = datetime.combine(dt.date(), time())
-            return dt
-        except Exception:
-            pass
-    return datetime.max
-
-def _fmt_dt(dt):
-    """Devuelve string de fecha/hora en horario local (si hay helper disponible)."""
-    try:
-        from .time_helpers import to_local
-        if dt is None:
-            return ""
-        loc = to_local(dt)
-        return loc.strftime("%Y-%m-%d %H:%M")
-    except Exception:
-        if isinstance(dt, datetime):
-            return dt.strftime("%Y-%m-%d %H:%M")
-        if isinstance(dt, date):
-            return datetime.combine(dt, time()).strftime("%Y-%m-%d %H:%M")
-        # intentar parseo
-        try:
-            return _as_dt(dt).strftime("%Y-%m-%d %H:%M")
-        except Exception:
-            return ""
-
-def _fmt_date_only(d):
-    """Formatea date/datetime/string a YYYY-MM-DD."""
-    if d is None:
-        return ""
-    if isinstance(d, datetime):
-        return d.date().strftime("%Y-%m-%d")
-    if isinstance(d, date):
-        return d.strftime("%Y-%m-%d")
-    # intentar parseo
-    try:
-        return _as_date(d).strftime("%Y-%m-%d")
-    except Exception:
-        return str(d)
-
-def _norm_status(s: str) -> str:
-    """Mapea estados legacy al set visual actual."""
-    if not s:
-        return ""
-    s0 = s.strip().lower()
-    mapping = {
-        "pendiente": "Pendiente",
-        "en progreso": "En progreso",
-        "en_progreso": "En progreso",
-        "progreso": "En progreso",
-        "hecho": "Finalizada",
-        "finalizado": "Finalizada",
-        "finalizada": "Finalizada",
-        "cerrado": "Finalizada",
-        "ok": "Finalizada",
-        "done": "Finalizada",
-    }
-    return mapping.get(s0, s.capitalize())
-
-def _safe_capitalize(x, default=""):
-    v = (x or default)
-    try:
-        return str(v).capitalize()
-    except Exception:
-        return str(v)
-
 # ---- Render XLS/HTML ----
 
 def _excel_html(filename: str, title: str, headers, rows):
-    """Genera un .xls (HTML de compatibilidad)."""
+    """Genera un .xls (HTML de compatibilidad), enviado por partes a medida que llegan las filas."""
     headers_html = ''.join(f"<th>{escape(h)}</th>" for h in headers)
 
     def row_html(r):
@@ -121,34 +25,40 @@ def _excel_html(filename: str, title: str, headers, rows):
         )
         return f"<tr>{cells}</tr>"
 
-    rows_html = '\n'.join(row_html(r) for r in rows)
-    html = f"""<html>
+    def generate():
+        yield f"""<html>
 <head><meta charset="utf-8"></head>
 <body>
 <h3>{escape(title)}</h3>
 <table border="1" cellspacing="0" cellpadding="3">
   <tr>{headers_html}</tr>
-  {rows_html}
-</table>
+""".encode('utf-8')
+        chunk = []
+        for r in rows:
+            chunk.append(row_html(r))
+            if len(chunk) >= 200:
+                yield ('\n'.join(chunk) + '\n').encode('utf-8')
+                chunk = []
+        if chunk:
+            yield ('\n'.join(chunk) + '\n').encode('utf-8')
+        yield b"""</table>
 </body>
 </html>"""
-    data = html.encode('utf-8')
-    resp = make_response(data)
+
+    resp = Response(stream_with_context(generate()))
     resp.headers['Content-Type'] = 'application/vnd.ms-excel; charset=utf-8'
     resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
     return resp
 
 # ---- Render PDF (ReportLab) ----
 
-def _pdf_table(title: str, headers, rows):
-    """Genera PDF con ReportLab (tabla compacta, títulos repetidos)."""
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import A4, landscape
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    except Exception as e:
-        return make_response(f"PDF no disponible: falta reportlab ({e})", 501)
+def _pdf_parts(headers, rows):
+    """Documento y tabla del PDF. Columnas de igual ancho: así la tabla se diagrama
+    igual entera que en bloques (ver pdf_parallel)."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
     buf = BytesIO()
     doc = SimpleDocTemplate(
@@ -168,7 +78,9 @@ def _pdf_table(title: str, headers, rows):
     for r in rows:
         data.append([P(c) for c in r])
 
-    tbl = Table(data, repeatRows=1)
+    # el marco de SimpleDocTemplate tiene 6 pt de relleno por lado
+    ncols = max(len(headers), 1)
+    tbl = Table(data, colWidths=[(doc.width - 12) / ncols] * ncols, repeatRows=1)
     tbl.setStyle(TableStyle([
         ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
         ('TEXTCOLOR', (0,0), (-1,0), colors.black),
@@ -178,201 +90,231 @@ def _pdf_table(title: str, headers, rows):
         ('FONTSIZE', (0,0), (-1,-1), 8),
         ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.whitesmoke, colors.aliceblue]),
     ]))
+    return buf, doc, tbl, styles
+
+def _pdf_title(title, styles):
+    from reportlab.platypus import Paragraph, Spacer
+    return [Paragraph(escape(title), styles['Heading2']), Spacer(1, 6)]
+
+def _pdf_render(title, headers, rows, canvasmaker=None, continued=False) -> bytes:
+    """Genera PDF con ReportLab (tabla compacta, títulos repetidos) y devuelve los bytes.
+    continued=True: bloque que sigue la tabla (sin título)."""
+    from reportlab.pdfgen import canvas
+
+    buf, doc, tbl, styles = _pdf_parts(headers, rows)
+    elems = _pdf_title(title, styles) if title and not continued else []
+    doc.build(elems + [tbl], canvasmaker=canvasmaker or canvas.Canvas)
+    return buf.getvalue()
+
+def _pdf_layout(title, headers, rows):
+    """Diagramación de _pdf_render para pdf_parallel: alto de cada fila, espacio para
+    la tabla en la primera página y en las siguientes, y alto del encabezado repetido."""
+    _buf, doc, tbl, styles = _pdf_parts(headers, rows)
+    avail_w, avail_h = doc.width - 12, doc.height - 12
+    tbl.wrap(avail_w, avail_h)
+    first = avail_h
+    if title:
+        heading, spacer = _pdf_title(title, styles)
+        first -= heading.wrap(avail_w, avail_h)[1] + heading.getSpaceAfter() + spacer.wrap(avail_w, avail_h)[1]
+    return tbl._rowHeights[1:], first, avail_h, tbl._rowHeights[0]
+
+def _pdf_bytes(title: str, headers, rows) -> bytes:
+    """PDF de la tabla; los reportes grandes se dibujan en varios procesos (ver pdf_parallel)."""
+    from .pdf_parallel import render_pdf
+    return render_pdf(f"{__name__}:_pdf_render", title, headers, rows, f"{__name__}:_pdf_layout")
 
-    elems = [Paragraph(escape(title), styles['Heading2']), Spacer(1, 6), tbl]
-    doc.build(elems)
-    buf.seek(0)
-    return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name=f"{title}.pdf")
+def _pdf_table(title: str, headers, rows):
+    """Respuesta de descarga con el PDF de `_pdf_bytes` (501 si falta reportlab)."""
+    try:
+        data = _pdf_bytes(title, headers, rows)
+    except ImportError as e:
+        return make_response(f"PDF no disponible: falta reportlab ({e})", 501)
+    return send_file(BytesIO(data), mimetype='application/pdf', as_attachment=True, download_name=f"{title}.pdf")
 
-# ---- Ordenamiento consistente (evita comparar date vs datetime) ----
+# ---- Ordenamiento en SQL ----
 
-def _sort_key_task(t):
+def _task_order_by():
     """
-    Orden: fecha de inicio (o creada si falta) asc; nulos al final; luego prioridad; luego id.
-    - Unifica tipos usando _as_date/_as_dt para que la tupla tenga tipos comparables.
+    Orden: fecha de inicio (o creada si falta) asc; nulos al final; luego prioridad; luego creada; luego id.
+    Las fechas legacy guardadas como texto se normalizan una vez con `flask tasks-clean-dates`.
     """
-    sd = getattr(t, "start_date", None)
-    ca = getattr(t, "created_at", None)
-    due = _as_date(sd) if sd is not None else _as_date(ca)
-    # prioridad: num si existe, si es string intentar mapear; nulos altos
-    prio = getattr(t, "priority", None)
-    prio_val = _priority_value(prio)
-    # created como datetime para desempate
-    created_dt = _as_dt(ca)
-    return (due == date.max, due, prio_val, created_dt, getattr(t, "id", 0))
-
-def _priority_value(p):
-    """Normaliza prioridad a un número: menor = más alta. 'alta' < 'media' < 'baja'."""
-    if p is None or p == "":
-        return 9999
-    # num directo
-    try:
-        return int(p)
-    except Exception:
-        pass
-    s = str(p).strip().lower()
-    mapping = {
-        "alta": 1, "high": 1, "urgent": 0, "urgente": 0,
-        "media": 5, "normal": 5,
-        "baja": 9, "low": 9,
-    }
-    return mapping.get(s, 50)
+    due = db.func.coalesce(Task.start_date, db.func.date(Task.created_at))
+    prio = db.func.lower(db.func.trim(Task.priority))
+    # prioridad: menor = más alta; nulos/vacíos al final, desconocidas antes que nulos
+    prio_val = db.case(
+        (Task.priority.is_(None), 9999),
+        (prio == "", 9999),
+        (prio.in_(("urgent", "urgente")), 0),
+        (prio.in_(("alta", "high")), 1),
+        (prio.in_(("media", "normal")), 5),
+        (prio.in_(("baja", "low")), 9),
+        else_=50,
+    )
+    return [db.case((due.is_(None), 1), else_=0), due, prio_val, Task.created_at, Task.id]
 
 # =========================
 #         RUTAS
 # =========================
 
+
+# ---- Filtros y columnas desde query string ----
+# ?status=&priority=&pc_id=&location=&start=&end= van al WHERE y ?cols=a,b,c al
+# SELECT: solo se traen y se dibujan las columnas pedidas (todas si no hay ?cols).
+
+def _arg_list(args, name):
+    """Valores de un parámetro repetido (?x=a&x=b) o separado por comas (?x=a,b)."""
+    raw = args.getlist(name) if hasattr(args, "getlist") else [args.get(name)]
+    out = []
+    for v in raw:
+        out += [p.strip() for p in str(v or "").split(",") if p.strip()]
+    return out
+
+def _arg_ids(args, name):
+    return [int(v) for v in _arg_list(args, name) if v.isdigit()]
+
+def _pick_columns(columns, args):
+    """ExportColumn en el orden de ?cols; todas si no hay válidas."""
+    by_key = {c.key: c for c in columns}
+    keys = [k for k in _arg_list(args, "cols") if k in by_key]
+    return [by_key[k] for k in dict.fromkeys(keys)] or list(columns)
+
+def _column_select(cols, exprs):
+    """SELECT con una columna (etiquetada con su clave) por cada ExportColumn de `cols`."""
+    return db.select(*[exprs[c.key].label(c.key) for c in cols])
+
+def _export_rows(stmt, cols, progress=None):
+    """Ejecuta el SELECT por lotes y formatea cada fila (format_rows, generador)."""
+    def batches():
+        total = 1
+        if progress:
+            total = db.session.scalar(db.select(db.func.count()).select_from(stmt.order_by(None).subquery())) or 1
+        done = 0
+        for batch in db.session.execute(stmt.execution_options(yield_per=500)).partitions():
+            yield from batch
+            done += len(batch)
+            if progress:
+                progress(int(90 * done / total))
+    return format_rows(batches(), cols)
+
 # ---- TASKS ----
 
+TASK_COLUMNS = [
+    ExportColumn("id", "ID", "raw"), ExportColumn("title", "Título", "text"),
+    ExportColumn("pc", "PC", "text"), ExportColumn("status", "Estado", "status"),
+    ExportColumn("priority", "Prioridad", "capitalize"), ExportColumn("start_date", "Inicio", "date"),
+    ExportColumn("end_date", "Fin", "date"), ExportColumn("problem", "Problema", "text"),
+    ExportColumn("solution", "Solución", "text"), ExportColumn("comments", "Comentarios", "text"),
+    ExportColumn("created_at", "Creado", "datetime"), ExportColumn("updated_at", "Actualizado", "datetime"),
+]
+TASK_HEADERS = export_headers(TASK_COLUMNS)
+# expresión SQL de cada columna
+TASK_EXPRS = {
+    "id": Task.id, "title": Task.title, "pc": PC.name, "status": Task.status,
+    "priority": Task.priority, "start_date": Task.start_date, "end_date": Task.end_date,
+    "problem": Task.problem, "solution": Task.solution, "comments": Task.comments,
+    "created_at": Task.created_at, "updated_at": Task.updated_at,
+}
+
+def _status_values(values):
+    """Estados pedidos + sus variantes legacy (ej. finalizada -> hecho, done, ok...)."""
+    wanted = {norm_status(v) for v in values}
+    return sorted({v.lower() for v in values} | {k for k, label in STATUS_LABELS.items() if label in wanted})
+
+def _task_select(args):
+    """(columnas, SELECT) de tareas con los filtros de `args`, en el orden del reporte."""
+    from .exports import parse_dates
+    cols = _pick_columns(TASK_COLUMNS, args)
+    stmt = _column_select(cols, TASK_EXPRS).select_from(Task)
+
+    locations = [v.lower() for v in _arg_list(args, "location")]
+    if any(c.key == "pc" for c in cols) or locations:
+        stmt = stmt.outerjoin(PC, PC.id == Task.pc_id)
+    if locations:
+        stmt = stmt.where(db.func.lower(PC.location).in_(locations))
+
+    statuses = _arg_list(args, "status")
+    if statuses:
+        stmt = stmt.where(db.func.lower(db.func.trim(Task.status)).in_(_status_values(statuses)))
+    priorities = [v.lower() for v in _arg_list(args, "priority")]
+    if priorities:
+        stmt = stmt.where(db.func.lower(db.func.trim(Task.priority)).in_(priorities))
+    pc_ids = _arg_ids(args, "pc_id")
+    if pc_ids:
+        stmt = stmt.where(Task.pc_id.in_(pc_ids))
+    # mismo criterio que el reporte de tareas: rango por fecha de creación
+    start, end = parse_dates(args)
+    if start:
+        stmt = stmt.where(Task.created_at >= start)
+    if end:
+        stmt = stmt.where(Task.created_at < end)
+    return cols, stmt.order_by(*_task_order_by())
+
+def _task_export(args, progress=None):
+    """(encabezados, filas) del reporte de tareas filtrado."""
+    cols, stmt = _task_select(args)
+    return export_headers(cols), _export_rows(stmt, cols, progress)
+
+def render_tasks_pdf(args=None, progress=None) -> bytes:
+    """PDF de tareas para los trabajos de exportación en segundo plano."""
+    return _pdf_bytes('Reporte de Tareas', *_task_export(args or {}, progress))
+
 @bp.route('/export/tasks.xls')
 @login_required
+@conditional_cache
 def export_tasks_xls():
-    tasks = Task.query.all()
-    tasks_sorted = sorted(tasks, key=_sort_key_task)
-
-    headers = [
-        'ID', 'Título', 'PC', 'Estado', 'Prioridad', 'Inicio', 'Fin',
-        'Problema', 'Solución', 'Comentarios', 'Creado', 'Actualizado'
-    ]
-    rows = []
-    for t in tasks_sorted:
-        pc_name = t.pc.name if getattr(t, 'pc', None) else ''
-        rows.append([
-            t.id,
-            t.title or '',
-            pc_name,
-            _norm_status(getattr(t, "status", "")),
-            _safe_capitalize(getattr(t, "priority", "")),
-            _fmt_date_only(getattr(t, "start_date", None)),
-            _fmt_date_only(getattr(t, "end_date", None)),
-            getattr(t, "problem", "") or '',
-            getattr(t, "solution", "") or '',
-            getattr(t, "comments", "") or '',
-            _fmt_dt(getattr(t, 'created_at', None)),
-            _fmt_dt(getattr(t, 'updated_at', None)),
-        ])
-    return _excel_html('tareas.xls', 'Reporte de Tareas', headers, rows)
+    return _excel_html('tareas.xls', 'Reporte de Tareas', *_task_export(request.args))
 
 @bp.route('/export/tasks.pdf')
 @login_required
+@conditional_cache
+@prerendered("tasks_pdf")
 def export_tasks_pdf():
-    tasks = Task.query.all()
-    tasks_sorted = sorted(tasks, key=_sort_key_task)
-
-    headers = [
-        'ID', 'Título', 'PC', 'Estado', 'Prioridad', 'Inicio', 'Fin',
-        'Problema', 'Solución', 'Comentarios', 'Creado', 'Actualizado'
-    ]
-    rows = []
-    for t in tasks_sorted:
-        pc_name = t.pc.name if getattr(t, 'pc', None) else ''
-        rows.append([
-            t.id,
-            t.title or '',
-            pc_name,
-            _norm_status(getattr(t, "status", "")),
-            _safe_capitalize(getattr(t, "priority", "")),
-            _fmt_date_only(getattr(t, "start_date", None)),
-            _fmt_date_only(getattr(t, "end_date", None)),
-            getattr(t, "problem", "") or '',
-            getattr(t, "solution", "") or '',
-            getattr(t, "comments", "") or '',
-            _fmt_dt(getattr(t, 'created_at', None)),
-            _fmt_dt(getattr(t, 'updated_at', None)),
-        ])
-    return _pdf_table('Reporte de Tareas', headers, rows)
+    return _pdf_table('Reporte de Tareas', *_task_export(request.args))
 
 # ---- PCS ----
 
+def _last_date(model):
+    """Última fecha de `model` para la PC de la fila (subconsulta correlacionada)."""
+    return (db.select(db.func.max(model.date_performed))
+            .where(model.pc_id == PC.id).correlate(PC).scalar_subquery())
+
+PC_COLUMNS = [
+    ExportColumn("id", "ID", "raw"), ExportColumn("name", "Nombre PC", "text"),
+    ExportColumn("pc_username", "Usuario PC", "text"), ExportColumn("physical_user", "Usuario físico", "text"),
+    ExportColumn("teamviewer_id", "Teamviewer", "text"), ExportColumn("anydesk_id", "Anydesk", "text"),
+    ExportColumn("windows_licensed", "Windows Legal", "yesno"), ExportColumn("office_licensed", "Office Legal", "yesno"),
+    ExportColumn("location", "Ubicación", "text"), ExportColumn("notes", "Observaciones", "text"),
+    ExportColumn("last_maintenance", "Últ. Mantenimiento", "date"), ExportColumn("last_backup", "Últ. Backup", "date"),
+]
+PC_EXPRS = {
+    "id": PC.id, "name": PC.name, "pc_username": PC.pc_username, "physical_user": PC.physical_user,
+    "teamviewer_id": PC.teamviewer_id, "anydesk_id": PC.anydesk_id,
+    "windows_licensed": PC.windows_licensed, "office_licensed": PC.office_licensed,
+    "location": PC.location, "notes": PC.notes,
+    "last_maintenance": _last_date(Maintenance), "last_backup": _last_date(Backup),
+}
+
+def _pc_export(args):
+    """(encabezados, filas) del reporte de PCs filtrado por ?pc_id y ?location."""
+    cols = _pick_columns(PC_COLUMNS, args)
+    stmt = _column_select(cols, PC_EXPRS).select_from(PC)
+    pc_ids = _arg_ids(args, "pc_id")
+    if pc_ids:
+        stmt = stmt.where(PC.id.in_(pc_ids))
+    locations = [v.lower() for v in _arg_list(args, "location")]
+    if locations:
+        stmt = stmt.where(db.func.lower(PC.location).in_(locations))
+    stmt = stmt.order_by(PC.name.asc())
+    return export_headers(cols), _export_rows(stmt, cols)
+
 @bp.route('/export/pcs.xls')
 @login_required
+@conditional_cache
 def export_pcs_xls():
-    pcs = PC.query.order_by(PC.name.asc()).all()
-    headers = [
-        'ID', 'Nombre PC', 'Usuario PC', 'Usuario físico', 'Teamviewer', 'Anydesk',
-        'Windows Legal', 'Office Legal', 'Observaciones',
-        'Últ. Mantenimiento', 'Últ. Backup',
-        'Creado', 'Actualizado'
-    ]
-    rows = []
-    for p in pcs:
-        # último mantenimiento
-        try:
-            last_m = p.last_maintenance_date()
-        except Exception:
-            last_m = None
-        # último backup (si el método retorna objeto con fecha)
-        try:
-            lb = p.last_backup()
-            if lb is None:
-                last_b = None
-            else:
-                # aceptar lb como date, datetime o con atributo date_performed
-                if hasattr(lb, "date_performed"):
-                    last_b = getattr(lb, "date_performed", None)
-                else:
-                    last_b = lb
-        except Exception:
-            last_b = None
-
-        rows.append([
-            p.id,
-            p.name or '',
-            getattr(p, 'pc_user', '') or '',
-            getattr(p, 'physical_user', '') or '',
-            getattr(p, 'teamviewer', '') or '',
-            getattr(p, 'anydesk', '') or '',
-            'Sí' if getattr(p, 'windows_legal', False) else 'No',
-            'Sí' if getattr(p, 'office_legal', False) else 'No',
-            getattr(p, 'observations', '') or '',
-            _fmt_date_only(last_m),
-            _fmt_date_only(last_b),
-            _fmt_dt(getattr(p, 'created_at', None)),
-            _fmt_dt(getattr(p, 'updated_at', None)),
-        ])
-    return _excel_html('pcs.xls', 'Reporte de PCs', headers, rows)
+    return _excel_html('pcs.xls', 'Reporte de PCs', *_pc_export(request.args))
 
 @bp.route('/export/pcs.pdf')
 @login_required
+@conditional_cache
 def export_pcs_pdf():
-    pcs = PC.query.order_by(PC.name.asc()).all()
-    headers = [
-        'ID', 'Nombre PC', 'Usuario PC', 'Usuario físico', 'Teamviewer', 'Anydesk',
-        'Windows Legal', 'Office Legal', 'Observaciones',
-        'Últ. Mantenimiento', 'Últ. Backup',
-        'Creado', 'Actualizado'
-    ]
-    rows = []
-    for p in pcs:
-        try:
-            last_m = p.last_maintenance_date()
-        except Exception:
-            last_m = None
-        try:
-            lb = p.last_backup()
-            if lb is None:
-                last_b = None
-            else:
-                if hasattr(lb, "date_performed"):
-                    last_b = getattr(lb, "date_performed", None)
-                else:
-                    last_b = lb
-        except Exception:
-            last_b = None
-
-        rows.append([
-            p.id,
-            p.name or '',
-            getattr(p, 'pc_user', '') or '',
-            getattr(p, 'physical_user', '') or '',
-            getattr(p, 'teamviewer', '') or '',
-            getattr(p, 'anydesk', '') or '',
-            'Sí' if getattr(p, 'windows_legal', False) else 'No',
-            'Sí' if getattr(p, 'office_legal', False) else 'No',
-            getattr(p, 'observations', '') or '',
-            _fmt_date_only(last_m),
-            _fmt_date_only(last_b),
-            _fmt_dt(getattr(p, 'created_at', None)),
-            _fmt_dt(getattr(p, 'updated_at', None)),
-        ])
-    return _pdf_table('Reporte de PCs', headers, rows)
+    return _pdf_table('Reporte de PCs', *_pc_export(request.args))
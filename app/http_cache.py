@@ -0,0 +1,109 @@
+# app/http_cache.py
+"""GET condicional (ETag/Last-Modified) y caché chica de respuestas para
+reportes y exportaciones.
+
+La ETag sale de la marca de versión de los datos (ver watermark.py) + URL +
+usuario: si el cliente ya tiene esa versión se responde 304 sin correr el
+reporte. Las respuestas 200 se guardan en un LRU en memoria con la misma clave,
+acotado por cantidad (RESPONSE_CACHE_ENTRIES) y por bytes en total
+(RESPONSE_CACHE_TOTAL_BYTES); no entran respuestas de más de RESPONSE_CACHE_MAX_BYTES.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, make_response, request, session
+from flask_login import current_user
+
+from .admission import call_admitted, deferred
+from .watermark import data_version
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+        return hit
+
+
+def _cache_put(key, value):
+    """value = (bytes del cuerpo, encabezados)."""
+    global _cache_bytes
+    max_entries = int(current_app.config.get("RESPONSE_CACHE_ENTRIES", 32))
+    max_bytes = int(current_app.config.get("RESPONSE_CACHE_TOTAL_BYTES", 16 * 1024 * 1024))
+    if max_entries <= 0 or len(value[0]) > max_bytes:
+        return
+    with _cache_lock:
+        old = _cache.pop(key, None)
+        if old is not None:
+            _cache_bytes -= len(old[0])
+        _cache[key] = value
+        _cache_bytes += len(value[0])
+        while len(_cache) > max_entries or _cache_bytes > max_bytes:
+            _key, (data, _headers) = _cache.popitem(last=False)
+            _cache_bytes -= len(data)
+
+
+def clear_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def _materialize(resp):
+    """Bytes del cuerpo si la respuesta es cacheable (200, tamaño conocido y acotado)."""
+    limit = int(current_app.config.get("RESPONSE_CACHE_MAX_BYTES", 1024 * 1024))
+    if resp.status_code != 200 or resp.content_length is None or resp.content_length > limit:
+        return None
+    resp.direct_passthrough = False
+    return resp.get_data()
+
+
+def _decorate(resp, etag, last_modified):
+    resp.set_etag(etag, weak=True)
+    if last_modified is not None:
+        resp.last_modified = last_modified
+    # Datos privados por usuario: el navegador puede guardarlos pero debe revalidar
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def conditional_cache(view):
+    """Decorador para vistas de reporte/exportación (va debajo de @login_required)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Con mensajes flash pendientes la página no es reutilizable
+        if session.get("_flashes"):
+            return call_admitted(view, *args, **kwargs)
+
+        token, last_modified = data_version()
+        user_id = current_user.get_id() if current_user.is_authenticated else "-"
+        raw = f"{token}|{request.full_path}|{user_id}"
+        etag = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32]
+
+        if request.if_none_match.contains_weak(etag):
+            return _decorate(Response(status=304), etag, last_modified)
+
+        cached = _cache_get(etag)
+        if cached is not None:
+            data, headers = cached
+            resp = Response(data, headers=headers)
+            resp.headers["X-Cache"] = "HIT"
+            return _decorate(resp, etag, last_modified)
+
+        resp = make_response(call_admitted(view, *args, **kwargs))
+        data = _materialize(resp)
+        if data is not None:
+            headers = [(k, v) for k, v in resp.headers.items() if k.lower() != "set-cookie"]
+            _cache_put(etag, (data, headers))
+            resp.headers["X-Cache"] = "MISS"
+        if resp.status_code == 200:
+            _decorate(resp, etag, last_modified)
+        return resp
+    return deferred(wrapper)
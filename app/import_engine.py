@@ -0,0 +1,488 @@
+# app/import_engine.py
+"""Motor de importación masiva de tareas.
+
+Las filas se validan y normalizan por lotes; las válidas se insertan con un
+INSERT ejecutado como executemany y se confirman de a IMPORT_CHUNK_ROWS, así
+un error no descarta lo ya insertado. Si un lote falla en la base se reintenta
+fila por fila para aislar la que falla. Cada fila rechazada va a un CSV de
+errores (fila original + número de línea + motivo) que se puede descargar.
+
+Reimportar es idempotente: cada tarea importada guarda en task_import_key la
+huella de su identidad (título + fecha de inicio normalizados) y la de la fila
+completa. Por lote se buscan las huellas de una vez: las nuevas se insertan,
+las que cambiaron se actualizan y las iguales se saltean. Las PCs (columna
+pc/equipo o pc_id) se resuelven con un diccionario precargado por archivo,
+sin distinguir mayúsculas ni acentos.
+
+Las importaciones desde la web corren en el pool "imports": el archivo se
+guarda, se crea un ImportJob y el navegador consulta los contadores (filas
+leídas, insertadas, con error y filas/segundo) hasta que termina. Los trabajos
+que un reinicio dejó pendientes se reencolan (o se marcan como error) y los
+viejos se borran junto con sus archivos (ver purge_old / recover_stale).
+"""
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from flask import current_app, url_for
+
+from . import db
+from .date_infer import infer_column, parse_any
+from .jobs import submit
+from .models import PC, ImportJob, Task, TaskImportKey, TASK_STATUS_CHOICES, TASK_PRIORITY_CHOICES
+from .resolution import sync_tasks
+
+TITLE_MAX = 200
+
+
+class ImportResult:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []          # primeras filas con error, para mostrar en pantalla
+        self.date_report = []     # por columna de fecha: formato inferido y valores ilegibles
+        self.error_token = None   # CSV de errores (ver error_report_path)
+
+
+def import_dir():
+    d = os.path.join(current_app.config["UPLOAD_FOLDER"], "imports")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def error_report_path(token):
+    return os.path.join(import_dir(), f"errores_{token}.csv")
+
+
+class _ErrorReport:
+    """CSV de errores escrito a medida que aparecen (no se guardan en memoria)."""
+
+    def __init__(self, headers, keep=20):
+        self.headers = list(headers)
+        self.keep = keep
+        self.token = None
+        self._fh = None
+        self._writer = None
+
+    def add(self, result, line, record, message):
+        result.failed += 1
+        if len(result.errors) < self.keep:
+            result.errors.append((line, message))
+        if self._writer is None:
+            self.token = uuid.uuid4().hex
+            self._fh = open(error_report_path(self.token), "w", newline="", encoding="utf-8-sig")
+            self._writer = csv.writer(self._fh)
+            self._writer.writerow(["linea", "error"] + self.headers)
+        self._writer.writerow([line, message] + ["" if record.get(h) is None else record.get(h)
+                                                 for h in self.headers])
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+
+
+class _SeenKeys:
+    """Huellas ya vistas en el archivo (huella -> línea), en un SQLite temporal en
+    disco: la memoria no crece con el tamaño del archivo."""
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix="vistas_", suffix=".sqlite", dir=import_dir())
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("CREATE TABLE seen (key TEXT PRIMARY KEY, line INTEGER NOT NULL)")
+
+    def lines(self, keys):
+        """{huella: línea} de las `keys` que ya aparecieron."""
+        keys = list(keys)
+        out = {}
+        for i in range(0, len(keys), 500):  # límite de parámetros de SQLite
+            part = keys[i:i + 500]
+            out.update(self._conn.execute(
+                f"SELECT key, line FROM seen WHERE key IN ({','.join('?' * len(part))})", part))
+        return out
+
+    def add(self, pairs):
+        self._conn.executemany("INSERT OR IGNORE INTO seen (key, line) VALUES (?, ?)", pairs)
+
+    def close(self):
+        self._conn.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _cell(record, hmap, field):
+    v = record.get(hmap[field]) if field in hmap else None
+    return "" if v is None else str(v).strip()
+
+
+def pc_lookup():
+    """({nombre normalizado: id}, {ids}) de todas las PCs, una consulta por archivo."""
+    from .tasks_import import _norm
+    by_name, ids = {}, set()
+    for pc_id, name in db.session.execute(db.select(PC.id, PC.name)):
+        by_name[" ".join(_norm(name).split())] = pc_id
+        ids.add(pc_id)
+    return by_name, ids
+
+
+def _resolve_pc(record, hmap, pcs):
+    from .tasks_import import _norm
+    by_name, ids = pcs
+    raw_id = _cell(record, hmap, "pc_id")
+    if raw_id:
+        try:
+            pc_id = int(float(raw_id))
+        except ValueError:
+            raise ValueError(f"pc_id inválido: {raw_id}")
+        if pc_id not in ids:
+            raise ValueError(f"PC inexistente: {raw_id}")
+        return pc_id
+    name = _cell(record, hmap, "pc_name")
+    if not name:
+        return None
+    pc_id = by_name.get(" ".join(_norm(name).split()))
+    if pc_id is None:
+        raise ValueError(f"PC desconocida: {name}")
+    return pc_id
+
+
+def fingerprints(values):
+    """(huella de identidad, huella de la fila) de los valores normalizados.
+    La identidad es (título, inicio, PC): la misma tarea en dos PCs son dos tareas."""
+    from .tasks_import import _norm
+    title = " ".join(_norm(values["title"]).split())
+    start = values["start_date"].isoformat() if values["start_date"] else ""
+    pc_id = values["pc_id"] or ""
+    key = hashlib.sha1(f"{title}\x1f{start}\x1f{pc_id}".encode("utf-8")).hexdigest()
+    row = json.dumps(values, sort_keys=True, default=str)
+    return key, hashlib.sha1(row.encode("utf-8")).hexdigest()
+
+
+def build_row(record, hmap, pcs=None, dates=None):
+    """Valores para INSERT de una fila del archivo; ValueError con el motivo si no es válida.
+    pcs: resultado de pc_lookup() (si no se pasa, no se asocian PCs);
+    dates: {campo: DateColumn} inferidos (si no, se prueba cada formato)."""
+    from .tasks_import import _normalize_priority, _normalize_status
+
+    title = _cell(record, hmap, "title")
+    if not title:
+        raise ValueError("Falta el título")
+    if len(title) > TITLE_MAX:
+        raise ValueError(f"Título de más de {TITLE_MAX} caracteres")
+
+    parsed = {}
+    for field, label in (("start_date", "inicio"), ("end_date", "fin")):
+        if field not in hmap:
+            parsed[field] = None
+            continue
+        raw = record.get(hmap[field])
+        column = (dates or {}).get(field)
+        if column is not None:
+            try:
+                parsed[field] = column.parse(raw)
+            except ValueError:
+                raise ValueError(f"Fecha de {label} inválida: {raw}")
+        else:
+            parsed[field] = parse_any(raw)
+            if parsed[field] is None and str(raw or "").strip():
+                raise ValueError(f"Fecha de {label} inválida: {raw}")
+    if parsed["start_date"] and parsed["end_date"] and parsed["end_date"] < parsed["start_date"]:
+        raise ValueError("La fecha de fin es anterior a la de inicio")
+
+    status = _normalize_status(_cell(record, hmap, "status")) or "pendiente"
+    if status not in TASK_STATUS_CHOICES:
+        raise ValueError(f"Estado inválido: {status}")
+    priority = _normalize_priority(_cell(record, hmap, "priority")) or "media"
+    if priority not in TASK_PRIORITY_CHOICES:
+        raise ValueError(f"Prioridad inválida: {priority}")
+
+    comments = _cell(record, hmap, "comments")
+    # problem es NOT NULL: si no viene, se usan los comentarios o el título
+    problem = _cell(record, hmap, "problem") or comments or title
+    return {
+        "title": title, "pc_id": _resolve_pc(record, hmap, pcs) if pcs else None,
+        "status": status, "priority": priority,
+        "start_date": parsed["start_date"], "end_date": parsed["end_date"],
+        "problem": problem, "solution": _cell(record, hmap, "solution") or None,
+        "comments": comments or None,
+    }
+
+
+def _write_chunk(chunk, result, report):
+    """chunk: [(línea, registro, valores, huella, huella de fila)].
+
+    Inserta las tareas nuevas, actualiza las que cambiaron y saltea las iguales,
+    todo en una transacción; si falla en la base, se reintenta fila por fila.
+    """
+    if not chunk:
+        return
+    keys = [e[3] for e in chunk]
+    known = {k: (task_id, row_hash) for k, task_id, row_hash in db.session.execute(
+        db.select(TaskImportKey.key, TaskImportKey.task_id, TaskImportKey.row_hash)
+        .join(Task, Task.id == TaskImportKey.task_id)
+        .where(TaskImportKey.key.in_(keys)))}
+    now = datetime.utcnow()
+    new, changed, same = [], [], 0
+    for entry in chunk:
+        hit = known.get(entry[3])
+        if hit is None:
+            new.append(entry)
+        elif hit[1] != entry[4]:
+            changed.append((entry, hit[0]))
+        else:
+            same += 1
+    try:
+        ids = []
+        if new:
+            # huellas que apuntan a tareas borradas
+            db.session.execute(db.delete(TaskImportKey).where(TaskImportKey.key.in_([e[3] for e in new])))
+            ids = db.session.execute(
+                db.insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                [dict(e[2], created_at=now, updated_at=now) for e in new]).scalars().all()
+            db.session.execute(db.insert(TaskImportKey), [
+                {"key": e[3], "task_id": task_id, "row_hash": e[4], "imported_at": now}
+                for e, task_id in zip(new, ids)])
+        if changed:
+            db.session.execute(db.update(Task), [dict(e[2], id=task_id, updated_at=now) for e, task_id in changed])
+            db.session.execute(db.update(TaskImportKey), [
+                {"key": e[3], "row_hash": e[4], "imported_at": now} for e, _task_id in changed])
+        # escrituras con Core: el listener del ORM no las ve
+        sync_tasks(list(ids) + [task_id for _e, task_id in changed])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if len(chunk) == 1:
+            report.add(result, chunk[0][0], chunk[0][1], f"Error de base de datos: {getattr(e, 'orig', e)}")
+            return
+        for entry in chunk:
+            _write_chunk([entry], result, report)
+        return
+    result.inserted += len(new)
+    result.updated += len(changed)
+    result.skipped += same
+
+
+def import_records(records, chunk_rows=None, progress=None):
+    """Importa un iterable de dicts (columnas del archivo -> valor). Necesita app context.
+
+    progress(result) se llama después de cada lote confirmado.
+    """
+    from .tasks_import import _match_header_map
+
+    chunk_rows = chunk_rows or int(current_app.config.get("IMPORT_CHUNK_ROWS", 1000))
+    result = ImportResult()
+    records = iter(records)
+    sample = list(islice(records, chunk_rows))  # el primer lote también sirve para inferir fechas
+    if not sample:
+        return result
+    headers = list(sample[0].keys())
+    hmap = _match_header_map(headers)
+    report = _ErrorReport(headers)
+    pcs = pc_lookup() if ("pc_id" in hmap or "pc_name" in hmap) else None
+    prefer = current_app.config.get("IMPORT_DATE_ORDER", "dmy")
+    dates = {f: infer_column(hmap[f], [r.get(hmap[f]) for r in sample], prefer=prefer)
+             for f in ("start_date", "end_date") if f in hmap}
+    # filas repetidas dentro del archivo: en el lote con un dict, contra los lotes
+    # anteriores con las huellas guardadas en disco
+    seen = _SeenKeys()
+    chunk, in_chunk = [], {}
+
+    def flush():
+        earlier = seen.lines(in_chunk)
+        fresh = []
+        for entry in chunk:
+            if entry[3] in earlier:
+                report.add(result, entry[0], entry[1],
+                           f"Repetida en el archivo (misma tarea que la línea {earlier[entry[3]]})")
+            else:
+                fresh.append(entry)
+        seen.add((e[3], e[0]) for e in fresh)
+        _write_chunk(fresh, result, report)
+        if progress:
+            progress(result)
+
+    try:
+        for line, record in enumerate(chain(sample, records), 2):  # línea 1 = encabezados
+            result.read += 1
+            try:
+                values = build_row(record, hmap, pcs, dates)
+                key, row_hash = fingerprints(values)
+                if key in in_chunk:
+                    raise ValueError(f"Repetida en el archivo (misma tarea que la línea {in_chunk[key]})")
+                in_chunk[key] = line
+                chunk.append((line, record, values, key, row_hash))
+            except ValueError as e:
+                report.add(result, line, record, str(e))
+            if len(chunk) >= chunk_rows:
+                flush()
+                chunk, in_chunk = [], {}
+        flush()
+    finally:
+        seen.close()
+        report.close()
+    result.error_token = report.token
+    result.date_report = [c.report() for c in dates.values()]
+    return result
+
+
+# trabajos encolados por este proceso (para no reencolarlos al recuperar pendientes)
+_queued = set()
+_queued_lock = threading.Lock()
+
+
+def _submit_job(job_id):
+    with _queued_lock:
+        if job_id in _queued:
+            return
+        _queued.add(job_id)
+
+    def done(_future):
+        with _queued_lock:
+            _queued.discard(job_id)
+    submit("imports", run_import_job, job_id,
+           workers=current_app.config.get("IMPORT_JOB_WORKERS", 1)).add_done_callback(done)
+
+
+def _remove_files(job):
+    paths = [job.path] + ([error_report_path(job.error_token)] if job.error_token else [])
+    for path in paths:
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def purge_old():
+    """Borra los trabajos (y sus archivos) más viejos que IMPORT_JOB_RETENTION_HOURS,
+    y los archivos sueltos de la carpeta de importaciones con esa antigüedad."""
+    hours = int(current_app.config.get("IMPORT_JOB_RETENTION_HOURS", 72))
+    limit = datetime.utcnow() - timedelta(hours=hours)
+    old = ImportJob.query.filter(ImportJob.created_at < limit,
+                                 ImportJob.status.in_(("listo", "error"))).all()
+    for job in old:
+        _remove_files(job)
+        db.session.delete(job)
+    if old:
+        db.session.commit()
+    cutoff = time.time() - hours * 3600
+    with os.scandir(import_dir()) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def recover_stale():
+    """Trabajos que un reinicio dejó colgados: los pendientes con la subida en disco
+    se vuelven a encolar (el que llega primero los toma, ver run_import_job); los que
+    siguen en progreso pasado IMPORT_JOB_TIMEOUT_MINUTES, o pendientes sin archivo,
+    se marcan como error."""
+    now = datetime.utcnow()
+    limit = now - timedelta(minutes=int(current_app.config.get("IMPORT_JOB_TIMEOUT_MINUTES", 60)))
+    pending_limit = now - timedelta(minutes=int(current_app.config.get("IMPORT_JOB_PENDING_MINUTES", 5)))
+    changed = False
+    stale = ImportJob.query.filter(db.or_(
+        db.and_(ImportJob.status == "pendiente", ImportJob.created_at < pending_limit),
+        db.and_(ImportJob.status == "en_progreso", ImportJob.started_at < limit))).all()
+    for job in stale:
+        if job.status == "pendiente" and job.path and os.path.exists(job.path):
+            _submit_job(job.id)
+            continue
+        job.status = "error"
+        job.error = "La importación se interrumpió (reinicio del servidor); volvé a subir el archivo."
+        job.finished_at = now
+        _remove_files(job)
+        changed = True
+    if changed:
+        db.session.commit()
+
+
+def enqueue_import(file_storage, username=None):
+    """Guarda la subida en disco y encola su importación. Devuelve el ImportJob."""
+    purge_old()
+    recover_stale()
+    job_id = uuid.uuid4().hex
+    ext = ".xlsx" if file_storage.filename.lower().endswith(".xlsx") else ".csv"
+    path = os.path.join(import_dir(), f"{job_id}{ext}")
+    file_storage.save(path)
+    job = ImportJob(id=job_id, filename=file_storage.filename, path=path, status="pendiente",
+                    username=username)
+    db.session.add(job)
+    db.session.commit()
+    _submit_job(job.id)
+    return job
+
+
+def run_import_job(job_id):
+    from .tasks_import import read_rows
+
+    # se toma el trabajo solo si sigue pendiente: un reencolado no lo corre dos veces
+    claimed = db.session.execute(
+        db.update(ImportJob).where(ImportJob.id == job_id, ImportJob.status == "pendiente")
+        .values(status="en_progreso", started_at=datetime.utcnow())).rowcount
+    db.session.commit()
+    if not claimed:
+        return
+    job = db.session.get(ImportJob, job_id)
+
+    def progress(result):
+        job.rows_read, job.inserted, job.failed = result.read, result.inserted, result.failed
+        job.updated, job.skipped = result.updated, result.skipped
+        db.session.commit()
+
+    try:
+        result = import_records(read_rows(job.path, job.filename or ""), progress=progress)
+        job.error_token = result.error_token
+        job.date_report = json.dumps(result.date_report) if result.date_report else None
+        job.status = "listo"
+        if not result.read:
+            job.error = "El archivo no tiene filas."
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(ImportJob, job_id)
+        job.status = "error"
+        job.error = f"Error leyendo archivo: {e}"
+    finally:
+        try:
+            os.remove(job.path)
+        except OSError:
+            pass
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def import_status(job):
+    end = job.finished_at or datetime.utcnow()
+    elapsed = (end - job.started_at).total_seconds() if job.started_at else 0
+    return {
+        "id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "rows_read": job.rows_read or 0,
+        "inserted": job.inserted or 0,
+        "updated": job.updated or 0,
+        "skipped": job.skipped or 0,
+        "failed": job.failed or 0,
+        "date_report": json.loads(job.date_report) if job.date_report else [],
+        "rows_per_second": round((job.rows_read or 0) / elapsed, 1) if elapsed > 0 else None,
+        "error": job.error,
+        "status_url": url_for("tasksimp.import_job_status", job_id=job.id),
+        "errors_url": url_for("tasksimp.import_errors", token=job.error_token) if job.error_token else None,
+    }
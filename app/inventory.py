@@ -5,6 +5,10 @@ from flask_login import login_required, current_user
 from . import db
 from .inventory_models import InventoryItem
 from .utils_export import stream_csv, stream_xlsx, stream_pdf
+from .http_cache import conditional_cache
+from .projections import INVENTORY_LIST, stream_page
+from .pagination import paginate
+from .export_format import ExportColumn, format_rows, headers as export_headers
 
 bp = Blueprint("inventory", __name__, template_folder="templates")
 
@@ -17,13 +21,13 @@ STATUSES = ("activo","repuesto","retirado")
 def list_items():
     kind = request.args.get("kind") or ""
     status = request.args.get("status") or ""
-    q = InventoryItem.query
+    q = INVENTORY_LIST.select()
     if kind and kind in KINDS:
-        q = q.filter(InventoryItem.kind == kind)
+        q = q.where(InventoryItem.kind == kind)
     if status and status in STATUSES:
-        q = q.filter(InventoryItem.status == status)
-    items = q.order_by(InventoryItem.created_at.desc()).all()
-    return render_template("inventory_list.html", items=items, kind=kind, status=status, KINDS=KINDS, STATUSES=STATUSES)
+        q = q.where(InventoryItem.status == status)
+    page = paginate(q, [("created_at", InventoryItem.created_at), ("id", InventoryItem.id)], INVENTORY_LIST.all)
+    return stream_page("inventory_list.html", items=page.rows, page=page, kind=kind, status=status, KINDS=KINDS, STATUSES=STATUSES)
 
 @bp.route("/new", methods=["GET","POST"])
 @login_required
@@ -102,26 +106,44 @@ def delete_item(item_id):
     flash("Ítem eliminado.", "success")
     return redirect(url_for("inventory.list_items"))
 
+INVENTORY_COLUMNS = [
+    ExportColumn("id", "id", "raw"), ExportColumn("kind", "kind", "text"), ExportColumn("name", "name", "text"),
+    ExportColumn("brand", "brand", "text"), ExportColumn("model", "model", "text"),
+    ExportColumn("serial", "serial", "text"), ExportColumn("asset_tag", "asset_tag", "text"),
+    ExportColumn("location", "location", "text"), ExportColumn("assigned_to", "assigned_to", "text"),
+    ExportColumn("license_key", "license_key", "text"), ExportColumn("seats", "seats", "raw"),
+    ExportColumn("purchase_date", "purchase_date", "date"), ExportColumn("warranty_end", "warranty_end", "date"),
+    ExportColumn("expiry_date", "expiry_date", "date"), ExportColumn("status", "status", "text"),
+    ExportColumn("notes", "notes", "text"), ExportColumn("created_at", "created_at", "datetime"),
+    ExportColumn("updated_at", "updated_at", "datetime"),
+]
+INVENTORY_PDF_COLUMNS = [
+    ExportColumn("id", "ID", "raw"), ExportColumn("kind", "Tipo", "text"), ExportColumn("name", "Nombre", "text"),
+    ExportColumn("brand", "Marca", "text"), ExportColumn("model", "Modelo", "text"),
+    ExportColumn("serial", "Serie", "text"), ExportColumn("asset_tag", "Tag", "text"),
+    ExportColumn("location", "Ubicación", "text"), ExportColumn("assigned_to", "Asignado", "text"),
+    ExportColumn("status", "Estado", "text"),
+]
+
+def _inventory_rows(columns, native=False):
+    q = InventoryItem.query.order_by(InventoryItem.created_at.desc())
+    rows = ([getattr(i, c.key) for c in columns] for i in q.yield_per(500))
+    return format_rows(rows, columns, native)
+
 @bp.route("/export.csv")
 @login_required
+@conditional_cache
 def export_csv():
-    q = InventoryItem.query.order_by(InventoryItem.created_at.desc()).all()
-    headers = ["id","kind","name","brand","model","serial","asset_tag","location","assigned_to","license_key","seats","purchase_date","warranty_end","expiry_date","status","notes","created_at","updated_at"]
-    rows = [[i.id,i.kind,i.name,i.brand,i.model,i.serial,i.asset_tag,i.location,i.assigned_to,i.license_key,i.seats,i.purchase_date,i.warranty_end,i.expiry_date,i.status,i.notes,i.created_at,i.updated_at] for i in q]
-    return stream_csv("inventory.csv", headers, rows)
+    return stream_csv("inventory.csv", export_headers(INVENTORY_COLUMNS), _inventory_rows(INVENTORY_COLUMNS))
 
 @bp.route("/export.xlsx")
 @login_required
+@conditional_cache
 def export_xlsx():
-    q = InventoryItem.query.order_by(InventoryItem.created_at.desc()).all()
-    headers = ["id","kind","name","brand","model","serial","asset_tag","location","assigned_to","license_key","seats","purchase_date","warranty_end","expiry_date","status","notes","created_at","updated_at"]
-    rows = [[i.id,i.kind,i.name,i.brand,i.model,i.serial,i.asset_tag,i.location,i.assigned_to,i.license_key,i.seats,i.purchase_date,i.warranty_end,i.expiry_date,i.status,i.notes,i.created_at,i.updated_at] for i in q]
-    return stream_xlsx("inventory.xlsx", headers, rows)
+    return stream_xlsx("inventory.xlsx", export_headers(INVENTORY_COLUMNS), list(_inventory_rows(INVENTORY_COLUMNS, native=True)))
 
 @bp.route("/export.pdf")
 @login_required
+@conditional_cache
 def export_pdf():
-    q = InventoryItem.query.order_by(InventoryItem.created_at.desc()).all()
-    headers = ["ID","Tipo","Nombre","Marca","Modelo","Serie","Tag","Ubicación","Asignado","Estado"]
-    rows = [[i.id,i.kind,i.name,i.brand,i.model,i.serial,i.asset_tag,i.location,i.assigned_to,i.status] for i in q]
-    return stream_pdf("inventory.pdf", "Inventario", headers, rows)
+    return stream_pdf("inventory.pdf", "Inventario", export_headers(INVENTORY_PDF_COLUMNS), list(_inventory_rows(INVENTORY_PDF_COLUMNS)))
@@ -0,0 +1,40 @@
+# app/jobs.py
+"""Pools de hilos para trabajos en segundo plano (exportaciones, etc.).
+
+Cada tipo de trabajo usa su propio pool, así una cola larga de un tipo no
+bloquea a los demás. Las funciones corren dentro de un app context propio.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from . import db
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_executor(name, workers=1):
+    with _lock:
+        ex = _executors.get(name)
+        if ex is None:
+            ex = ThreadPoolExecutor(max_workers=max(int(workers or 1), 1),
+                                    thread_name_prefix=f"job-{name}")
+            _executors[name] = ex
+        return ex
+
+
+def submit(name, fn, *args, workers=1, **kwargs):
+    """Encola fn(*args, **kwargs) en el pool `name`."""
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                print(f"[jobs:{name}] error:", e)
+                raise
+            finally:
+                db.session.remove()
+
+    return get_executor(name, workers).submit(run)
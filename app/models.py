@@ -156,4 +156,105 @@ class TaskAttachment(db.Model):
     uploader_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)  # opcional
 
     def __repr__(self):
-        return f"<TaskAttachment {self.id} {self.original_name!r}>"
\ No newline at end of file
+        return f"<TaskAttachment {self.id} {self.original_name!r}>"
+
+
+class ExportJob(db.Model):
+    __tablename__ = "export_job"
+    id = db.Column(db.String(32), primary_key=True)              # uuid4 hex
+    kind = db.Column(db.String(50), nullable=False, index=True)  # tasks_pdf, actividad_xlsx, pcs_pdf...
+    params = db.Column(db.Text)                                  # filtros en JSON (ordenado)
+    cache_key = db.Column(db.String(64), nullable=False, index=True)  # kind + filtros + marca de datos
+    status = db.Column(db.String(20), default="pendiente", nullable=False, index=True)
+    filename = db.Column(db.String(255))                         # nombre de descarga
+    path = db.Column(db.String(500))                             # artefacto en disco
+    mimetype = db.Column(db.String(100))
+    size = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    username = db.Column(db.String(80))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ExportJob {self.id} {self.kind} {self.status}>"
+
+
+class ImportJob(db.Model):
+    """Importación de tareas en segundo plano (archivo subido + contadores)."""
+    __tablename__ = "import_job"
+    id = db.Column(db.String(32), primary_key=True)              # uuid4 hex
+    filename = db.Column(db.String(255))                         # nombre original
+    path = db.Column(db.String(500))                             # subida guardada (se borra al terminar)
+    status = db.Column(db.String(20), default="pendiente", nullable=False, index=True)
+    rows_read = db.Column(db.Integer, default=0, nullable=False)
+    inserted = db.Column(db.Integer, default=0, nullable=False)
+    updated = db.Column(db.Integer, default=0, nullable=False)    # ya importadas y con cambios
+    skipped = db.Column(db.Integer, default=0, nullable=False)    # ya importadas sin cambios
+    failed = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text)
+    error_token = db.Column(db.String(32))                       # CSV de filas con error
+    date_report = db.Column(db.Text)                             # JSON: formato inferido por columna de fecha
+    username = db.Column(db.String(80))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ImportJob {self.id} {self.status}>"
+
+
+class TaskImportKey(db.Model):
+    """Identidad de una tarea importada, para que reimportar un archivo actualice en vez de duplicar."""
+    __tablename__ = "task_import_key"
+    key = db.Column(db.String(40), primary_key=True)             # sha1 de título + fecha de inicio normalizados
+    task_id = db.Column(db.Integer, db.ForeignKey("task.id", ondelete="CASCADE"), nullable=False, index=True)
+    row_hash = db.Column(db.String(40), nullable=False)          # sha1 de la fila normalizada completa
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<TaskImportKey {self.key} -> {self.task_id}>"
+
+
+class TaskResolution(db.Model):
+    """Una fila por tarea finalizada con sus días de resolución (ver resolution.py)."""
+    __tablename__ = "task_resolution"
+    task_id = db.Column(db.Integer, db.ForeignKey("task.id", ondelete="CASCADE"), primary_key=True)
+    pc_id = db.Column(db.Integer, index=True)                    # sin FK: la PC puede borrarse
+    priority = db.Column(db.String(10), index=True)
+    month = db.Column(db.String(7), nullable=False, index=True)  # AAAA-MM de la fecha de fin
+    days = db.Column(db.Integer, nullable=False)
+    resolved_on = db.Column(db.Date, nullable=False)
+
+    def __repr__(self):
+        return f"<TaskResolution {self.task_id} {self.days}d>"
+
+
+class ScheduledReport(db.Model):
+    """Reporte programado: se genera con el scheduler (cron) y se envía por correo."""
+    __tablename__ = "scheduled_report"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)              # tipo de exportación (ver export_jobs)
+    params = db.Column(db.Text)                                  # filtros en JSON
+    cron = db.Column(db.String(100), nullable=False, default="0 6 * * 1")  # crontab, hora local
+    recipients = db.Column(db.String(500))                       # separados por coma; vacío = MAIL_TO
+    attach = db.Column(db.Boolean, default=True)                 # adjuntar (si no, enlace)
+    enabled = db.Column(db.Boolean, default=True, index=True)
+    last_run_at = db.Column(db.DateTime, nullable=True)
+    last_status = db.Column(db.String(20))                       # ok | error
+    last_error = db.Column(db.Text)
+    last_job_id = db.Column(db.String(32))                       # ExportJob con el último artefacto
+    created_by = db.Column(db.String(80))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ScheduledReport {self.id} {self.name!r} {self.cron}>"
+
+
+class DataVersion(db.Model):
+    """Contador de cambios de los datos de reportes (una sola fila, id=1; ver watermark.py)."""
+    __tablename__ = "data_version"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
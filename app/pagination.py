@@ -0,0 +1,143 @@
+# app/pagination.py
+"""Paginación por cursor (keyset) para los listados, sin OFFSET.
+
+El orden es por una o más claves más el id como desempate, todas en la misma
+dirección; el cursor (ver encode_cursor) lleva los valores de la
+última/primera fila y la página siguiente/anterior se pide con
+`WHERE (claves) < (cursor)`, que usa el índice y no recorre lo ya mostrado.
+Los enlaces conservan los filtros de la query string. Las claves fecha que
+admiten NULL se ordenan como coalesce(clave, 1970-01-01): `(NULL, id) < cursor`
+no es verdadero ni falso y esas filas nunca aparecerían.
+
+En la plantilla: {% from "pagination.html" import pager %} {{ pager(page) }}
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from flask import request, url_for
+from sqlalchemy import Date, DateTime, func, literal, tuple_
+
+from . import db
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+Page = namedtuple("Page", "rows next_url prev_url limit")
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor_values(token):
+    """Lista de valores del cursor (fechas como texto ISO) o None si es inválido."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+        values = json.loads(raw)
+    except Exception:
+        return None
+    return values if isinstance(values, list) else None
+
+
+def page_limit(args, default=PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        return min(max(int(args.get("limit", default)), 1), maximum)
+    except (TypeError, ValueError):
+        return default
+
+
+def _decode(token, keys):
+    values = decode_cursor_values(token)
+    if values is None or len(values) != len(keys):
+        return None
+    out = []
+    try:
+        for v, (_name, expr) in zip(values, keys):
+            if v is not None and isinstance(expr.type, DateTime):
+                v = datetime.fromisoformat(v)
+            elif v is not None and isinstance(expr.type, Date):
+                v = date.fromisoformat(v)
+            out.append(v)
+    except (TypeError, ValueError):
+        return None
+    return out
+
+
+def _page_url(**cursor):
+    args = request.args.to_dict(flat=False)
+    args.pop("after", None)
+    args.pop("before", None)
+    args.update(cursor)
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+def _null_value(expr):
+    """Valor que reemplaza a NULL en una clave fecha nullable (None si no hace falta)."""
+    if not getattr(getattr(expr, "expression", expr), "nullable", False):
+        return None
+    if isinstance(expr.type, DateTime):
+        return EPOCH
+    if isinstance(expr.type, Date):
+        return EPOCH.date()
+    return None
+
+
+def _all(stmt):
+    return db.session.execute(stmt).all()
+
+
+def paginate(stmt, keys, fetch=_all, desc=True, default_limit=PAGE_SIZE):
+    """Una página de `stmt` según ?after= / ?before= / ?limit= del request.
+
+    keys: [(atributo de la fila, expresión SQL), ...] terminando en el id.
+    fetch: ejecuta el SELECT y devuelve la lista de filas (por defecto Row;
+    Projection.all o db.session.scalars(...).all para objetos ORM).
+    """
+    limit = page_limit(request.args, default_limit)
+    after = _decode(request.args.get("after"), keys)
+    before = _decode(request.args.get("before"), keys) if after is None else None
+
+    nulls = [_null_value(e) for _n, e in keys]
+    exprs = [e if n is None else func.coalesce(e, literal(n, e.type)) for (_n, e), n in zip(keys, nulls)]
+    key = tuple_(*exprs)
+
+    def bound(values):
+        # tipos explícitos: en SQLite las fechas se comparan como texto con el formato del ORM
+        return tuple_(*[literal(v, e.type) for v, e in zip(values, exprs)])
+
+    forward = [e.desc() if desc else e.asc() for e in exprs]
+    backward = [e.asc() if desc else e.desc() for e in exprs]
+    q = stmt.order_by(None)
+    if before is not None:
+        q = q.where(key > bound(before) if desc else key < bound(before)).order_by(*backward)
+    else:
+        if after is not None:
+            q = q.where(key < bound(after) if desc else key > bound(after))
+        q = q.order_by(*forward)
+
+    rows = list(fetch(q.limit(limit + 1)))
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+    if not rows:
+        return Page([], None, None, limit)
+
+    def cursor(row):
+        values = [getattr(row, name) for name, _e in keys]
+        return encode_cursor([n if v is None else v for v, n in zip(values, nulls)])
+
+    if before is not None:
+        nxt, prev = rows[-1], (rows[0] if more else None)
+    else:
+        nxt, prev = (rows[-1] if more else None), (rows[0] if after is not None else None)
+    return Page(rows,
+                _page_url(after=cursor(nxt)) if nxt is not None else None,
+                _page_url(before=cursor(prev)) if prev is not None else None,
+                limit)
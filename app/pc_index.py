@@ -0,0 +1,128 @@
+# app/pc_index.py
+"""Índice en memoria de PCs (id, nombre, ubicación) para el selector de tareas.
+
+Las páginas de tareas ya no arman un <select> con toda la flota: usan un
+campo con autocompletado (ver templates/pc_picker.html) que consulta
+/pcs/lookup?q=, resuelto contra este índice sin ir a la base.
+
+El índice se carga con una consulta y se invalida cuando una transacción que
+creó, editó o borró una PC confirma (listener de la sesión). Con varios
+procesos cada uno tiene su copia: PC_INDEX_TTL (segundos) acota cuánto puede
+quedar desactualizada la de los demás.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event, inspect
+
+from . import db
+from .models import PC
+
+PCEntry = namedtuple("PCEntry", "id name location")
+LOOKUP_LIMIT = 20
+
+_lock = threading.Lock()
+_state = {"index": None, "loaded_at": 0.0, "generation": 0}
+
+
+def normalize(s):
+    s = unicodedata.normalize("NFKD", str(s or "")).encode("ascii", "ignore").decode("ascii")
+    return " ".join(s.lower().split())
+
+
+class PCIndex:
+    """PCs ordenadas por nombre normalizado; búsqueda por prefijo con bisect."""
+
+    def __init__(self, entries):
+        pairs = sorted(((normalize(e.name), e) for e in entries), key=lambda p: (p[0], p[1].id))
+        self.keys = [k for k, _e in pairs]
+        self.entries = [e for _k, e in pairs]
+        self.by_id = {e.id: e for e in self.entries}
+        # palabras de nombre y ubicación, para "recep" -> "PC-3 (Recepción)"
+        self.words = [(e, normalize(f"{e.name} {e.location or ''}").replace("-", " ").split())
+                      for e in self.entries]
+
+    def get(self, pc_id):
+        try:
+            return self.by_id.get(int(pc_id))
+        except (TypeError, ValueError):
+            return None
+
+    def search(self, q, limit=LOOKUP_LIMIT):
+        """Primero las PCs cuyo nombre empieza con `q`, después las que tienen
+        una palabra (del nombre o la ubicación) que empieza con `q`."""
+        q = normalize(q)
+        if not q:
+            return self.entries[:limit]
+        out = []
+        i = bisect_left(self.keys, q)
+        while i < len(self.keys) and len(out) < limit and self.keys[i].startswith(q):
+            out.append(self.entries[i])
+            i += 1
+        if len(out) < limit:
+            seen = {e.id for e in out}
+            for e, words in self.words:
+                if e.id not in seen and any(w.startswith(q) for w in words):
+                    out.append(e)
+                    if len(out) >= limit:
+                        break
+        return out
+
+
+def _load():
+    rows = db.session.execute(db.select(PC.id, PC.name, PC.location))
+    return PCIndex(PCEntry(*r) for r in rows)
+
+
+def get_index():
+    ttl = current_app.config.get("PC_INDEX_TTL", 300)
+    with _lock:
+        index, generation = _state["index"], _state["generation"]
+        if index is not None and (ttl <= 0 or time.monotonic() - _state["loaded_at"] < ttl):
+            return index
+    index = _load()
+    with _lock:
+        # si se invalidó mientras se cargaba, esta copia puede ser vieja: no se guarda
+        if _state["generation"] == generation:
+            _state["index"], _state["loaded_at"] = index, time.monotonic()
+    return index
+
+
+def invalidate():
+    with _lock:
+        _state["index"] = None
+        _state["generation"] += 1
+
+
+def _pc_changed(session):
+    if any(isinstance(obj, PC) for obj in chain(session.new, session.deleted)):
+        return True
+    # agregar un mantenimiento/backup también ensucia la PC (backref): solo cuentan nombre y ubicación
+    return any(isinstance(obj, PC) and any(inspect(obj).attrs[a].history.has_changes() for a in ("name", "location"))
+               for obj in session.dirty)
+
+
+def _after_flush(session, _flush_context):
+    if _pc_changed(session):
+        session.info["pc_index_dirty"] = True
+
+
+def _after_commit(session):
+    if session.info.pop("pc_index_dirty", False):
+        invalidate()
+
+
+def _after_soft_rollback(session, _previous_transaction):
+    session.info.pop("pc_index_dirty", None)
+
+
+def init_pc_index(app):
+    for name, fn in (("after_flush", _after_flush), ("after_commit", _after_commit),
+                     ("after_soft_rollback", _after_soft_rollback)):
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
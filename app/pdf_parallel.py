@@ -0,0 +1,190 @@
+# app/pdf_parallel.py
+"""Render de PDFs grandes en varios procesos.
+
+ReportLab usa un solo núcleo: con muchas filas la tabla se parte en bloques
+de páginas enteras, cada bloque se dibuja en un proceso del pool y las partes
+se unen con pypdf, numerando las páginas sobre el total. Los cortes salen de la
+diagramación del render (alto de cada fila y espacio por página), así el PDF
+queda con las mismas páginas que dibujado de una vez. Si pypdf no está
+instalado, hay un solo worker, el render no tiene diagramación o el reporte es
+chico, se dibuja en el proceso actual (también con "Página N de M").
+
+Los renders se pasan como "modulo:funcion" para que el proceso hijo los pueda
+importar:
+  render(title, headers, rows, canvasmaker=None, continued=False) -> bytes,
+    continued=True para los bloques que siguen la tabla;
+  layout(title, headers, rows) -> (altos de fila, espacio en la 1ª página,
+    espacio en las siguientes, alto del encabezado que se repite en cada página).
+"""
+import importlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from flask import current_app, has_app_context
+
+log = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _settings():
+    if not has_app_context():
+        return 1, 0, 0
+    cfg = current_app.config
+    return (int(cfg.get("PDF_WORKERS", 1)), int(cfg.get("PDF_PARALLEL_MIN_ROWS", 5000)),
+            int(cfg.get("PDF_CHUNK_ROWS", 2000)))
+
+
+def _resolve(ref):
+    module, name = ref.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _has_pypdf():
+    try:
+        import pypdf  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def draw_page_number(c, n, total):
+    width, _height = c._pagesize
+    c.saveState()
+    c.setFont("Helvetica", 8)
+    c.drawRightString(width - 12, 4, f"Página {n} de {total}")
+    c.restoreState()
+
+
+def numbered_canvas():
+    """Clase de Canvas que al guardar agrega "Página N de M" a cada página."""
+    from reportlab.pdfgen import canvas
+
+    class NumberedCanvas(canvas.Canvas):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._page_states = []
+
+        def showPage(self):
+            self._page_states.append(dict(self.__dict__))
+            self._startPage()
+
+        def save(self):
+            total = len(self._page_states)
+            for n, state in enumerate(self._page_states, 1):
+                self.__dict__.update(state)
+                draw_page_number(self, n, total)
+                canvas.Canvas.showPage(self)
+            canvas.Canvas.save(self)
+
+    return NumberedCanvas
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._max_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: el proceso web tiene hilos (scheduler, pool de exportaciones)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _render_chunk(render_ref, title, headers, rows, continued):
+    return _resolve(render_ref)(title, headers, rows, continued=continued)
+
+
+def _layout_chunk(layout_ref, title, headers, rows):
+    return _resolve(layout_ref)(title, headers, rows)
+
+
+def _page_starts(heights, first, rest, head):
+    """Índice de la primera fila de cada página (mismo criterio que el corte de la tabla:
+    entra mientras encabezado + filas no pase el espacio; una fila sola siempre entra)."""
+    starts, used, space = [0], head, first
+    for i, h in enumerate(heights):
+        if used > head and used + h > space:
+            starts.append(i)
+            used, space = head, rest
+        used += h
+    return starts
+
+
+def _chunk_bounds(starts, total, chunk_rows):
+    """Bloques [desde, hasta) de páginas enteras con al menos chunk_rows filas (salvo el último)."""
+    bounds, begin = [], 0
+    for start in starts[1:]:
+        if start - begin >= chunk_rows:
+            bounds.append((begin, start))
+            begin = start
+    bounds.append((begin, total))
+    return bounds
+
+
+def _stamp_page_numbers(writer):
+    from pypdf import PdfReader
+    from reportlab.pdfgen import canvas
+
+    total = len(writer.pages)
+    buf = BytesIO()
+    c = canvas.Canvas(buf)
+    for n, page in enumerate(writer.pages, 1):
+        c.setPageSize((float(page.mediabox.width), float(page.mediabox.height)))
+        draw_page_number(c, n, total)
+        c.showPage()
+    c.save()
+    for page, overlay in zip(writer.pages, PdfReader(BytesIO(buf.getvalue())).pages):
+        page.merge_page(overlay)
+
+
+def _render_parallel(render_ref, layout_ref, title, headers, rows, workers, chunk_rows):
+    from pypdf import PdfReader, PdfWriter
+
+    pool = _get_pool(workers)
+    # la diagramación (medir filas) también se reparte; el espacio por página es el mismo en todas
+    layouts = [pool.submit(_layout_chunk, layout_ref, title, headers, rows[i:i + chunk_rows])
+               for i in range(0, len(rows), chunk_rows)]
+    heights = []
+    for fut in layouts:
+        part, first, rest, head = fut.result()
+        heights.extend(part)
+    starts = _page_starts(heights, first, rest, head)
+    futures = [
+        pool.submit(_render_chunk, render_ref, title, headers, rows[a:b], a > 0)
+        for a, b in _chunk_bounds(starts, len(rows), chunk_rows)
+    ]
+    writer = PdfWriter()
+    for fut in futures:
+        for page in PdfReader(BytesIO(fut.result())).pages:
+            writer.add_page(page)
+    _stamp_page_numbers(writer)
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def render_pdf(render_ref, title, headers, rows, layout_ref=None):
+    """PDF (bytes) de la tabla; en paralelo si el reporte es grande, el render tiene
+    diagramación (layout_ref) y hay pypdf."""
+    workers, min_rows, chunk_rows = _settings()
+    if layout_ref and workers > 1 and chunk_rows > 0 and _has_pypdf():
+        rows = rows if isinstance(rows, list) else list(rows)
+        if len(rows) >= min_rows and len(rows) > chunk_rows:
+            try:
+                return _render_parallel(render_ref, layout_ref, title, headers, rows, workers, chunk_rows)
+            except Exception:
+                log.exception("[pdf] falló el render en paralelo; se dibuja en un solo proceso")
+                _reset_pool()
+    return _resolve(render_ref)(title, headers, rows, canvasmaker=numbered_canvas())
@@ -0,0 +1,100 @@
+# app/projections.py
+"""Proyecciones de solo lectura para los listados.
+
+Los listados (dashboard, PCs, tareas, inventario) no necesitan objetos ORM:
+se seleccionan solo las columnas que muestra la plantilla (sin los Text como
+notes/problem/solution) y cada fila se arma como namedtuple (sin __dict__),
+fuera del identity map de la sesión. Las plantillas siguen usando `fila.campo`.
+
+Los listados grandes se envían con `stream_page`: la plantilla se renderiza
+con stream_template sobre un generador (`Projection.iter`, consulta por
+partes), así el encabezado y las primeras filas salen enseguida.
+"""
+from collections import namedtuple
+from flask import Response, get_flashed_messages, stream_template
+
+from . import db
+from .models import PC, Maintenance, Task, TaskAttachment
+from .inventory_models import InventoryItem
+
+
+class Projection:
+    """Columnas con nombre -> SELECT etiquetado + clase de fila (namedtuple)."""
+
+    def __init__(self, typename, /, **columns):
+        self.columns = columns
+        self.row = namedtuple(typename, columns)
+
+    def extend(self, typename, /, **columns):
+        return Projection(typename, **self.columns, **columns)
+
+    def select(self, **overrides):
+        """SELECT de las columnas; `overrides` reemplaza expresiones que dependen de la consulta."""
+        return db.select(*[overrides.get(key, expr).label(key) for key, expr in self.columns.items()])
+
+    def all(self, stmt):
+        make = self.row._make
+        return [make(r) for r in db.session.execute(stmt)]
+
+    def iter(self, stmt, chunk_rows=500):
+        """Filas de a una, leyendo de a `chunk_rows` desde la base."""
+        make = self.row._make
+        for r in db.session.execute(stmt.execution_options(yield_per=chunk_rows)):
+            yield make(r)
+
+
+def _last_maintenance():
+    return (db.select(db.func.max(Maintenance.date_performed))
+            .where(Maintenance.pc_id == PC.id).correlate(PC).scalar_subquery())
+
+
+PC_LIST = Projection("PCListRow", id=PC.id, name=PC.name, pc_username=PC.pc_username,
+                     physical_user=PC.physical_user)
+
+PC_STATUS = Projection("PCStatusRow", id=PC.id, name=PC.name, pc_username=PC.pc_username,
+                       physical_user=PC.physical_user, last_maintenance=_last_maintenance())
+
+def _attachment_count():
+    return (db.select(db.func.count(TaskAttachment.id))
+            .where(TaskAttachment.task_id == Task.id).correlate(Task).scalar_subquery())
+
+
+TASK_LIST = Projection("TaskListRow", id=Task.id, title=Task.title, pc_name=PC.name, status=Task.status,
+                       priority=Task.priority, start_date=Task.start_date, end_date=Task.end_date,
+                       created_at=Task.created_at, updated_at=Task.updated_at,
+                       attachments=_attachment_count())
+
+INVENTORY_LIST = Projection("InventoryListRow", id=InventoryItem.id, kind=InventoryItem.kind,
+                            name=InventoryItem.name, brand=InventoryItem.brand, model=InventoryItem.model,
+                            serial=InventoryItem.serial, location=InventoryItem.location,
+                            assigned_to=InventoryItem.assigned_to, status=InventoryItem.status,
+                            created_at=InventoryItem.created_at)
+
+
+def task_list_select():
+    return TASK_LIST.select().select_from(Task).outerjoin(PC, PC.id == Task.pc_id)
+
+
+def _buffered(chunks, size):
+    # Jinja entrega pedacitos; se juntan para no mandar (y comprimir) uno por vez
+    buf, n = [], 0
+    try:
+        for chunk in chunks:
+            buf.append(chunk)
+            n += len(chunk)
+            if n >= size:
+                yield "".join(buf)
+                buf, n = [], 0
+        if buf:
+            yield "".join(buf)
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def stream_page(template, buffer_size=8192, **context):
+    """Respuesta HTML renderizada por partes (las filas pueden venir de un generador)."""
+    # los mensajes flash se leen ahora: la cookie de sesión se guarda antes del cuerpo
+    get_flashed_messages()
+    return Response(_buffered(stream_template(template, **context), buffer_size), mimetype="text/html")
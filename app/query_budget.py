@@ -0,0 +1,73 @@
+# app/query_budget.py
+"""Presupuesto de consultas SQL por request para listados, reportes y exportaciones.
+
+Cuenta las consultas que ejecuta cada request y, si un endpoint vigilado pasa
+su límite, falla (en TESTING, o con QUERY_BUDGET_ENFORCE=true) o lo registra
+en el log. Sirve para que no vuelvan los N+1 (un lazy-load por fila).
+"""
+from fnmatch import fnmatch
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Endpoints vigilados (patrones fnmatch) -> máximo de consultas por request
+DEFAULT_BUDGETS = {
+    "main.index": 12,
+    "main.pcs_list": 8,
+    "main.alerts_list": 8,
+    "tasks.list_tasks": 10,
+    "inventory.list_items": 8,
+    "inventory.export_*": 10,
+    "admin.email_logs": 8,
+    "reports.*": 15,
+    "export.*": 12,
+    "exportx.*": 12,
+    "activity.*": 8,
+    "analytics.*": 8,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g._query_count = g.get("_query_count", 0) + 1
+
+
+def _budget_for(endpoint, budgets):
+    for pattern, limit in budgets.items():
+        if fnmatch(endpoint, pattern):
+            return limit
+    return None
+
+
+def query_count():
+    return g.get("_query_count", 0)
+
+
+def init_query_budget(app):
+    if not event.contains(Engine, "before_cursor_execute", _count):
+        event.listen(Engine, "before_cursor_execute", _count)
+
+    @app.after_request
+    def _query_count_header(resp):
+        if app.debug or app.testing:
+            resp.headers["X-Query-Count"] = str(query_count())
+        return resp
+
+    # teardown: incluye las consultas de respuestas en streaming
+    @app.teardown_request
+    def _check_query_budget(exc):
+        if exc is not None or not request.endpoint:
+            return
+        budgets = app.config.get("QUERY_BUDGETS") or DEFAULT_BUDGETS
+        limit = _budget_for(request.endpoint, budgets)
+        n = query_count()
+        if limit is None or n <= limit:
+            return
+        msg = f"{request.endpoint} ejecutó {n} consultas (máximo {limit}): ¿falta joinedload/selectinload?"
+        if app.config.get("QUERY_BUDGET_ENFORCE", app.testing):
+            raise QueryBudgetExceeded(msg)
+        app.logger.warning("[query_budget] %s", msg)
@@ -1,11 +1,21 @@
 
-import csv, io
-from collections import Counter
+import csv, io, os, tempfile, zipfile
 from datetime import datetime, date
-from flask import Blueprint, render_template, request
+from flask import Blueprint, Response, render_template, request, stream_with_context
 from flask_login import login_required
+from sqlalchemy.orm import joinedload
 from .models import PC, Task, Config
-from .utils_export import stream_csv, stream_xlsx, stream_pdf
+from .utils_export import (stream_csv, stream_xlsx, stream_pdf, pdf_bytes, xlsx_bytes,
+                           CsvWriter, XlsxWriter, PdfTableWriter, ZipStream)
+from .http_cache import conditional_cache
+from .export_jobs import prerendered
+from .pdf_parallel import numbered_canvas
+from .export_format import ExportColumn, format_rows, headers as export_headers
+from .pagination import paginate
+from .projections import TASK_LIST, task_list_select
+from . import task_stats as stats
+from . import resolution
+from .task_stats import range_filters
 
 bp = Blueprint("reports", __name__, template_folder="templates")
 
@@ -27,41 +37,58 @@ def pc_last_dates(pc):
     lb = lb_obj.date_performed.date() if lb_obj else None
     return lm, lb
 
-def pc_age_or_start_days(pc, maybe_date):
+def pc_age_or_start_days(pc, maybe_date, created_date=None):
     from .utils import pc_created_date
-    start = maybe_date or pc_created_date(pc)
+    start = maybe_date or created_date or pc_created_date(pc)
     return (date.today() - start).days
 
+def _tasks_query(args=None):
+    """Tareas del rango ?start/?end (por fecha de creación), con la PC ya cargada."""
+    args = request.args if args is None else args
+    start = parse_date(args.get("start")); end = parse_date(args.get("end"))
+    q = Task.query.options(joinedload(Task.pc)).filter(*range_filters(start, end))
+    return q.order_by(Task.created_at.desc()), start, end
+
+def _pc_ages():
+    """[(pc, lm, lb, age_m, age_b)] ordenado por nombre, sin consultas por PC."""
+    from .utils import pc_created_dates_map, pc_last_dates_map
+    last = pc_last_dates_map()
+    created = pc_created_dates_map()
+    out = []
+    for pc in PC.query.order_by(PC.name.asc()).all():
+        lm, lb = last.get(pc.id, (None, None))
+        out.append((pc, lm, lb,
+                    pc_age_or_start_days(pc, lm, created.get(pc.id)),
+                    pc_age_or_start_days(pc, lb, created.get(pc.id))))
+    return out
+
 @bp.route("/", strict_slashes=False)
 @bp.route("", strict_slashes=False)
 @login_required
+@conditional_cache
 def dashboard():
     maint_days, backup_days = get_thresholds()
-    total_tasks = Task.query.count()
-    status_counts = Counter((t.status or "—") for t in Task.query.all())
-    priority_counts = Counter((t.priority or "—") for t in Task.query.all())
-
-    finished = Task.query.filter(Task.status == "finalizada").all()
-    def resolved_days(t):
-        s = t.start_date or (t.created_at.date() if t.created_at else None)
-        e = t.end_date or (t.updated_at.date() if t.updated_at else None)
-        if s and e: return max((e - s).days, 0)
-        return None
-    vals = [d for t in finished for d in [resolved_days(t)] if d is not None]
-    avg_resolve = (sum(vals) / len(vals)) if vals else None
+    status_counts = stats.counts_by_status()
+    priority_counts = stats.counts_by_priority()
+    total_tasks = sum(status_counts.values())
+    avg_resolve = stats.avg_resolve_days()
+    resolve_all = resolution.overall()
+    resolve_by_priority = resolution.distribution("priority")
 
-    pcs = PC.query.all()
+    pcs = _pc_ages()
     pcs_alert_m = pcs_alert_b = 0
-    for pc in pcs:
-        lm, lb = pc_last_dates(pc)
-        if pc_age_or_start_days(pc, lm) >= maint_days: pcs_alert_m += 1
-        if pc_age_or_start_days(pc, lb) >= backup_days: pcs_alert_b += 1
+    for _pc, _lm, _lb, age_m, age_b in pcs:
+        if age_m >= maint_days: pcs_alert_m += 1
+        if age_b >= backup_days: pcs_alert_b += 1
 
     return render_template("reports_dashboard.html",
                            total_tasks=total_tasks,
                            status_counts=status_counts,
                            priority_counts=priority_counts,
                            avg_resolve=avg_resolve,
+                           resolve_all=resolve_all,
+                           resolve_by_priority=resolve_by_priority,
+                           bucket_labels=resolution.BUCKET_LABELS,
                            pcs_total=len(pcs),
                            pcs_alert_m=pcs_alert_m,
                            pcs_alert_b=pcs_alert_b,
@@ -70,93 +97,104 @@ def dashboard():
 
 @bp.route("/tasks")
 @login_required
+@conditional_cache
 def tasks_report():
-    start = parse_date(request.args.get("start"))
-    end = parse_date(request.args.get("end"))
-    q = Task.query
-    if start: q = q.filter(Task.created_at >= datetime.combine(start, datetime.min.time()))
-    if end: q = q.filter(Task.created_at <= datetime.combine(end, datetime.max.time()))
-    tasks = q.order_by(Task.created_at.desc()).all()
-
-    by_status = Counter((t.status or "—") for t in tasks)
-    by_priority = Counter((t.priority or "—") for t in tasks)
-    by_pc = Counter((t.pc.name if t.pc else "—") for t in tasks)
-
-    by_month = Counter()
-    for t in tasks:
-        dt = t.created_at.date() if t.created_at else None
-        if not dt: continue
-        key = f"{dt.year}-{dt.month:02d}"
-        by_month[key] += 1
-    months_sorted = sorted(by_month.keys())
+    start = parse_date(request.args.get("start")); end = parse_date(request.args.get("end"))
+    filters = range_filters(start, end)
+    by_month = stats.counts_by_month(filters)
+    page = paginate(task_list_select().where(*filters),
+                    [("created_at", Task.created_at), ("id", Task.id)], TASK_LIST.all)
 
     return render_template("report_tasks.html",
-                           tasks=tasks,
+                           page=page, tasks=page.rows,
                            start=start, end=end,
-                           by_status=by_status,
-                           by_priority=by_priority,
-                           by_pc=by_pc.most_common(20),
-                           months=months_sorted,
-                           series=[by_month[m] for m in months_sorted])
+                           by_status=stats.counts_by_status(filters),
+                           by_priority=stats.counts_by_priority(filters),
+                           by_pc=stats.counts_by_pc(filters, limit=20),
+                           months=[m for m, _n in by_month],
+                           series=[n for _m, n in by_month])
+
+def _resolution_dims():
+    dim = request.args.get("dim")
+    return [dim] if dim in resolution.DIMENSIONS else None
+
+@bp.route("/resolution")
+@login_required
+@conditional_cache
+def resolution_report():
+    dim = request.args.get("dim")
+    if dim not in resolution.DIMENSIONS:
+        dim = "priority"
+    return render_template("report_resolution.html",
+                           dim=dim, dimensions=resolution.DIMENSIONS,
+                           overall=resolution.overall(),
+                           rows=resolution.distribution(dim),
+                           bucket_labels=resolution.BUCKET_LABELS)
+
+@bp.route("/resolution.csv")
+@login_required
+@conditional_cache
+def resolution_csv():
+    return stream_csv("tiempos_resolucion.csv", resolution.EXPORT_HEADERS,
+                      resolution.export_rows(_resolution_dims()))
+
+@bp.route("/resolution.xlsx")
+@login_required
+@conditional_cache
+def resolution_xlsx():
+    return stream_xlsx("tiempos_resolucion.xlsx", resolution.EXPORT_HEADERS,
+                       list(resolution.export_rows(_resolution_dims())))
+
+TASKS_COLUMNS = [
+    ExportColumn("id", "id", "raw"), ExportColumn("title", "title", "text"),
+    ExportColumn("status", "status", "text"), ExportColumn("priority", "priority", "text"),
+    ExportColumn("pc", "pc", "text"), ExportColumn("start_date", "start_date", "date"),
+    ExportColumn("end_date", "end_date", "date"), ExportColumn("created_at", "created_at", "datetime"),
+    ExportColumn("updated_at", "updated_at", "datetime"),
+]
+TASKS_HEADERS = export_headers(TASKS_COLUMNS)
+# el PDF usa las primeras columnas de la misma fila
+TASKS_PDF_HEADERS = ["ID","Título","Estado","Prioridad","PC","Inicio","Fin"]
+
+def _tasks_rows(args=None, native=False):
+    q, _start, _end = _tasks_query(args)
+    rows = ([t.id, t.title, t.status, t.priority, (t.pc.name if t.pc else ""),
+             t.start_date, t.end_date, t.created_at, t.updated_at] for t in q.yield_per(500))
+    return format_rows(rows, TASKS_COLUMNS, native)
 
 @bp.route("/tasks.csv")
 @login_required
+@conditional_cache
 def tasks_csv():
-    start = parse_date(request.args.get("start")); end = parse_date(request.args.get("end"))
-    q = Task.query
-    if start: q = q.filter(Task.created_at >= datetime.combine(start, datetime.min.time()))
-    if end: q = q.filter(Task.created_at <= datetime.combine(end, datetime.max.time()))
-    tasks = q.order_by(Task.created_at.desc()).all()
+    return stream_csv("tasks_report.csv", TASKS_HEADERS, _tasks_rows())
 
-    headers = ["id","title","status","priority","pc","start_date","end_date","created_at","updated_at"]
-    rows = [[t.id, t.title, t.status, t.priority, (t.pc.name if t.pc else ""),
-            t.start_date or "", t.end_date or "", t.created_at or "", t.updated_at or ""]
-    for t in tasks]
-    return stream_csv("tasks_report.csv", headers, rows)
+def render_tasks_xlsx(args=None, progress=None):
+    """XLSX del reporte de tareas (bytes) para trabajos en segundo plano y reportes programados."""
+    return xlsx_bytes(TASKS_HEADERS, _tasks_rows(args, native=True))
 
 @bp.route("/tasks.xlsx")
 @login_required
+@conditional_cache
+@prerendered("tasks_xlsx")
 def tasks_xlsx():
-    start = parse_date(request.args.get("start")); end = parse_date(request.args.get("end"))
-    q = Task.query
-    if start: q = q.filter(Task.created_at >= datetime.combine(start, datetime.min.time()))
-    if end: q = q.filter(Task.created_at <= datetime.combine(end, datetime.max.time()))
-    tasks = q.order_by(Task.created_at.desc()).all()
-
-    headers = ["id","title","status","priority","pc","start_date","end_date","created_at","updated_at"]
-    rows = [[t.id, t.title, t.status, t.priority, (t.pc.name if t.pc else ""),
-            t.start_date or "", t.end_date or "", t.created_at or "", t.updated_at or ""]
-    for t in tasks]
-    return stream_xlsx("tasks_report.xlsx", headers, rows)
+    return stream_xlsx("tasks_report.xlsx", TASKS_HEADERS, list(_tasks_rows(native=True)))
 
 @bp.route("/tasks.pdf")
 @login_required
+@conditional_cache
 def tasks_pdf():
-    start = parse_date(request.args.get("start")); end = parse_date(request.args.get("end"))
-    q = Task.query
-    if start: q = q.filter(Task.created_at >= datetime.combine(start, datetime.min.time()))
-    if end: q = q.filter(Task.created_at <= datetime.combine(end, datetime.max.time()))
-    tasks = q.order_by(Task.created_at.desc()).all()
-
-    headers = ["ID","Título","Estado","Prioridad","PC","Inicio","Fin"]
-    rows = [[t.id, t.title, t.status, t.priority, (t.pc.name if t.pc else ""),
-            t.start_date or "", t.end_date or ""]
-    for t in tasks]
-    return stream_pdf("tasks_report.pdf", "Reporte de Tareas", headers, rows)
+    rows = [r[:len(TASKS_PDF_HEADERS)] for r in _tasks_rows()]
+    return stream_pdf("tasks_report.pdf", "Reporte de Tareas", TASKS_PDF_HEADERS, rows)
 
 @bp.route("/pcs")
 @login_required
+@conditional_cache
 def pcs_report():
     maint_days, backup_days = get_thresholds()
     only_alerts = (request.args.get("alerts") == "1")
 
     rows = []
-    for pc in PC.query.order_by(PC.name.asc()).all():
-        lm = pc.last_maintenance_date()
-        lb_obj = pc.last_backup()
-        lb = lb_obj.date_performed.date() if lb_obj else None
-        age_m = pc_age_or_start_days(pc, lm)
-        age_b = pc_age_or_start_days(pc, lb)
+    for pc, lm, lb, age_m, age_b in _pc_ages():
         alert_m = (age_m >= maint_days)
         alert_b = (age_b >= backup_days)
         if only_alerts and not (alert_m or alert_b):
@@ -167,71 +205,120 @@ def pcs_report():
     return render_template("report_pcs.html",
                            rows=rows, maint_days=maint_days, backup_days=backup_days, only_alerts=only_alerts)
 
-@bp.route("/pcs.csv")
-@login_required
-def pcs_csv():
+PCS_HEADERS = ["pc","usuario","ult_mant","dias_mant","alerta_mant","ult_backup","dias_backup","alerta_backup"]
+PCS_PDF_HEADERS = ["PC","Usuario","Últ. mant.","Días mant.","Alerta mant.","Últ. backup","Días backup","Alerta backup"]
+
+def _pcs_rows(only_alerts, progress=None):
     maint_days, backup_days = get_thresholds()
-    only_alerts = (request.args.get("alerts") == "1")
-    headers = ["pc","usuario","ult_mant","dias_mant","alerta_mant","ult_backup","dias_backup","alerta_backup"]
+    pcs = _pc_ages()
+    total = len(pcs) or 1
     rows = []
-    for pc in PC.query.order_by(PC.name.asc()).all():
-        lm = pc.last_maintenance_date()
-        lb_obj = pc.last_backup()
-        lb = lb_obj.date_performed.date() if lb_obj else None
-        age_m = pc_age_or_start_days(pc, lm)
-        age_b = pc_age_or_start_days(pc, lb)
+    for i, (pc, lm, lb, age_m, age_b) in enumerate(pcs, 1):
         alert_m = (age_m >= maint_days)
         alert_b = (age_b >= backup_days)
+        if progress and i % 100 == 0:
+            progress(int(90 * i / total))
         if only_alerts and not (alert_m or alert_b):
             continue
         rows.append([pc.name,
                      getattr(pc, "user_name", "") or getattr(pc, "user", "") or "",
                      lm or "", age_m, "SI" if alert_m else "NO",
                      lb or "", age_b, "SI" if alert_b else "NO"])
-    return stream_csv("pcs_report.csv", headers, rows)
+    return rows
+
+def render_pcs_pdf(args=None, progress=None):
+    """PDF del reporte de PCs (bytes) para los trabajos de exportación en segundo plano."""
+    args = request.args if args is None else args
+    rows = _pcs_rows(args.get("alerts") == "1", progress)
+    return pdf_bytes("Reporte de PCs", PCS_PDF_HEADERS, rows)
+
+@bp.route("/pcs.csv")
+@login_required
+@conditional_cache
+def pcs_csv():
+    only_alerts = (request.args.get("alerts") == "1")
+    return stream_csv("pcs_report.csv", PCS_HEADERS, _pcs_rows(only_alerts))
+
+def render_pcs_xlsx(args=None, progress=None):
+    """XLSX del reporte de PCs (bytes) para trabajos en segundo plano y reportes programados."""
+    args = request.args if args is None else args
+    return xlsx_bytes(PCS_HEADERS, _pcs_rows(args.get("alerts") == "1", progress))
 
 @bp.route("/pcs.xlsx")
 @login_required
+@conditional_cache
+@prerendered("pcs_xlsx")
 def pcs_xlsx():
-    maint_days, backup_days = get_thresholds()
     only_alerts = (request.args.get("alerts") == "1")
-    headers = ["pc","usuario","ult_mant","dias_mant","alerta_mant","ult_backup","dias_backup","alerta_backup"]
-    rows = []
-    for pc in PC.query.order_by(PC.name.asc()).all():
-        lm = pc.last_maintenance_date()
-        lb_obj = pc.last_backup()
-        lb = lb_obj.date_performed.date() if lb_obj else None
-        age_m = pc_age_or_start_days(pc, lm)
-        age_b = pc_age_or_start_days(pc, lb)
-        alert_m = (age_m >= maint_days)
-        alert_b = (age_b >= backup_days)
-        if only_alerts and not (alert_m or alert_b):
-            continue
-        rows.append([pc.name,
-                     getattr(pc, "user_name", "") or getattr(pc, "user", "") or "",
-                     lm or "", age_m, "SI" if alert_m else "NO",
-                     lb or "", age_b, "SI" if alert_b else "NO"])
-    return stream_xlsx("pcs_report.xlsx", headers, rows)
+    return stream_xlsx("pcs_report.xlsx", PCS_HEADERS, _pcs_rows(only_alerts))
 
 @bp.route("/pcs.pdf")
 @login_required
+@conditional_cache
+@prerendered("pcs_pdf")
 def pcs_pdf():
-    maint_days, backup_days = get_thresholds()
     only_alerts = (request.args.get("alerts") == "1")
-    headers = ["PC","Usuario","Últ. mant.","Días mant.","Alerta mant.","Últ. backup","Días backup","Alerta backup"]
-    rows = []
-    for pc in PC.query.order_by(PC.name.asc()).all():
-        lm = pc.last_maintenance_date()
-        lb_obj = pc.last_backup()
-        lb = lb_obj.date_performed.date() if lb_obj else None
-        age_m = pc_age_or_start_days(pc, lm)
-        age_b = pc_age_or_start_days(pc, lb)
-        alert_m = (age_m >= maint_days)
-        alert_b = (age_b >= backup_days)
-        if only_alerts and not (alert_m or alert_b):
-            continue
-        rows.append([pc.name,
-                     getattr(pc, "user_name", "") or getattr(pc, "user", "") or "",
-                     lm or "", age_m, "SI" if alert_m else "NO",
-                     lb or "", age_b, "SI" if alert_b else "NO"])
-    return stream_pdf("pcs_report.pdf", "Reporte de PCs", headers, rows)
+    return stream_pdf("pcs_report.pdf", "Reporte de PCs", PCS_PDF_HEADERS, _pcs_rows(only_alerts))
+
+# ---- Paquete mensual: CSV + XLSX + PDF de tareas y PCs en un ZIP ----
+
+BUNDLE_COPY_BYTES = 256 * 1024
+
+def bundle_chunks(args):
+    """Bytes del ZIP por partes. Cada consulta corre una sola vez y sus filas se
+    reparten a la vez entre los escritores CSV, XLSX y PDF.
+
+    El CSV va directo a su entrada del ZIP; XLSX y PDF se arman en archivos
+    temporales y al terminar el recorrido se copian a su entrada por bloques,
+    entregando lo comprimido después de cada bloque. Si falta openpyxl o
+    reportlab ese formato se omite.
+    """
+    datasets = [
+        ("tareas", "Reporte de Tareas", TASKS_HEADERS, TASKS_PDF_HEADERS, lambda: _tasks_rows(args)),
+        ("pcs", "Reporte de PCs", PCS_HEADERS, PCS_PDF_HEADERS, lambda: _pcs_rows(args.get("alerts") == "1")),
+    ]
+    out = ZipStream()
+    with tempfile.TemporaryDirectory(prefix="bundle_") as tmp, \
+            zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, title, headers, pdf_headers, rows in datasets:
+            extra = []
+            for ext, make in (("xlsx", lambda p: XlsxWriter(p, headers)),
+                              ("pdf", lambda p: PdfTableWriter(p, title, pdf_headers, numbered_canvas()))):
+                path = os.path.join(tmp, f"{name}.{ext}")
+                try:
+                    extra.append((path, make(path)))
+                except ImportError:
+                    pass
+            with zf.open(f"{name}.csv", "w") as raw:
+                writers = [CsvWriter(raw, headers)] + [w for _p, w in extra]
+                for i, row in enumerate(rows(), 1):
+                    for w in writers:
+                        w.write(row)
+                    if i % 500 == 0:
+                        yield out.drain()
+                for w in writers:
+                    w.close()
+            yield out.drain()
+            for path, _w in extra:
+                info = zipfile.ZipInfo.from_file(path, os.path.basename(path))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(path, "rb") as src, zf.open(info, "w") as dst:
+                    for block in iter(lambda: src.read(BUNDLE_COPY_BYTES), b""):
+                        dst.write(block)
+                        yield out.drain()
+                yield out.drain()
+    yield out.drain()
+
+def write_bundle(path, args):
+    """Escribe el paquete en `path` (para el comando `flask report-bundle`)."""
+    with open(path, "wb") as f:
+        for chunk in bundle_chunks(args):
+            f.write(chunk)
+
+@bp.route("/bundle.zip")
+@login_required
+@conditional_cache
+def bundle_zip():
+    args = request.args.to_dict()
+    return Response(stream_with_context(bundle_chunks(args)), mimetype="application/zip",
+                    headers={"Content-Disposition": "attachment; filename=reportes.zip"})
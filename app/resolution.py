@@ -0,0 +1,215 @@
+# app/resolution.py
+"""Distribución del tiempo de resolución de tareas (p50/p90/p99 e histograma).
+
+`task_resolution` guarda una fila por tarea finalizada con sus días de
+resolución (fecha de fin, o de última modificación, menos la de inicio, o de
+creación; mínimo 0), la prioridad, la PC y el mes de fin. Se mantiene al día:
+
+- en altas/ediciones/bajas por el ORM, con un listener after_flush que mira
+  solo las tareas cuyo estado, prioridad, PC o fechas cambiaron, y las
+  finalizadas sin fecha de fin que se modificaron (su fin es updated_at);
+- en la importación masiva (que escribe con Core), llamando a `sync_tasks`.
+
+`flask resolution-rebuild` la reconstruye desde cero. Las distribuciones se
+calculan con un GROUP BY (clave, días) sobre esta tabla y los percentiles se
+sacan de los conteos acumulados, sin cargar tareas. PC y ubicación se toman
+de la PC al consultar, así un cambio de nombre o de ubicación no deja datos
+viejos.
+"""
+from collections import namedtuple
+from datetime import date, datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import DBAPIError
+
+from . import db
+from .models import PC, Task, TaskResolution
+
+EMPTY = "—"
+PERCENTILES = (50, 90, 99)
+# límites inferiores de cada barra del histograma, en días
+BUCKETS = (0, 1, 3, 7, 14, 30, 60, 90)
+BUCKET_LABELS = tuple(
+    (f"{lo}d" if hi - lo == 1 else f"{lo}-{hi - 1}d") if hi is not None else f"{lo}+d"
+    for lo, hi in zip(BUCKETS, BUCKETS[1:] + (None,)))
+_TRACKED = ("status", "priority", "pc_id", "start_date", "end_date")
+SYNC_CHUNK = 500
+
+Distribution = namedtuple("Distribution", "key n mean p50 p90 p99 histogram")
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _fact(row):
+    task_id, pc_id, priority, start, end, created_at, updated_at = row
+    start = start or _as_date(created_at)
+    end = end or _as_date(updated_at) or date.today()
+    days = max((end - start).days, 0) if start else 0
+    return {"task_id": task_id, "pc_id": pc_id, "priority": priority or None,
+            "month": f"{end.year}-{end.month:02d}", "days": days, "resolved_on": end}
+
+
+def _source(ids=None):
+    stmt = db.select(Task.id, Task.pc_id, Task.priority, Task.start_date, Task.end_date,
+                     Task.created_at, Task.updated_at).where(Task.status == "finalizada")
+    return stmt.where(Task.id.in_(ids)) if ids is not None else stmt
+
+
+def sync_tasks(task_ids, conn=None):
+    """Recalcula las filas de `task_ids` (borra las que ya no están finalizadas)."""
+    conn = conn if conn is not None else db.session.connection()
+    ids = list(task_ids)
+    for i in range(0, len(ids), SYNC_CHUNK):
+        part = ids[i:i + SYNC_CHUNK]
+        conn.execute(db.delete(TaskResolution).where(TaskResolution.task_id.in_(part)))
+        facts = [_fact(r) for r in conn.execute(_source(part))]
+        if facts:
+            conn.execute(db.insert(TaskResolution), facts)
+
+
+def rebuild():
+    """Vacía la tabla y la vuelve a llenar con todas las tareas finalizadas."""
+    db.session.execute(db.delete(TaskResolution))
+    n, batch = 0, []
+    for row in db.session.execute(_source().execution_options(yield_per=1000)):
+        batch.append(_fact(row))
+        if len(batch) >= 1000:
+            db.session.execute(db.insert(TaskResolution), batch)
+            n += len(batch); batch = []
+    if batch:
+        db.session.execute(db.insert(TaskResolution), batch)
+        n += len(batch)
+    db.session.commit()
+    return n
+
+
+def _changed_task_ids(session):
+    ids = set()
+    for obj in session.new:
+        if isinstance(obj, Task):
+            ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in _TRACKED):
+                ids.add(obj.id)
+            elif (obj.status == "finalizada" and obj.end_date is None
+                  and session.is_modified(obj, include_collections=False)):
+                # sin fecha de fin cuenta updated_at, que el UPDATE cambia (onupdate) sin dejar historial
+                ids.add(obj.id)
+    ids.discard(None)
+    return ids
+
+
+def _after_flush(session, _flush_context):
+    ids = _changed_task_ids(session)
+    if ids:
+        sync_tasks(ids, session.connection())
+
+
+def init_resolution(app):
+    """Engancha el listener y, si la tabla quedó vacía (recién creada), la llena.
+
+    Con varios procesos arrancando a la vez todos pueden verla vacía: el que
+    pierde la carrera choca con la clave primaria, descarta lo suyo y sigue
+    (la tabla ya la llenó otro; `flask resolution-rebuild` la rehace a mano).
+    """
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+    with app.app_context():
+        try:
+            empty = db.session.execute(db.select(TaskResolution.task_id).limit(1)).first() is None
+            if empty and db.session.execute(_source().limit(1)).first() is not None:
+                app.logger.info("[resolution] tabla vacía, se reconstruye (%s tareas)", rebuild())
+        except DBAPIError as e:
+            db.session.rollback()
+            app.logger.warning("[resolution] carga inicial omitida (la hizo otro proceso?): %s", e)
+        finally:
+            db.session.remove()
+
+
+# --- Consultas ---
+
+DIMENSIONS = {
+    "priority": ("Prioridad", lambda: TaskResolution.priority),
+    "pc": ("PC", lambda: PC.name),
+    "location": ("Ubicación", lambda: PC.location),
+    "month": ("Mes", lambda: TaskResolution.month),
+}
+
+
+def _percentile(counts, total, p):
+    """Percentil por rango más cercano sobre [(días, cantidad)] ordenado."""
+    rank = max(1, -(-total * p // 100))  # ceil(total * p / 100)
+    seen = 0
+    for days, n in counts:
+        seen += n
+        if seen >= rank:
+            return days
+    return counts[-1][0]
+
+
+def _bucket(days):
+    i = 0
+    while i + 1 < len(BUCKETS) and days >= BUCKETS[i + 1]:
+        i += 1
+    return i
+
+
+def _summarize(key, counts):
+    total = sum(n for _d, n in counts)
+    hist = [0] * len(BUCKETS)
+    for days, n in counts:
+        hist[_bucket(days)] += n
+    p50, p90, p99 = (_percentile(counts, total, p) for p in PERCENTILES)
+    mean = sum(d * n for d, n in counts) / total
+    return Distribution(key, total, mean, p50, p90, p99, hist)
+
+
+def distribution(dim=None, limit=None):
+    """[Distribution] por valor de la dimensión (None = todas las tareas juntas).
+
+    Orden: cronológico para "month"; por cantidad de tareas para las demás.
+    """
+    n = db.func.count().label("n")
+    if dim is None:
+        key = db.literal(EMPTY)
+        stmt = db.select(TaskResolution.days, n).group_by(TaskResolution.days)
+    else:
+        key = db.func.coalesce(db.func.nullif(DIMENSIONS[dim][1](), ""), EMPTY)
+        stmt = db.select(key.label("k"), TaskResolution.days, n).group_by(key, TaskResolution.days)
+        if dim in ("pc", "location"):
+            stmt = stmt.select_from(TaskResolution).outerjoin(PC, PC.id == TaskResolution.pc_id)
+    stmt = stmt.order_by(*([key] if dim is not None else []), TaskResolution.days)
+
+    groups = {}
+    for row in db.session.execute(stmt):
+        k = row.k if dim is not None else EMPTY
+        groups.setdefault(k, []).append((row.days, row.n))
+    out = [_summarize(k, counts) for k, counts in groups.items()]
+    if dim != "month":
+        out.sort(key=lambda d: (-d.n, str(d.key)))
+    return out[:limit] if limit else out
+
+
+def overall():
+    rows = distribution()
+    return rows[0] if rows else None
+
+
+EXPORT_HEADERS = ["Dimensión", "Valor", "Tareas", "Promedio (días)", "p50", "p90", "p99"] + list(BUCKET_LABELS)
+
+
+def export_rows(dims=None):
+    """Filas planas (una por dimensión y valor) para CSV/XLSX."""
+    for dim in dims or DIMENSIONS:
+        label = DIMENSIONS[dim][0]
+        for d in distribution(dim):
+            yield [label, d.key, d.n, round(d.mean, 2), d.p50, d.p90, d.p99] + d.histogram
@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from datetime import datetime
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from . import db
 from .models import PC, Maintenance, Backup, Alert, ChangeLog, Config
-from .utils import compute_status
+from .utils import compute_status, status_from_last, pc_created_dates_map, _to_date
+from .projections import PC_LIST, PC_STATUS, stream_page
+from .pagination import paginate
+from .pc_index import LOOKUP_LIMIT, get_index
 
 bp = Blueprint("main", __name__)
 
@@ -22,28 +26,42 @@ def index():
     cfg = Config.query.get(1)
     maint_days = cfg.maintenance_days if cfg else 7
     filt = request.args.get("f", "todos")
-    pcs = PC.query.order_by(PC.name.asc()).all()
+    pcs = PC_STATUS.iter(PC_STATUS.select().order_by(PC.name.asc()))
+    created = pc_created_dates_map()
+    def status_of(pc):
+        return status_from_last(_to_date(pc.last_maintenance), maint_days, created.get(pc.id))
     def matches(pc):
-        st = compute_status(pc, maint_days)
+        st = status_of(pc)
         if filt == "todos": return True
         if filt == "ok": return "OK" in st
         if filt == "por_vencer": return "POR VENCER" in st
         if filt == "alerta": return "ALERTA" in st or "SIN MANTENIMIENTO" in st
         if filt == "sin_mantenimiento": return "SIN MANTENIMIENTO" in st
         return True
-    filtered = [pc for pc in pcs if matches(pc)]
-    return render_template("index.html", pcs=filtered, compute_status=lambda pc: compute_status(pc, maint_days), filt=filt)
+    filtered = (pc for pc in pcs if matches(pc))
+    return stream_page("index.html", pcs=filtered, compute_status=status_of, filt=filt)
 
 @bp.route("/pcs")
 @login_required
 def pcs_list():
     q = request.args.get("q", "").strip()
-    query = PC.query
+    query = PC_LIST.select()
     if q:
         like = f"%{q}%"
-        query = query.filter((PC.name.ilike(like)) | (PC.pc_username.ilike(like)) | (PC.physical_user.ilike(like)))
-    pcs = query.order_by(PC.name.asc()).all()
-    return render_template("pcs.html", pcs=pcs, q=q)
+        query = query.where((PC.name.ilike(like)) | (PC.pc_username.ilike(like)) | (PC.physical_user.ilike(like)))
+    page = paginate(query, [("name", PC.name), ("id", PC.id)], PC_LIST.all, desc=False)
+    return stream_page("pcs.html", pcs=page.rows, page=page, q=q)
+
+@bp.route("/pcs/lookup")
+@login_required
+def pcs_lookup():
+    """Autocompletado: [{id, name, location}] de las PCs que empiezan con ?q= (índice en memoria)."""
+    try:
+        limit = min(max(int(request.args.get("limit", LOOKUP_LIMIT)), 1), 100)
+    except ValueError:
+        limit = LOOKUP_LIMIT
+    hits = get_index().search(request.args.get("q", ""), limit)
+    return jsonify([e._asdict() for e in hits])
 
 @bp.route("/pcs/new", methods=["GET","POST"])
 @login_required
@@ -225,8 +243,10 @@ def backup_delete(b_id):
 @bp.route("/alerts")
 @login_required
 def alerts_list():
-    alerts = Alert.query.order_by(Alert.created_at.desc()).all()
-    return render_template("alerts.html", alerts=alerts)
+    page = paginate(db.select(Alert).options(joinedload(Alert.pc)),
+                    [("created_at", Alert.created_at), ("id", Alert.id)],
+                    lambda stmt: db.session.scalars(stmt).all())
+    return render_template("alerts.html", alerts=page.rows, page=page)
 
 @bp.route("/alerts/<int:alert_id>/resolve", methods=["POST"])
 @login_required
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required
+from sqlalchemy.orm import joinedload
 from .models import Alert
 from . import db
 
@@ -8,7 +9,7 @@ bp_alerts = Blueprint("alerts_bp", __name__)
 @bp_alerts.route("/alerts")
 @login_required
 def alerts_list():
-    alerts = Alert.query.order_by(Alert.created_at.desc()).all()
+    alerts = Alert.query.options(joinedload(Alert.pc)).order_by(Alert.created_at.desc()).all()
     return render_template("alerts.html", alerts=alerts)
 
 @bp_alerts.route("/alerts/<int:alert_id>/resolve", methods=["POST"])
@@ -0,0 +1,211 @@
+# app/scheduled_reports.py
+"""Reportes programados: definiciones en DB (reporte, filtros, destinatarios y
+cron) que el scheduler genera fuera de horario pico.
+
+Cada ejecución usa las mismas exportaciones que los trabajos en segundo plano
+(export_jobs), deja el artefacto guardado y lo manda por correo con
+`_send_email` (adjunto o enlace). Mientras los datos no cambien, las rutas del
+reporte sirven ese archivo ya generado en lugar de volver a armarlo.
+"""
+import json
+from datetime import datetime
+from apscheduler.triggers.cron import CronTrigger
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from flask_login import login_required, current_user
+
+from . import db, scheduler
+from .jobs import submit
+from .models import ScheduledReport
+
+bp = Blueprint("schedules", __name__, template_folder="templates")
+
+JOB_PREFIX = "scheduled_report_"
+
+
+def _trigger(report, tz):
+    return CronTrigger.from_crontab(report.cron, timezone=tz)
+
+
+def _run_in_app(app, report_id):
+    with app.app_context():
+        try:
+            run_scheduled_report(report_id)
+        finally:
+            db.session.remove()
+
+
+def sync_scheduled_reports(app):
+    """Deja en el scheduler un job por cada reporte habilitado (y quita los demás)."""
+    with app.app_context():
+        reports = ScheduledReport.query.filter_by(enabled=True).all()
+        wanted = set()
+        for r in reports:
+            try:
+                trigger = _trigger(r, app.config["APP_TZ"])
+            except ValueError as e:
+                app.logger.warning("[schedules] cron inválido en reporte %s: %s", r.id, e)
+                continue
+            job_id = f"{JOB_PREFIX}{r.id}"
+            wanted.add(job_id)
+            scheduler.add_job(_run_in_app, trigger, args=[app, r.id], id=job_id,
+                              replace_existing=True, misfire_grace_time=3600, coalesce=True)
+    for job in scheduler.get_jobs():
+        if job.id.startswith(JOB_PREFIX) and job.id not in wanted:
+            job.remove()
+
+
+def _recipients(report):
+    return ", ".join(x.strip() for x in (report.recipients or "").replace(";", ",").split(",") if x.strip()) or None
+
+
+def run_scheduled_report(report_id):
+    """Genera el artefacto del reporte y lo envía. Necesita app context."""
+    from .export_jobs import render_export_now, _kinds
+
+    report = db.session.get(ScheduledReport, report_id)
+    if report is None:
+        return
+    title = _kinds().get(report.kind, (report.kind,))[0]
+    try:
+        job = render_export_now(report.kind, json.loads(report.params or "{}"),
+                                username=f"programado:{report.id}")
+        if job.status != "listo":
+            raise RuntimeError(job.error or "la exportación no se generó")
+
+        cfg = current_app.config
+        subject = f"[Reporte programado] {report.name}"
+        body = [f"{title} generado el {datetime.now():%Y-%m-%d %H:%M}."]
+        attachments = None
+        if report.attach and (job.size or 0) <= int(cfg.get("REPORT_ATTACH_MAX_BYTES", 10 * 1024 * 1024)):
+            with open(job.path, "rb") as fh:
+                attachments = [(job.filename, job.mimetype, fh.read())]
+            body.append("Se adjunta el archivo.")
+        else:
+            # fuera de un request: se arma la ruta con el mapa de URLs
+            path = current_app.url_map.bind("localhost").build("jobs.download", {"job_id": job.id})
+            base = (cfg.get("EXTERNAL_BASE_URL") or "").rstrip("/")
+            body.append(f"Descarga: {base}{path}" if base else f"Disponible en la aplicación: {path}")
+        ok = current_app._send_email(subject, "\n".join(body), to_override=_recipients(report),
+                                     attachments=attachments)
+        report.last_job_id = job.id
+        report.last_status = "ok" if ok else "error"
+        report.last_error = None if ok else "No se pudo enviar el correo (ver Logs correo)."
+    except Exception as e:
+        db.session.rollback()
+        report = db.session.get(ScheduledReport, report_id)
+        report.last_status = "error"
+        report.last_error = str(e)
+    report.last_run_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _require_admin():
+    return getattr(current_user, "role", "user") == "admin"
+
+
+def _form_to_report(report, f):
+    from .export_jobs import _kinds
+    name = (f.get("name") or "").strip()
+    kind = f.get("kind")
+    cron = " ".join((f.get("cron") or "").split())
+    if not name:
+        raise ValueError("El nombre es obligatorio.")
+    if kind not in _kinds():
+        raise ValueError("Reporte inválido.")
+    try:
+        CronTrigger.from_crontab(cron)
+    except ValueError as e:
+        raise ValueError(f"Cron inválido ({e}). Formato: minuto hora día mes día_semana.")
+    params = {}
+    for key in ("start", "end", "status", "priority", "pc_id", "location"):
+        if (f.get(key) or "").strip():
+            params[key] = f.get(key).strip()
+    if f.get("alerts"):
+        params["alerts"] = "1"
+    report.name = name
+    report.kind = kind
+    report.cron = cron
+    report.params = json.dumps(params, sort_keys=True)
+    report.recipients = (f.get("recipients") or "").strip() or None
+    report.attach = f.get("delivery", "adjunto") == "adjunto"
+    report.enabled = bool(f.get("enabled"))
+
+
+def _resync():
+    if scheduler.running:
+        sync_scheduled_reports(current_app._get_current_object())
+
+# rutas (solo admin)
+
+@bp.route("/")
+@login_required
+def list_reports():
+    if not _require_admin():
+        flash("Solo admin puede ver reportes programados.", "error")
+        return redirect(url_for("main.index"))
+    from .export_jobs import _kinds
+    reports = ScheduledReport.query.order_by(ScheduledReport.name.asc()).all()
+    titles = {k: v[0] for k, v in _kinds().items()}
+    return render_template("scheduled_reports.html", reports=reports, titles=titles)
+
+
+@bp.route("/new", methods=["GET", "POST"])
+@bp.route("/<int:report_id>/edit", methods=["GET", "POST"])
+@login_required
+def edit_report(report_id=None):
+    if not _require_admin():
+        flash("Solo admin puede editar reportes programados.", "error")
+        return redirect(url_for("main.index"))
+    from .export_jobs import export_kinds
+    report = db.session.get(ScheduledReport, report_id) if report_id else None
+    if report_id and report is None:
+        flash("Reporte programado inexistente.", "error")
+        return redirect(url_for("schedules.list_reports"))
+    if request.method == "POST":
+        target = report or ScheduledReport(created_by=getattr(current_user, "username", None))
+        try:
+            _form_to_report(target, request.form)
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), "error")
+            return render_template("scheduled_report_form.html", report=report, form=request.form,
+                                   kinds=export_kinds())
+        if report is None:
+            db.session.add(target)
+        db.session.commit()
+        _resync()
+        flash("Reporte programado guardado.", "success")
+        return redirect(url_for("schedules.list_reports"))
+    form = {}
+    if report:
+        form = dict(json.loads(report.params or "{}"), name=report.name, kind=report.kind, cron=report.cron,
+                    recipients=report.recipients or "", delivery="adjunto" if report.attach else "enlace",
+                    enabled=report.enabled)
+    return render_template("scheduled_report_form.html", report=report, form=form, kinds=export_kinds())
+
+
+@bp.route("/<int:report_id>/delete", methods=["POST"])
+@login_required
+def delete_report(report_id):
+    if not _require_admin():
+        flash("Solo admin puede borrar reportes programados.", "error")
+        return redirect(url_for("main.index"))
+    report = ScheduledReport.query.get_or_404(report_id)
+    db.session.delete(report)
+    db.session.commit()
+    _resync()
+    flash("Reporte programado eliminado.", "success")
+    return redirect(url_for("schedules.list_reports"))
+
+
+@bp.route("/<int:report_id>/run", methods=["POST"])
+@login_required
+def run_now(report_id):
+    if not _require_admin():
+        flash("Solo admin puede ejecutar reportes programados.", "error")
+        return redirect(url_for("main.index"))
+    ScheduledReport.query.get_or_404(report_id)
+    submit("exports", run_scheduled_report, report_id,
+           workers=current_app.config.get("EXPORT_JOB_WORKERS", 2))
+    flash("Reporte en ejecución: el resultado queda en 'Última ejecución'.", "success")
+    return redirect(url_for("schedules.list_reports"))
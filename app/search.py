@@ -0,0 +1,150 @@
+# app/search.py
+"""Búsqueda de texto completo en tareas (título, problema, solución, comentarios).
+
+- SQLite: tabla virtual FTS5 `task_fts` (contenido externo sobre `task`) con
+  tokenizer unicode61 sin diacríticos; triggers la mantienen al día en altas,
+  cambios y bajas, incluidas las importaciones masivas (que pasan por INSERT).
+- PostgreSQL: índice GIN sobre to_tsvector('spanish', unaccent(...)); al ser un
+  índice de expresión no necesita triggers.
+- Otros motores (o SQLite sin FTS5): se sigue usando ILIKE.
+
+`search_select(text)` devuelve el SELECT del listado de tareas filtrado por la
+búsqueda, con un fragmento resaltado (`snippet`), y las claves para paginarlo
+por relevancia (ver pagination.py).
+"""
+import re
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from . import db
+from .models import PC, Task
+from .projections import TASK_LIST
+
+# marcas del resaltado: se escapan los datos y recién después se pasan a <mark>
+MARK_START, MARK_END = "\x02", "\x03"
+
+TASK_SEARCH = TASK_LIST.extend("TaskSearchRow", snippet=db.literal_column("''"), rank=db.literal_column("0"))
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5("
+    "title, problem, solution, comments, content='task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_ai AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, problem, solution, comments) "
+    "VALUES (new.id, new.title, new.problem, new.solution, new.comments); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_ad AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, problem, solution, comments) "
+    "VALUES ('delete', old.id, old.title, old.problem, old.solution, old.comments); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_au AFTER UPDATE OF title, problem, solution, comments ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, problem, solution, comments) "
+    "VALUES ('delete', old.id, old.title, old.problem, old.solution, old.comments); "
+    "INSERT INTO task_fts(rowid, title, problem, solution, comments) "
+    "VALUES (new.id, new.title, new.problem, new.solution, new.comments); END",
+)
+
+# unaccent no es IMMUTABLE: se envuelve para poder usarlo en un índice
+_PG_TEXT = ("coalesce(title, '') || ' ' || coalesce(problem, '') || ' ' || "
+            "coalesce(solution, '') || ' ' || coalesce(comments, '')")
+_PG_DOCUMENT = f"f_unaccent({_PG_TEXT})"
+_PG_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent', $1) $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+    f"CREATE INDEX IF NOT EXISTS ix_task_fts ON task USING GIN (to_tsvector('spanish', {_PG_DOCUMENT}))",
+)
+
+
+def _backend():
+    return current_app.extensions.get("task_search")
+
+
+def _terms(q):
+    return re.findall(r"\w+", q or "", flags=re.UNICODE)[:12]
+
+
+def _create_sqlite():
+    conn = db.session.connection()
+    exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'task_fts'")).first()
+    for ddl in _SQLITE_DDL:
+        conn.execute(text(ddl))
+    if not exists:
+        conn.execute(text("INSERT INTO task_fts(task_fts) VALUES ('rebuild')"))
+
+
+def _create_postgres():
+    conn = db.session.connection()
+    for ddl in _PG_DDL:
+        conn.execute(text(ddl))
+
+
+def init_search(app):
+    """Crea el índice si hace falta y deja el motor en app.extensions["task_search"]."""
+    backend = None
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        try:
+            if dialect == "sqlite":
+                _create_sqlite()
+                backend = "fts5"
+            elif dialect == "postgresql":
+                _create_postgres()
+                backend = "pg"
+            db.session.commit()
+        except DBAPIError as e:
+            db.session.rollback()
+            app.logger.warning("[search] sin índice de texto completo (%s), se usa ILIKE: %s", dialect, e)
+            backend = None
+    app.extensions["task_search"] = backend
+
+    @app.template_filter("highlight")
+    def _highlight(value):
+        if not value:
+            return ""
+        return Markup(str(escape(value)).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+
+def rebuild_index():
+    backend = _backend()
+    if backend == "fts5":
+        db.session.execute(text("INSERT INTO task_fts(task_fts) VALUES ('rebuild')"))
+        db.session.execute(text("INSERT INTO task_fts(task_fts) VALUES ('optimize')"))
+    elif backend == "pg":
+        db.session.execute(text("REINDEX INDEX ix_task_fts"))
+    db.session.commit()
+    return backend
+
+
+def search_select(q):
+    """(stmt, keys, desc) del listado con la búsqueda aplicada (filas TASK_SEARCH),
+    o None si no hay términos. Cada palabra se busca como prefijo y deben aparecer todas.
+    """
+    terms = _terms(q)
+    if not terms:
+        return None
+    backend = _backend()
+    if backend == "fts5":
+        match = " ".join(f'"{t}"*' for t in terms)
+        snippet = db.literal_column(f"snippet(task_fts, -1, '{MARK_START}', '{MARK_END}', '…', 12)")
+        rank = db.literal_column("bm25(task_fts, 10.0, 4.0, 4.0, 1.0)")  # menor = más relevante
+        fts = db.table("task_fts", db.column("rowid"))
+        stmt = (TASK_SEARCH.select(snippet=snippet, rank=rank)
+                .select_from(Task).join(fts, fts.c.rowid == Task.id).outerjoin(PC, PC.id == Task.pc_id)
+                .where(db.literal_column("task_fts").op("MATCH")(match)))
+        return stmt, [("rank", rank), ("id", Task.id)], False
+    if backend == "pg":
+        query = db.func.to_tsquery("spanish", db.func.f_unaccent(" & ".join(f"{t}:*" for t in terms)))
+        vector = db.func.to_tsvector("spanish", db.literal_column(_PG_DOCUMENT))
+        snippet = db.func.ts_headline("spanish", db.literal_column(_PG_TEXT), query,
+                                      f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=24, MinWords=8")
+        rank = db.func.ts_rank(vector, query)
+        stmt = (TASK_SEARCH.select(snippet=snippet, rank=rank).select_from(Task)
+                .outerjoin(PC, PC.id == Task.pc_id).where(vector.op("@@")(query)))
+        return stmt, [("rank", rank), ("id", Task.id)], True
+    stmt = TASK_SEARCH.select().select_from(Task).outerjoin(PC, PC.id == Task.pc_id)
+    for t in terms:
+        like = f"%{t}%"
+        stmt = stmt.where(db.or_(Task.title.ilike(like), Task.problem.ilike(like),
+                                 Task.solution.ilike(like), Task.comments.ilike(like)))
+    return stmt, [("created_at", Task.created_at), ("id", Task.id)], True
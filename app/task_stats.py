@@ -0,0 +1,99 @@
+# app/task_stats.py
+"""Agregados de tareas para el panel y el reporte, calculados en la base.
+
+Cada conteo es un GROUP BY (estado, prioridad, PC, mes) y el promedio de días
+de resolución es un AVG sobre la diferencia de fechas: el panel cuesta unas
+pocas consultas de agregación en lugar de cargar la tabla de tareas.
+
+El mes se agrupa truncando created_at (strftime en SQLite, date_trunc en
+PostgreSQL); en otros motores se agrupa por año y mes con EXTRACT.
+Los estados/prioridades vacíos o NULL se cuentan como "—", como antes.
+"""
+from datetime import datetime
+
+from . import db
+from .models import PC, Task
+
+EMPTY = "—"
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def range_filters(start=None, end=None):
+    """Condiciones del rango por fecha de creación (ambos extremos incluidos)."""
+    out = []
+    if start:
+        out.append(Task.created_at >= datetime.combine(start, datetime.min.time()))
+    if end:
+        out.append(Task.created_at <= datetime.combine(end, datetime.max.time()))
+    return out
+
+
+def _label(col):
+    return db.func.coalesce(db.func.nullif(col, ""), EMPTY)
+
+
+def _counts(key, filters, join_pc=False, limit=None):
+    """[(clave, cantidad)] de mayor a menor cantidad."""
+    n = db.func.count(Task.id).label("n")
+    stmt = db.select(key.label("k"), n).select_from(Task)
+    if join_pc:
+        stmt = stmt.outerjoin(PC, PC.id == Task.pc_id)
+    stmt = stmt.where(*filters).group_by(key).order_by(n.desc(), key)
+    if limit:
+        stmt = stmt.limit(limit)
+    return [(k, n) for k, n in db.session.execute(stmt)]
+
+
+def counts_by_status(filters=()):
+    return dict(_counts(_label(Task.status), filters))
+
+
+def counts_by_priority(filters=()):
+    return dict(_counts(_label(Task.priority), filters))
+
+
+def counts_by_pc(filters=(), limit=20):
+    return _counts(db.func.coalesce(PC.name, EMPTY), filters, join_pc=True, limit=limit)
+
+
+def counts_by_month(filters=()):
+    """[("AAAA-MM", cantidad)] en orden cronológico."""
+    dialect = _dialect()
+    if dialect == "sqlite":
+        month = db.func.strftime("%Y-%m", Task.created_at)
+    elif dialect == "postgresql":
+        month = db.func.to_char(db.func.date_trunc("month", Task.created_at), "YYYY-MM")
+    else:
+        year, mon = db.extract("year", Task.created_at), db.extract("month", Task.created_at)
+        stmt = (db.select(year, mon, db.func.count(Task.id)).where(*filters)
+                .group_by(year, mon).order_by(year, mon))
+        return [(f"{int(y)}-{int(m):02d}", n) for y, m, n in db.session.execute(stmt)]
+    stmt = (db.select(month.label("m"), db.func.count(Task.id))
+            .where(Task.created_at.is_not(None), *filters).group_by(month).order_by(month))
+    return [(m, n) for m, n in db.session.execute(stmt)]
+
+
+def _resolve_days():
+    """Días entre inicio (o creación) y fin (o última modificación), mínimo 0."""
+    dialect = _dialect()
+    if dialect == "sqlite":
+        start = db.func.coalesce(Task.start_date, db.func.date(Task.created_at))
+        end = db.func.coalesce(Task.end_date, db.func.date(Task.updated_at))
+        # max() con dos argumentos es el escalar de SQLite
+        return db.func.max(db.func.julianday(end) - db.func.julianday(start), 0)
+    start = db.func.coalesce(Task.start_date, db.cast(Task.created_at, db.Date))
+    end = db.func.coalesce(Task.end_date, db.cast(Task.updated_at, db.Date))
+    if dialect == "postgresql":
+        return db.func.greatest(end - start, 0)
+    days = db.extract("day", end - start)
+    return db.case((days < 0, 0), else_=days)
+
+
+def avg_resolve_days(filters=()):
+    """Promedio de días de resolución de las tareas finalizadas (None si no hay)."""
+    stmt = db.select(db.func.avg(_resolve_days())).where(Task.status == "finalizada", *filters)
+    value = db.session.execute(stmt).scalar()
+    return float(value) if value is not None else None
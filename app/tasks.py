@@ -6,7 +6,11 @@ from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 
 from . import db
-from .models import Task, TaskAttachment, PC, TASK_STATUS_CHOICES, TASK_PRIORITY_CHOICES
+from .models import Task, TaskAttachment, TASK_STATUS_CHOICES, TASK_PRIORITY_CHOICES
+from .projections import TASK_LIST, task_list_select, stream_page
+from .search import TASK_SEARCH, search_select
+from .pagination import paginate
+from .pc_index import get_index
 
 bp = Blueprint("tasks", __name__, template_folder="templates")
 
@@ -33,39 +37,42 @@ def ensure_task_upload_dir():
 @bp.route("/")
 @login_required
 def list_tasks():
-    q = Task.query.order_by(Task.created_at.desc())
-
     status = request.args.get("status", "").strip()
     priority = request.args.get("priority", "").strip()
     pc_id = request.args.get("pc_id", "").strip()
     text = request.args.get("q", "").strip()
 
+    # con texto: índice de texto completo, orden por relevancia (ver search.py)
+    found = search_select(text) if text else None
+    if found is not None:
+        q, keys, desc = found
+        rows = TASK_SEARCH
+    else:
+        q, keys, desc = task_list_select(), [("created_at", Task.created_at), ("id", Task.id)], True
+        rows = TASK_LIST
+
     if status in TASK_STATUS_CHOICES:
-        q = q.filter(Task.status == status)
+        q = q.where(Task.status == status)
     if priority in TASK_PRIORITY_CHOICES:
-        q = q.filter(Task.priority == priority)
+        q = q.where(Task.priority == priority)
     if pc_id.isdigit():
-        q = q.filter(Task.pc_id == int(pc_id))
-    if text:
-        like = f"%{text}%"
-        q = q.filter(db.or_(Task.title.ilike(like), Task.problem.ilike(like), Task.solution.ilike(like), Task.comments.ilike(like)))
+        q = q.where(Task.pc_id == int(pc_id))
 
-    pcs = PC.query.order_by(PC.name.asc()).all()
-    return render_template("tasks_list.html", tasks=q.all(), pcs=pcs,
-                           status=status, priority=priority, sel_pc=pc_id, text=text)
+    page = paginate(q, keys, rows.all, desc=desc)
+    return stream_page("tasks_list.html", tasks=page.rows, page=page,
+                       sel_pc_entry=get_index().get(pc_id) if pc_id.isdigit() else None,
+                       status=status, priority=priority, sel_pc=pc_id, text=text)
 
 # --------- CREAR ---------
 @bp.route("/new", methods=["GET", "POST"])
 @login_required
 def new_task():
-    pcs = PC.query.order_by(PC.name.asc()).all()
-
     if request.method == "POST":
         title = (request.form.get("title") or "").strip()
         problem = (request.form.get("problem") or "").strip()
         if not title or not problem:
             flash("Título y problema son obligatorios.", "error")
-            return render_template("task_form.html", task=None, pcs=pcs)
+            return render_template("task_form.html", task=None, sel_pc=get_index().get(request.form.get("pc_id")))
 
         task = Task(
             title=title,
@@ -108,14 +115,13 @@ def new_task():
         flash("Tarea creada.", "success")
         return redirect(url_for("tasks.view_task", task_id=task.id))
 
-    return render_template("task_form.html", task=None, pcs=pcs)
+    return render_template("task_form.html", task=None, sel_pc=None)
 
 # --------- EDITAR ---------
 @bp.route("/<int:task_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_task(task_id):
     task = Task.query.get_or_404(task_id)
-    pcs = PC.query.order_by(PC.name.asc()).all()
 
     if request.method == "POST":
         task.title = (request.form.get("title") or "").strip() or task.title
@@ -158,7 +164,7 @@ def edit_task(task_id):
         flash("Tarea actualizada.", "success")
         return redirect(url_for("tasks.view_task", task_id=task.id))
 
-    return render_template("task_form.html", task=task, pcs=pcs)
+    return render_template("task_form.html", task=task, sel_pc=get_index().get(task.pc_id))
 
 # --------- VER DETALLE ---------
 @bp.route("/<int:task_id>")
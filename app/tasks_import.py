@@ -1,11 +1,9 @@
 
-import io, csv, unicodedata
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_file
-from flask_login import login_required
-from .models import Task
-from . import db
+import io, os, csv, unicodedata
+from typing import List, Dict, Any, Iterator, Optional
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_file, abort, jsonify
+from flask_login import login_required, current_user
+from .models import ImportJob
 
 bp = Blueprint("tasksimp", __name__, template_folder="templates", url_prefix="/tasks")
 
@@ -16,22 +14,6 @@ def _norm(s: Optional[str]) -> str:
     s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
     return s.lower()
 
-def _parse_date(val: Any) -> Optional[datetime.date]:
-    if val is None: return None
-    s = str(val).strip()
-    if not s: return None
-    if isinstance(val, datetime):
-        return val.date()
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y"):
-        try:
-            return datetime.strptime(s, fmt).date()
-        except Exception:
-            pass
-    try:
-        return datetime.fromisoformat(s).date()
-    except Exception:
-        return None
-
 _HEADERS = {
     "title":      ["titulo","título","title","asunto","nombre"],
     "start_date": ["fecha_inicio","fecha de inicio","inicio","start","start_date"],
@@ -42,8 +24,8 @@ _HEADERS = {
     "problem":    ["problema","problem"],             # si no viene, se rellena con comentarios/título
     "solution":   ["solucion","solución","solution"], # opcional
     # (opcional para asociar PC)
-    # "pc_id":   ["pc_id","id_pc"],
-    # "pc_name": ["pc","pcname","pc_name","equipo"],
+    "pc_id":   ["pc_id","id_pc"],
+    "pc_name": ["pc","pcname","pc_name","equipo"],
 }
 
 
@@ -63,8 +45,8 @@ def _normalize_status(s: str) -> str:
     if n in ("pendiente","pending","todo"):
         return "pendiente"
     if n in ("en progreso","en_progreso","in progress","doing","progreso"):
-        return "en progreso"
-    if n in ("finalizada","final","done","completed","completado","cerrado","hecho"):
+        return "en_progreso"
+    if n in ("finalizada","finalizado","final","done","completed","completado","cerrado","hecho"):
         return "finalizada"
     return s
 
@@ -77,34 +59,53 @@ def _normalize_priority(s: str) -> str:
     if n in ("alta","high","urgente","urgent"): return "alta"
     return s
 
-def _set_if_has(obj, field_name, value):
-    if hasattr(obj, field_name):
-        setattr(obj, field_name, value)
-
-def _read_xlsx(file_storage) -> List[Dict[str, Any]]:
+def _read_xlsx(tmp) -> Iterator[Dict[str, Any]]:
+    """Abre el libro ya (los errores de formato saltan acá) y devuelve un generador de filas.
+    `tmp` es un archivo binario con posicionamiento; se cierra al terminar."""
     try:
         from openpyxl import load_workbook
     except Exception:
+        tmp.close()
         raise RuntimeError("Para .xlsx instalá: pip install openpyxl")
-    f = io.BytesIO(file_storage.read())
-    wb = load_workbook(f, read_only=True, data_only=True)
-    ws = wb.active
-    rows = list(ws.rows)
-    if not rows:
-        return []
-    headers = [ (c.value or "").strip() if isinstance(c.value, str) else (c.value or "") for c in rows[0] ]
-    out = []
-    for r in rows[1:]:
-        rec = {}
-        for i, c in enumerate(r):
-            key = headers[i] if i < len(headers) else f"col{i}"
-            rec[key] = c.value
-        out.append(rec)
-    return out
+    try:
+        wb = load_workbook(tmp, read_only=True, data_only=True)
+    except Exception:
+        tmp.close()
+        raise
 
-def _read_csv(file_storage) -> List[Dict[str, Any]]:
-    text = file_storage.read().decode("utf-8", errors="ignore")
-    return list(csv.DictReader(io.StringIO(text)))
+    def rows():
+        try:
+            it = wb.active.iter_rows(values_only=True)
+            first = next(it, None)
+            if first is None:
+                return
+            headers = [(v or "").strip() if isinstance(v, str) else (v or "") for v in first]
+            for values in it:
+                if all(v is None for v in values):
+                    continue
+                yield {headers[i] if i < len(headers) else f"col{i}": v for i, v in enumerate(values)}
+        finally:
+            wb.close()
+            tmp.close()
+    return rows()
+
+def _read_csv(tmp) -> Iterator[Dict[str, Any]]:
+    """Generador de filas; el texto se decodifica de a bloques."""
+    text = io.TextIOWrapper(tmp, encoding="utf-8-sig", errors="ignore", newline="")
+
+    def rows():
+        try:
+            yield from csv.DictReader(text)
+        finally:
+            text.close()
+    return rows()
+
+def read_rows(path, filename):
+    """Filas (dicts) del archivo subido, según la extensión del nombre original."""
+    fh = open(path, "rb")
+    if filename.lower().endswith(".xlsx"):
+        return _read_xlsx(fh)
+    return _read_csv(fh)
 
 # rutas
 
@@ -141,113 +142,41 @@ def import_run():
         flash("Subí un archivo .xlsx o .csv", "warning")
         return redirect(url_for("tasksimp.import_form"))
 
-    fn = file.filename.lower()
+    from .import_engine import enqueue_import, import_status
     try:
-        if fn.endswith(".xlsx"):
-            rows = _read_xlsx(file)
-        else:
-            rows = _read_csv(file)
+        job = enqueue_import(file, username=getattr(current_user, "username", None))
     except Exception as e:
-        flash(f"Error leyendo archivo: {e}", "danger")
+        flash(f"Error guardando el archivo: {e}", "danger")
         return redirect(url_for("tasksimp.import_form"))
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(import_status(job)), 202
+    return redirect(url_for("tasksimp.import_job", job_id=job.id))
 
-    if not rows:
-        flash("El archivo no tiene filas.", "warning")
-        return redirect(url_for("tasksimp.import_form"))
 
-    headers = list(rows[0].keys())
-    hmap = _match_header_map(headers)
+@bp.route("/import/jobs/<job_id>", methods=["GET"])
+@login_required
+def import_job(job_id):
+    from .import_engine import import_status, recover_stale
+    recover_stale()
+    job = ImportJob.query.get_or_404(job_id)
+    return render_template("tasks_import_job.html", job=job, info=import_status(job))
 
-    inserted = 0
-    errors = 0
 
-    for r in rows:
-        try:
-            t = Task()
-
-            # ---- título ----
-            title = r.get(hmap.get("title",""), "") if "title" in hmap else (r.get("title") or r.get("titulo") or "")
-            title = (str(title).strip() if title is not None else "")
-            if hasattr(Task, "title"):
-                t.title = title
-            elif hasattr(Task, "name"):
-                t.name = title
-
-            # ---- fechas ----
-            start = _parse_date(r.get(hmap.get("start_date","")))
-            end   = _parse_date(r.get(hmap.get("end_date","")))
-            if hasattr(Task, "start_date"):
-                t.start_date = start
-            if hasattr(Task, "end_date"):
-                t.end_date = end
-
-            # ---- estado ----
-            status = r.get(hmap.get("status",""), "")
-            status = _normalize_status(status)
-            _set_if_has(t, "status", status or "pendiente")
-
-            # ---- prioridad ----
-            prio = r.get(hmap.get("priority",""), "")
-            prio = _normalize_priority(prio)
-            _set_if_has(t, "priority", prio or "media")
-
-            # ---- comentarios / descripción ----
-            comments = r.get(hmap.get("comments",""), "")
-            comments = "" if comments is None else str(comments)
-            if hasattr(Task, "comments"):
-                t.comments = comments
-            elif hasattr(Task, "description"):
-                t.description = comments
-
-            # ---- problema / solución (problem es NOT NULL) ----
-            prob = r.get(hmap.get("problem",""), "")
-            sol  = r.get(hmap.get("solution",""), "")
-            prob = "" if prob is None else str(prob).strip()
-            sol  = "" if  sol is None else str(sol).strip()
-
-            # Fallback fuerte: NUNCA None
-            problem_value = prob or (comments.strip() if comments else "") or (title if title else "N/A")
-            # set explícito (sin hasattr): sabemos que existe porque falla el NOT NULL
-            try:
-                t.problem = problem_value
-            except Exception:
-                # por si el modelo usa otro nombre, último fallback
-                setattr(t, "problem", problem_value)
-
-            if hasattr(Task, "solution"):
-                t.solution = sol
-
-            # ---- (Opcional) asociar PC por id o nombre) ----
-            # from .models import PC
-            # if "pc_id" in hmap:
-            #     pcv = r.get(hmap["pc_id"])
-            #     if pcv and hasattr(Task, "pc_id"):
-            #         try: t.pc_id = int(pcv)
-            #         except: pass
-            # elif "pc_name" in hmap:
-            #     name = str(r.get(hmap["pc_name"], "") or "").strip()
-            #     if name:
-            #         pc = PC.query.filter(PC.name.ilike(name)).first()
-            #         if pc and hasattr(Task, "pc_id"):
-            #             t.pc_id = pc.id
-
-            db.session.add(t)
-            db.session.flush()   # <--- valida esta fila ya mismo
-            inserted += 1
-
-        except Exception:
-            errors += 1
-            db.session.rollback()
-            continue
-
-    try:
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        flash(f"Error al confirmar cambios: {e}", "danger")
-        return redirect(url_for("tasksimp.import_form"))
+@bp.route("/import/jobs/<job_id>/status", methods=["GET"])
+@login_required
+def import_job_status(job_id):
+    from .import_engine import import_status, recover_stale
+    recover_stale()
+    return jsonify(import_status(ImportJob.query.get_or_404(job_id)))
 
-    flash(f"Importación finalizada: {inserted} tareas creadas, {errors} con error.", "success")
-    dest = "main.tasks_list" if "main.tasks_list" in current_app.view_functions else "main.index"
-    return redirect(url_for(dest))
 
+@bp.route("/import/errors/<token>.csv", methods=["GET"])
+@login_required
+def import_errors(token):
+    from .import_engine import error_report_path
+    if not token.isalnum():
+        abort(404)
+    path = error_report_path(token)
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype="text/csv", as_attachment=True, download_name="errores_importacion.csv")
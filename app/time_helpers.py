@@ -9,15 +9,23 @@ def app_tz():
 def now_local():
     return datetime.now(app_tz())
 
+def local_converter():
+    """Función dt -> hora local con la zona y el criterio para fechas ingenuas
+    resueltos una sola vez (para convertir muchas fechas seguidas)."""
+    tz = app_tz()
+    naive_as = (current_app.config.get("NAIVE_AS") or "UTC").upper()
+    # << clave: tratamos ingenuos como UTC por defecto >>
+    naive_tz = ZoneInfo("UTC") if naive_as == "UTC" else tz
+
+    def convert(dt):
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=naive_tz)
+        return dt.astimezone(tz)
+    return convert
+
 def to_local(dt):
     if dt is None:
         return None
-    tz = app_tz()
-    naive_as = (current_app.config.get("NAIVE_AS") or "UTC").upper()
-    if dt.tzinfo is None:
-        # << clave: tratamos ingenuos como UTC por defecto >>
-        if naive_as == "UTC":
-            dt = dt.replace(tzinfo=ZoneInfo("UTC"))
-        else:
-            dt = dt.replace(tzinfo=tz)
-    return dt.astimezone(tz)
+    return local_converter()(dt)
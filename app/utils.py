@@ -38,12 +38,54 @@ def pc_created_date(pc):
     if candidates:
         return min(candidates)
     return date.today() - timedelta(days=365)
+
+def _to_date(v):
+    if v is None: return None
+    if isinstance(v, datetime): return v.date()
+    if isinstance(v, date): return v
+    try: return datetime.fromisoformat(str(v)).date()
+    except ValueError: return None
+
+def pc_created_dates_map():
+    """{pc_id: fecha de alta} para todas las PCs, con la misma lógica que
+    pc_created_date pero en tres consultas agrupadas en lugar de tres por PC."""
+    from . import db
+    from .models import PC, ChangeLog, Maintenance, Backup
+
+    created = dict(db.session.query(ChangeLog.entity_id, db.func.min(ChangeLog.created_at))
+                   .filter(ChangeLog.entity == "PC", ChangeLog.action == "create")
+                   .group_by(ChangeLog.entity_id).all())
+    first_m = dict(db.session.query(Maintenance.pc_id, db.func.min(Maintenance.date_performed))
+                   .group_by(Maintenance.pc_id).all())
+    first_b = dict(db.session.query(Backup.pc_id, db.func.min(Backup.date_performed))
+                   .group_by(Backup.pc_id).all())
+    fallback = date.today() - timedelta(days=365)
+    out = {}
+    for (pc_id,) in db.session.query(PC.id).all():
+        d = _to_date(created.get(pc_id))
+        if d is None:
+            candidates = [x for x in (_to_date(first_m.get(pc_id)), _to_date(first_b.get(pc_id))) if x]
+            d = min(candidates) if candidates else fallback
+        out[pc_id] = d
+    return out
+
+def pc_last_dates_map():
+    """{pc_id: (fecha último mantenimiento, fecha último backup)} con dos GROUP BY."""
+    from . import db
+    from .models import Maintenance, Backup
+
+    last_m = dict(db.session.query(Maintenance.pc_id, db.func.max(Maintenance.date_performed))
+                  .group_by(Maintenance.pc_id).all())
+    last_b = dict(db.session.query(Backup.pc_id, db.func.max(Backup.date_performed))
+                  .group_by(Backup.pc_id).all())
+    return {pc_id: (_to_date(last_m.get(pc_id)), _to_date(last_b.get(pc_id)))
+            for pc_id in set(last_m) | set(last_b)}
+
 ## utils.py — compute_status
-def compute_status(pc, maint_days=7):
+def status_from_last(last, maint_days=7, start=None):
+    """Estado a partir de la fecha del último mantenimiento (o de alta si no hay)."""
     today = datetime.now().date()
-    last = pc.last_maintenance_date()
     if last is None:
-        start = pc_created_date(pc)
         delta = (today - start).days
         if delta > maint_days:
             return f"SIN MANTENIMIENTO (ALERTA, {delta} días)"
@@ -59,38 +101,60 @@ def compute_status(pc, maint_days=7):
     else:
         return f"OK ({delta} días)"
 
-def pcs_to_workbook(pcs, maint_days=7):
+def compute_status(pc, maint_days=7, created_date=None):
+    last = pc.last_maintenance_date()
+    if last is None:
+        return status_from_last(None, maint_days, created_date or pc_created_date(pc))
+    return status_from_last(last, maint_days)
+
+def pcs_to_workbook(pcs, maint_days=7, created_dates=None):
+    created_dates = created_dates or {}
     wb = Workbook(); ws = wb.active; ws.title = "PCs"
     ws.append(["PC","Usuario PC","Usuario físico","TeamViewer","AnyDesk","Windows legal","Office legal","Ubicación","Último mant.","Estado"])
     for pc in pcs:
-        last = pc.last_maintenance().date_performed.strftime("%Y-%m-%d %H:%M") if pc.last_maintenance() else "—"
+        last_m = pc.last_maintenance()
+        last = last_m.date_performed.strftime("%Y-%m-%d %H:%M") if last_m else "—"
         ws.append([pc.name, pc.pc_username or "", pc.physical_user or "", pc.teamviewer_id or "", pc.anydesk_id or "",
                    "Sí" if pc.windows_licensed else "No", "Sí" if pc.office_licensed else "No",
-                   pc.location or "", last, compute_status(pc, maint_days)])
+                   pc.location or "", last, compute_status(pc, maint_days, created_dates.get(pc.id))])
     return wb
 
-def activity_to_workbook(maintenances, backups):
-    wb = Workbook()
-    ws1 = wb.active; ws1.title = "Mantenimientos"
+def activity_to_workbook(rows):
+    """Excel de actividad a partir del stream de activity.iter_activity (una hoja por tipo).
+    Write-only: las filas se vuelcan a medida que llegan, sin retener el stream."""
+    wb = Workbook(write_only=True)
+    ws1 = wb.create_sheet("Mantenimientos")
     ws1.append(["PC","Fecha","Técnico","Detalle"])
-    for m in maintenances:
-        ws1.append([m.pc.name, m.date_performed.strftime("%Y-%m-%d %H:%M"), m.performed_by or "", m.description or ""])
     ws2 = wb.create_sheet("Backups")
     ws2.append(["PC","Fecha","Estado","Tamaño (MB)","Ruta"])
-    for b in backups:
-        ws2.append([b.pc.name, b.date_performed.strftime("%Y-%m-%d %H:%M"), b.status, b.size_mb or "", b.path or ""])
+    ws3 = None
+    for r in rows:
+        fecha = r.ts.strftime("%Y-%m-%d %H:%M") if r.ts else ""
+        if r.kind == "maintenance":
+            ws1.append([r.pc_name or "", fecha, r.actor or "", r.detail or ""])
+        elif r.kind == "backup":
+            ws2.append([r.pc_name or "", fecha, r.status, r.size_mb or "", r.path or ""])
+        else:
+            if ws3 is None:
+                ws3 = wb.create_sheet("Cambios")
+                ws3.append(["Fecha","Usuario","Acción","Entidad","PC","Detalle"])
+            ws3.append([fecha, r.actor or "", r.status or "", r.path or "", r.pc_name or "", r.detail or ""])
     return wb
 
-def activity_to_pdf(maintenances, backups):
+def activity_to_pdf(rows):
+    """PDF de actividad: una línea por evento, en el orden del stream (más reciente primero)."""
     bio = BytesIO(); c = canvas.Canvas(bio, pagesize=A4)
     w,h = A4; margin=40; y=h-margin
     c.setFont("Helvetica-Bold", 12); c.drawString(margin,y,"Actividad (Mantenimientos y Backups)"); y-=24
-    c.setFont("Helvetica-Bold", 10); c.drawString(margin,y,"Mantenimientos"); y-=16; c.setFont("Helvetica",9)
-    for m in maintenances:
-        if y<60: c.showPage(); y=h-margin; c.setFont("Helvetica",9)
-        c.drawString(margin,y,f"{m.date_performed.strftime('%Y-%m-%d %H:%M')} - {m.pc.name} - {m.performed_by or ''} - {m.description or ''}"); y-=14
-    y-=12; c.setFont("Helvetica-Bold", 10); c.drawString(margin,y,"Backups"); y-=16; c.setFont("Helvetica",9)
-    for b in backups:
+    c.setFont("Helvetica",9)
+    for r in rows:
         if y<60: c.showPage(); y=h-margin; c.setFont("Helvetica",9)
-        c.drawString(margin,y,f"{b.date_performed.strftime('%Y-%m-%d %H:%M')} - {b.pc.name} - {b.status} - {b.size_mb or ''} MB - {b.path or ''}"); y-=14
+        fecha = r.ts.strftime('%Y-%m-%d %H:%M') if r.ts else ''
+        if r.kind == "maintenance":
+            line = f"{fecha} - Mant. - {r.pc_name or ''} - {r.actor or ''} - {r.detail or ''}"
+        elif r.kind == "backup":
+            line = f"{fecha} - Backup - {r.pc_name or ''} - {r.status} - {r.size_mb or ''} MB - {r.path or ''}"
+        else:
+            line = f"{fecha} - Cambio - {r.actor or ''} - {r.status or ''} {r.path or ''} - {r.detail or ''}"
+        c.drawString(margin,y,line); y-=14
     c.showPage(); c.save(); bio.seek(0); return bio
@@ -1,4 +1,5 @@
 
+import io
 from io import StringIO, BytesIO
 from flask import Response
 import csv
@@ -13,62 +14,183 @@ def stream_csv(filename, headers, rows):
     return Response(data, mimetype="text/csv",
                     headers={"Content-Disposition": f"attachment; filename={filename}"} )
 
+def xlsx_bytes(headers, rows):
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    if headers:
+        ws.append(headers)
+    for r in rows:
+        ws.append(list(r))
+    bio = BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
+
 def stream_xlsx(filename, headers, rows):
     try:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = wb.active
-        if headers:
-            ws.append(headers)
-        for r in rows:
-            ws.append(list(r))
-        bio = BytesIO()
-        wb.save(bio)
-        return Response(bio.getvalue(),
+        return Response(xlsx_bytes(headers, rows),
                         mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         headers={"Content-Disposition": f"attachment; filename={filename}"} )
     except Exception:
         return stream_csv(filename.replace(".xlsx", ".csv"), headers, rows)
 
-def stream_pdf(filename, title, headers, rows):
-    try:
+class PdfTableWriter:
+    """Tabla simple (canvas de ReportLab) que se escribe fila por fila en `out` (ruta o archivo).
+    continued=True: sigue una tabla ya empezada (sin título ni encabezados, como las páginas 2+)."""
+
+    def __init__(self, out, title, headers, canvasmaker=None, continued=False):
         from reportlab.lib.pagesizes import A4, landscape
         from reportlab.pdfgen import canvas
         from reportlab.lib.units import cm
 
-        buf = BytesIO()
-        c = canvas.Canvas(buf, pagesize=landscape(A4))
-        width, height = landscape(A4)
+        self.cm = cm
+        self.c = (canvasmaker or canvas.Canvas)(out, pagesize=landscape(A4))
+        self.width, self.height = landscape(A4)
+        self.ncols = len(headers) if headers else None
 
-        y = height - 2*cm
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(2*cm, y, title)
-        y -= 0.8*cm
+        c = self.c
+        self.y = self.height - 2*cm
+        self.col_width = (self.width - 4*cm) / max(len(headers) if headers else 1, 1)
+        if continued:
+            c.setFont("Helvetica", 9)
+            return
+        if title:
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(2*cm, self.y, title)
+            self.y -= 0.8*cm
 
         c.setFont("Helvetica-Bold", 10)
         x = 2*cm
-        col_width = (width - 4*cm) / max(len(headers) if headers else 1, 1)
         if headers:
             for h in headers:
-                c.drawString(x, y, str(h)[:40])
-                x += col_width
+                c.drawString(x, self.y, str(h)[:40])
+                x += self.col_width
+            self.y -= 0.6*cm
+        c.setFont("Helvetica", 9)
+
+    def write(self, row):
+        cm = self.cm
+        x = 2*cm
+        if self.y < 2*cm:
+            self.c.showPage()
+            self.c.setFont("Helvetica", 9)
+            self.y = self.height - 2*cm
+        for cell in (row[:self.ncols] if self.ncols else row):
+            self.c.drawString(x, self.y, str(cell)[:50])
+            x += self.col_width
+        self.y -= 0.5*cm
+
+    def close(self):
+        self.c.showPage()
+        self.c.save()
+
+    @staticmethod
+    def page_rows(title, headers):
+        """Filas que entran en la primera página y en las siguientes (mismas cuentas que write)."""
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.units import cm
+
+        def fit(y):
+            n = 0
+            while y >= 2*cm:
+                n += 1
+                y -= 0.5*cm
+            return n
+
+        top = landscape(A4)[1] - 2*cm
+        y = top
+        if title:
+            y -= 0.8*cm
+        if headers:
             y -= 0.6*cm
+        return fit(y), fit(top)
 
-        c.setFont("Helvetica", 9)
-        for row in rows:
-            x = 2*cm
-            if y < 2*cm:
-                c.showPage()
-                y = height - 2*cm
-            for cell in row:
-                c.drawString(x, y, str(cell)[:50])
-                x += col_width
-            y -= 0.5*cm
-
-        c.showPage()
-        c.save()
-        pdf_data = buf.getvalue()
+def render_table_pdf(title, headers, rows, canvasmaker=None, continued=False):
+    """Renderiza la tabla simple (canvas) y devuelve los bytes del PDF."""
+    buf = BytesIO()
+    w = PdfTableWriter(buf, title, headers, canvasmaker, continued)
+    for row in rows:
+        w.write(row)
+    w.close()
+    return buf.getvalue()
+
+def table_pdf_layout(title, headers, rows):
+    """Diagramación de render_table_pdf para pdf_parallel: todas las filas miden 1."""
+    first, rest = PdfTableWriter.page_rows(title, headers)
+    return [1] * len(rows), first, rest, 0
+
+def pdf_bytes(title, headers, rows):
+    """PDF de la tabla simple; los reportes grandes se dibujan en varios procesos (ver pdf_parallel)."""
+    from .pdf_parallel import render_pdf
+    return render_pdf(f"{__name__}:render_table_pdf", title, headers, rows, f"{__name__}:table_pdf_layout")
+
+def stream_pdf(filename, title, headers, rows):
+    try:
+        pdf_data = pdf_bytes(title, headers, rows)
         return Response(pdf_data, mimetype="application/pdf",
                         headers={"Content-Disposition": f"attachment; filename={filename}"} )
     except Exception:
         return stream_csv(filename.replace(".pdf", ".csv"), headers, rows)
+
+# ---- Escritores por fila (un solo recorrido de datos -> varios formatos) ----
+
+class CsvWriter:
+    """CSV (utf-8 con BOM, como stream_csv) sobre un archivo binario ya abierto."""
+
+    def __init__(self, raw, headers):
+        self.raw = raw
+        self.text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        self.w = csv.writer(self.text)
+        if headers:
+            self.w.writerow(headers)
+
+    def write(self, row):
+        self.w.writerow(row)
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()
+
+class XlsxWriter:
+    """XLSX en modo write-only (no guarda las filas en memoria) que se graba en `path` al cerrar."""
+
+    def __init__(self, path, headers):
+        from openpyxl import Workbook
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet()
+        if headers:
+            self.ws.append(headers)
+
+    def write(self, row):
+        self.ws.append(list(row))
+
+    def close(self):
+        self.wb.save(self.path)
+
+class ZipStream:
+    """Destino no seekable para zipfile: junta lo escrito y `drain()` lo va entregando.
+
+    zipfile detecta que no puede hacer seek y usa descriptores de datos, así
+    el ZIP sale por partes sin armar el archivo completo en memoria.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def write(self, data):
+        self._buf += data
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
@@ -0,0 +1,96 @@
+# app/watermark.py
+"""Marca de versión de los datos que alimentan reportes y exportaciones.
+
+Cambia cuando se inserta, borra o edita algo en las tablas involucradas, así
+un artefacto generado con la misma marca se puede reutilizar tal cual.
+
+Leerla tiene que ser barato (se consulta en cada request de reporte): en vez de
+contar filas se usa un contador de cambios (`data_version`, una fila) que
+suben, dentro de la misma transacción, un listener after_flush (altas,
+ediciones y bajas por el ORM) y uno do_orm_execute (INSERT/UPDATE/DELETE
+masivos con session.execute, como la importación). Se suma el MAX(id) de cada
+tabla, que sale del índice de la clave primaria, para notar altas hechas por
+fuera del ORM.
+"""
+import hashlib
+from datetime import date, datetime
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import DBAPIError
+from . import db
+
+
+def _tracked():
+    from .models import Task, PC, Maintenance, Backup, Alert, ChangeLog, Config
+    from .inventory_models import InventoryItem
+    return Task, PC, Maintenance, Backup, Alert, InventoryItem, ChangeLog, Config
+
+
+def _bump(conn):
+    from .models import DataVersion
+    conn.execute(update(DataVersion).where(DataVersion.id == 1)
+                 .values(version=DataVersion.version + 1, changed_at=datetime.utcnow()))
+
+
+def _after_flush(session, _flush_context):
+    tracked = _tracked()
+    if any(isinstance(obj, tracked) for obj in chain(session.new, session.dirty, session.deleted)):
+        _bump(session.connection())
+
+
+def _do_orm_execute(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _tracked()):
+        _bump(state.session.connection())
+
+
+def init_watermark(app):
+    """Engancha los listeners y crea la fila del contador si falta."""
+    from .models import DataVersion
+
+    for name, fn in (("after_flush", _after_flush), ("do_orm_execute", _do_orm_execute)):
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+    with app.app_context():
+        try:
+            if db.session.get(DataVersion, 1) is None:
+                db.session.add(DataVersion(id=1, version=0))
+                db.session.commit()
+        except DBAPIError:
+            # otro proceso la creó al mismo tiempo
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+
+def _snapshot():
+    from .models import DataVersion
+
+    ids = [select(func.max(model.id)).scalar_subquery() for model in _tracked() if model.__name__ != "Config"]
+    version = [
+        select(DataVersion.version).where(DataVersion.id == 1).scalar_subquery(),
+        select(DataVersion.changed_at).where(DataVersion.id == 1).scalar_subquery(),
+    ]
+    row = tuple(db.session.execute(select(*(ids + version))).one())
+    return row[:-1], row[-1]
+
+
+def data_version():
+    """(token, last_modified) de los datos actuales.
+
+    El token incluye el día, porque los reportes de PCs calculan antigüedades
+    contra hoy. last_modified es la hora (UTC, naive) del último cambio
+    registrado; puede ser None si todavía no existe el contador.
+    """
+    counters, changed_at = _snapshot()
+    raw = repr((counters, changed_at, current_app.config.get("TZ_NAME"), date.today().isoformat()))
+    token = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    return token, changed_at if isinstance(changed_at, datetime) else None
+
+
+def data_watermark():
+    """Token corto que identifica la versión actual de los datos."""
+    return data_version()[0]
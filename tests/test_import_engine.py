@@ -0,0 +1,57 @@
+"""Importación de tareas (app/import_engine.py): identidad de las filas."""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    d = tmp_path_factory.mktemp("imp")
+    mp = pytest.MonkeyPatch()
+    mp.setenv("DATABASE_URL", f"sqlite:///{d / 'test.db'}")
+    mp.setenv("UPLOAD_FOLDER", str(d))
+    mp.setenv("ADMISSION_ENABLED", "false")
+    from app import create_app, db, scheduler
+    from app.models import PC
+
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.app_context():
+        db.session.add_all([PC(name="PC-A"), PC(name="PC-B")])
+        db.session.commit()
+    yield app
+    if scheduler.running:  # create_app lo arranca; otro módulo vuelve a crear la app
+        scheduler.shutdown(wait=False)
+    mp.undo()
+
+
+def _row(pc, **extra):
+    return dict({"titulo": "Cambiar disco", "fecha_inicio": "01/03/2025", "pc": pc,
+                 "estado": "pendiente", "prioridad": "media"}, **extra)
+
+
+def test_same_title_and_date_on_two_pcs(app):
+    from app import db
+    from app.import_engine import import_records
+    from app.models import PC, Task
+
+    with app.app_context():
+        result = import_records([_row("PC-A"), _row("PC-B")])
+        assert (result.inserted, result.failed) == (2, 0)
+        pcs = db.session.execute(
+            db.select(PC.name).join(Task, Task.pc_id == PC.id).where(Task.title == "Cambiar disco")
+        ).scalars().all()
+        assert sorted(pcs) == ["PC-A", "PC-B"]
+
+        # reimportar: cada fila vuelve a su propia tarea
+        result = import_records([_row("PC-A", estado="finalizada"), _row("PC-B")])
+        assert (result.inserted, result.updated, result.skipped) == (0, 1, 1)
+        statuses = dict(db.session.execute(
+            db.select(PC.name, Task.status).join(Task, Task.pc_id == PC.id)).all())
+        assert statuses == {"PC-A": "finalizada", "PC-B": "pendiente"}
+
+
+def test_repeated_row_same_pc(app):
+    from app.import_engine import import_records
+
+    with app.app_context():
+        result = import_records([_row("PC-A", titulo="Otra"), _row("PC-A", titulo="Otra")])
+        assert (result.inserted, result.failed) == (1, 1)
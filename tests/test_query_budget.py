@@ -0,0 +1,82 @@
+"""Presupuesto de consultas (app/query_budget.py) con QUERY_BUDGET_ENFORCE activo:
+los listados, reportes y exportaciones vigilados no deben volver a hacer N+1."""
+from datetime import date, datetime
+
+import pytest
+from flask import url_for
+
+# endpoints vigilados sin argumentos de ruta
+ENDPOINTS = [
+    "main.index", "main.pcs_list", "main.alerts_list", "tasks.list_tasks",
+    "inventory.list_items", "admin.email_logs",
+    "reports.dashboard", "reports.tasks_report", "reports.pcs_report",
+    "reports.tasks_csv", "reports.pcs_csv", "exportx.export_tasks_xls", "exportx.export_pcs_xls",
+]
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    d = tmp_path_factory.mktemp("qb")
+    mp = pytest.MonkeyPatch()
+    mp.setenv("DATABASE_URL", f"sqlite:///{d / 'test.db'}")
+    mp.setenv("UPLOAD_FOLDER", str(d))
+    mp.setenv("QUERY_BUDGET_ENFORCE", "true")
+    mp.setenv("ADMISSION_ENABLED", "false")
+    from app import create_app, db, scheduler
+    from app.models import PC, Alert, Backup, Maintenance, Task
+    from app.inventory_models import InventoryItem
+
+    app = create_app()
+    app.config.update(TESTING=True, RESPONSE_CACHE_ENTRIES=0)
+    # suficientes filas para que un lazy-load por fila pase el límite
+    with app.app_context():
+        for i in range(30):
+            pc = PC(name=f"PC-{i:02d}", location="Sede" if i % 2 else "Central")
+            db.session.add(pc)
+            db.session.flush()
+            db.session.add(Maintenance(pc_id=pc.id, performed_by="tec", description="x",
+                                       date_performed=datetime(2025, 1, 1 + i % 28)))
+            db.session.add(Backup(pc_id=pc.id, date_performed=datetime(2025, 2, 1 + i % 28), size_mb=1, path="/x"))
+            db.session.add(Alert(pc_id=pc.id, message="m"))
+            for j in range(3):
+                db.session.add(Task(title=f"T{i}-{j}", pc_id=pc.id, problem="p",
+                                    status=("pendiente", "en_progreso", "finalizada")[j],
+                                    start_date=date(2025, 1, 1), end_date=date(2025, 1, 10)))
+            db.session.add(InventoryItem(kind="pc", name=f"inv-{i}"))
+        db.session.commit()
+    yield app
+    if scheduler.running:  # create_app lo arranca; otro módulo vuelve a crear la app
+        scheduler.shutdown(wait=False)
+    mp.undo()
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    c = app.test_client()
+    c.post("/auth/login", data={"username": "admin", "password": "admin"})
+    return c
+
+
+def _url(app, endpoint):
+    with app.test_request_context():
+        return url_for(endpoint)
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_endpoint_within_budget(app, client, endpoint):
+    resp = client.get(_url(app, endpoint))
+    resp.get_data()  # las respuestas en streaming consultan mientras se envían
+    resp.close()
+    assert resp.status_code == 200, endpoint
+
+
+def test_exceeding_budget_fails(app, client):
+    from app.query_budget import QueryBudgetExceeded
+    app.config["QUERY_BUDGETS"] = {"main.pcs_list": 0}
+    try:
+        with pytest.raises(QueryBudgetExceeded):
+            resp = client.get(_url(app, "main.pcs_list"))
+            resp.get_data()
+            resp.close()
+    finally:
+        app.config.pop("QUERY_BUDGETS")